@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""Benchmark suite for curve_memory with stored baselines.
+
+Times the main kernels across input sizes and records best-of-N wall time,
+throughput (items/s) and peak traced memory (``tracemalloc``, which includes
+NumPy buffers). Results can be saved as a JSON baseline and compared against a
+previous one; the run fails when throughput drops or peak memory grows by more
+than ``--threshold`` (a fraction, default 0.25).
+
+Usage::
+
+    python benchmarks/bench.py --sizes 1e2,1e3,1e4,1e5 --save benchmarks/baseline.json
+    python benchmarks/bench.py --compare benchmarks/baseline.json --threshold 0.3
+    python benchmarks/bench.py --cases encode_curve,decode_curve --sizes 1e6,1e7
+
+Import cases (``import:*``) time cold imports in fresh interpreters; their
+peak is the child's own max RSS (``VmHWM``; ``ru_maxrss`` on macOS, 0 where
+neither is available) and throughput is imports per second. Skip them
+with ``--no-imports``.
+
+Per-step Python loops (``rmf_sweep``, ``reconstruct_from_memory`` with
+``method='step'``) and ``MemoryMatcher.query`` (whose size is the archive
+length) are capped at smaller sizes; larger sizes are skipped for them. Baselines are machine specific: compare only runs from the same host.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from curve_memory import GlyphTable, decode_curve, encode_table, wedge_contract
+from curve_memory.cma3d import curve_memory_3d, reconstruct_from_memory, reconstruct_range, rmf_frames, rmf_sweep
+from curve_memory.matcher import MemoryMatcher
+from curve_memory.hyperbolic import geodesic_cdist, geodesic_distance_array, pi_a_over_pi_array
+from curve_memory.simplify import simplify_memory
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+
+def _spiral(n: int) -> np.ndarray:
+    t = np.linspace(0, 40*np.pi, n)
+    return np.stack([(1 + t)*np.cos(t), (1 + t)*np.sin(t)], axis=1)
+
+def _helix(n: int) -> np.ndarray:
+    t = np.linspace(0, 40*np.pi, n)
+    return np.stack([np.cos(t), np.sin(t), 0.1*t], axis=1)
+
+def _glyphs(n: int) -> GlyphTable:
+    rng = np.random.default_rng(0)
+    return GlyphTable(family=rng.integers(0, 2, size=n),
+                      params={"k": rng.normal(size=n), "L": rng.uniform(0.5, 2.0, size=n)})
+
+def _shapes(n: int) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(0)
+    u = np.linspace(0, 1, 64)
+    return [{'L': 1.0, 'u': u, 'kappa': 1 + a*np.sin(2*np.pi*(u + b)), 'tau': c*np.cos(4*np.pi*u)}
+            for a, b, c in rng.uniform(0, 1, size=(n, 3))]
+
+def _matcher(n: int) -> MemoryMatcher:
+    m = MemoryMatcher(128)
+    m.add(_shapes(n))
+    return m
+
+def _hyper_points(n: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(n, 3))
+
+# name -> (setup(n) -> zero-arg callable, max size or None)
+CASES: Dict[str, Any] = {
+    'encode_curve': (lambda n: (lambda P=_spiral(n): encode_table(P)), None),
+    'decode_curve': (lambda n: (lambda t=_glyphs(n): decode_curve(t, as_array=True)), None),
+    'wedge_contract': (lambda n: (lambda t=_glyphs(n): wedge_contract(t)), None),
+    'curve_memory_3d': (lambda n: (lambda P=_helix(n): curve_memory_3d(P, levels=0)), None),
+    'reconstruct_from_memory[scan]': (
+        lambda n: (lambda m=curve_memory_3d(_helix(n), levels=0): reconstruct_from_memory(m, method='scan')), None),
+    'reconstruct_from_memory[scan,f32]': (
+        lambda n: (lambda m=curve_memory_3d(_helix(n), levels=0, dtype=np.float32):
+                   reconstruct_from_memory(m, method='scan')), None),
+    'reconstruct_from_memory[magnus4]': (
+        lambda n: (lambda m=curve_memory_3d(_helix(n), levels=0): reconstruct_from_memory(m, method='magnus4')), None),
+    'reconstruct_from_memory[step]': (
+        lambda n: (lambda m=curve_memory_3d(_helix(n), levels=0): reconstruct_from_memory(m)), 10**4),
+    # 1% window of a memory with 100 checkpoints
+    'reconstruct_range': (
+        lambda n: (lambda m=curve_memory_3d(_helix(n), levels=0, checkpoints=100):
+                   reconstruct_range(m, 0.45, 0.46)), None),
+    'simplify_memory': (
+        lambda n: (lambda m=curve_memory_3d(_helix(n), levels=0): simplify_memory(m, 1e-3 * m['L'], levels=None)), None),
+    # top-10 over an archive of n memories (the warm-up call merges the additions)
+    'MemoryMatcher.query': (
+        lambda n: (lambda m=_matcher(n), q=_shapes(1)[0]: m.query(q, 10)), 10**4),
+    'rmf_sweep': (lambda n: (lambda P=_helix(n): rmf_sweep(P)), 10**4),
+    'rmf_frames': (lambda n: (lambda P=_helix(n): rmf_frames(P)), None),
+    'pi_a_over_pi_array': (
+        lambda n: (lambda r=np.linspace(0.01, 5.0, n): pi_a_over_pi_array(r, -1.0)), None),
+    'geodesic_distance_array': (
+        lambda n: (lambda A=_hyper_points(n), B=_hyper_points(n)[::-1]: geodesic_distance_array(A, B, -1.0)), None),
+    # n pairwise distances from a sqrt(n) x sqrt(n) block
+    'geodesic_cdist': (
+        lambda n: (lambda A=_hyper_points(max(int(np.sqrt(n)), 1)): geodesic_cdist(A, kappa=-1.0)), None),
+}
+
+# name -> statement timed in a fresh interpreter
+IMPORT_CASES: Dict[str, str] = {
+    'package': 'import curve_memory',
+    'encode_curve': 'from curve_memory import encode_curve',
+    'curve_memory_3d': 'from curve_memory import curve_memory_3d',
+    'all': 'from curve_memory import *',
+}
+
+_IMPORT_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+exec(sys.argv[1])
+dt = time.perf_counter() - t0
+rss = 0
+try:
+    # VmHWM is this process's own peak; ru_maxrss inherits the parent's on Linux
+    with open('/proc/self/status') as f:
+        rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith('VmHWM:'))
+except (OSError, StopIteration):
+    if sys.platform == 'darwin':
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps([dt, rss]))
+"""
+
+def measure_import(stmt: str, repeat: int) -> Dict[str, float]:
+    """Best-of-``repeat`` cold import time of ``stmt`` in a new interpreter."""
+    best, peak = float('inf'), 0
+    for _ in range(max(1, repeat)):
+        out = subprocess.run([sys.executable, '-c', _IMPORT_PROBE, stmt],
+                             check=True, capture_output=True, text=True).stdout
+        dt, rss = json.loads(out.strip().splitlines()[-1])
+        best = min(best, dt)
+        peak = max(peak, int(rss))
+    return {'seconds': best, 'throughput': 1.0 / max(best, 1e-12), 'peak_bytes': peak}
+
+def measure(fn: Callable[[], Any], n: int, repeat: int) -> Dict[str, float]:
+    """Best-of-``repeat`` wall time plus one traced run for peak memory."""
+    fn()  # warm up
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': best, 'throughput': n / max(best, 1e-12), 'peak_bytes': int(peak)}
+
+def run(cases: List[str], sizes: List[int], repeat: int = 3, log=None,
+        imports: bool = True) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name, stmt in (IMPORT_CASES.items() if imports else ()):
+        res = measure_import(stmt, repeat)
+        results[f'import:{name}'] = res
+        if log:
+            log(f'{"import:" + name:32s} {"":11s} {res["seconds"]*1e3:10.3f} ms '
+                f'{"":15s}  rss  {res["peak_bytes"]/2**20:9.2f} MiB')
+    for name in cases:
+        setup, cap = CASES[name]
+        for n in sizes:
+            if cap is not None and n > cap:
+                continue
+            res = measure(setup(n), n, repeat)
+            results[f'{name}@{n}'] = res
+            if log:
+                log(f'{name:32s} n={n:<9d} {res["seconds"]*1e3:10.3f} ms '
+                    f'{res["throughput"]:12.4g} /s  peak {res["peak_bytes"]/2**20:9.2f} MiB')
+    return {
+        'meta': {'python': platform.python_version(), 'numpy': np.__version__,
+                 'machine': platform.machine(), 'system': platform.system(),
+                 'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'repeat': repeat},
+        'results': results,
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Regressions of ``current`` against ``baseline`` beyond ``threshold`` (fraction)."""
+    problems = []
+    for key, base in baseline.get('results', {}).items():
+        cur = current['results'].get(key)
+        if cur is None:
+            continue
+        if cur['throughput'] < base['throughput'] * (1 - threshold):
+            problems.append(f'{key}: throughput {cur["throughput"]:.4g}/s vs baseline {base["throughput"]:.4g}/s')
+        if cur['peak_bytes'] > base['peak_bytes'] * (1 + threshold) + 4096:
+            problems.append(f'{key}: peak memory {cur["peak_bytes"]} B vs baseline {base["peak_bytes"]} B')
+    return problems
+
+def _sizes(text: str) -> List[int]:
+    return [int(float(s)) for s in text.split(',') if s.strip()]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    p.add_argument('--cases', default=','.join(CASES),
+                   help='comma-separated case names (default: all)')
+    p.add_argument('--sizes', type=_sizes, default=list(DEFAULT_SIZES),
+                   help='comma-separated input sizes, e.g. 1e2,1e3,1e7')
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--no-imports', dest='imports', action='store_false',
+                   help='skip the cold-import cases')
+    p.add_argument('--save', help='write results JSON here')
+    p.add_argument('--compare', help='baseline JSON to check against')
+    p.add_argument('--threshold', type=float, default=0.25,
+                   help='allowed fractional throughput loss / memory growth')
+    args = p.parse_args(argv)
+    cases = [c.strip() for c in args.cases.split(',') if c.strip()]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        p.error(f'unknown cases: {", ".join(unknown)}')
+    result = run(cases, args.sizes, args.repeat, log=print, imports=args.imports)
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(result, f, indent=1, sort_keys=True)
+        print(f'saved {args.save}')
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        problems = compare(result, baseline, args.threshold)
+        for msg in problems:
+            print('REGRESSION', msg, file=sys.stderr)
+        if problems:
+            return 1
+        print(f'no regressions beyond {args.threshold:.0%}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
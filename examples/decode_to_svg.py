@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import json, argparse
 from curve_memory import decode_curve
+from curve_memory.cmab import load_cmab
 
 def write_svg(points, out_path: str):
     xs = [p[0] for p in points]; ys = [p[1] for p in points]
@@ -24,8 +25,11 @@ if __name__ == "__main__":
     ap.add_argument("--in", dest="inp", type=str, default="examples/spiral.cma.json")
     ap.add_argument("--out", type=str, default="examples/spiral.svg")
     args = ap.parse_args()
-    with open(args.inp, "r", encoding="utf-8") as f:
-        cma = json.load(f)
+    if args.inp.endswith(".cmab"):
+        cma = load_cmab(args.inp, table=True)
+    else:
+        with open(args.inp, "r", encoding="utf-8") as f:
+            cma = json.load(f)
     pts = decode_curve(cma)
     write_svg(pts, args.out)
     print(f"Wrote {args.out}")
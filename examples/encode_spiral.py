@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import json, argparse, math
 from curve_memory import encode_curve
+from curve_memory.cmab import save_cmab
 
 def spiral_points(n=500, a=0.0, b=0.05):
     pts = []
@@ -19,6 +20,9 @@ if __name__ == "__main__":
     args = ap.parse_args()
     pts = spiral_points(args.n)
     cma = encode_curve(pts, pi_mode={"type":"adaptive","alpha":0.1,"mu":0.02})
-    with open(args.out, "w", encoding="utf-8") as f:
-        json.dump(cma, f, indent=2)
+    if args.out.endswith(".cmab"):
+        save_cmab(args.out, cma)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(cma, f, indent=2)
     print(f"Wrote {args.out}")
@@ -2,138 +2,448 @@
 """CMA-3D command-line tool.
 
 Subcommands:
-  encode        CSV (x,y,z) -> memory (.npz/.json)
+  encode        CSV (x,y,z) -> memory (.npz/.json/.cmm)
   reconstruct   memory -> CSV (choose --ds or --num)
-  convert       memory format conversion (.npz <-> .json)
+  convert       memory format conversion (.npz/.json/.cmm)
+  encode-batch  directory/glob of CSVs -> memories or one .npz archive (process pool)
+  reconstruct-batch  memories or archive -> directory of CSVs (process pool)
+  match         top-k memories or archive entries most similar to a query memory
+
+Memory formats: .npz (compressed), .json (float lists), .cmm (binary,
+memory-mapped on load; see curve_memory.cmm). All three keep the array dtypes:
+encode/encode-batch/convert take --dtype float32 (and --u-dtype float16) for
+reduced-precision memories; see curve_memory.cma3d for the drift bounds.
+encode and convert take --simplify TOL to keep only the kappa/tau knots needed
+to reconstruct within TOL (see curve_memory.simplify), and --checkpoints N to
+store N pose checkpoints so that reconstruct --range U0 U1 only integrates the
+requested window (see curve_memory.cma3d.reconstruct_range).
 
 CSV format: header optional; if present first line must start with 'x'.
+encode reads and reconstruct writes CSV in blocks of --chunk-rows points, and
+reconstruct integrates block by block (see
+curve_memory.cma3d.reconstruct_chunks), so neither holds the whole curve in
+memory; reconstruct --range holds only the requested window.
+
+encode/reconstruct take --profile TRACE_JSON to write per-stage timings as a
+Chrome trace (see curve_memory.profiling) and print a summary to stderr.
 """
 from __future__ import annotations
-import argparse, csv, json, os, math
-from typing import Dict, Any, Iterable, List
+import argparse, glob, itertools, json, os, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 import numpy as np
 
-from curve_memory.cma3d import curve_memory_3d, reconstruct_from_memory
+from curve_memory.cma3d import (RECONSTRUCT_METHODS, add_checkpoints, cast_memory,
+                                reconstruct_chunks, reconstruct_range)
+from curve_memory.cmm import save_cmm, load_cmm
+from curve_memory.matcher import MemoryMatcher
+from curve_memory.simplify import simplify_memory
+from curve_memory.stream import CurveMemoryStream
+from curve_memory.profiling import Profiler, stage
 
-def read_csv_points(path: str) -> np.ndarray:
-    pts: List[List[float]] = []
-    with open(path, 'r', newline='') as f:
-        r = csv.reader(f)
-        first = True
-        for row in r:
-            if not row:
-                continue
-            if first and row[0].lower().startswith('x'):
-                first = False
-                continue
-            first = False
+CSV_CHUNK_ROWS = 1 << 18
+
+def _parse_rows_slow(lines: List[str], first_lineno: int, bad_rows: Optional[List[Tuple[int, str]]]) -> np.ndarray:
+    """Row-by-row fallback for a chunk that failed bulk parsing; locates bad rows."""
+    out: List[Tuple[float, float, float]] = []
+    for i, line in enumerate(lines):
+        text = line.strip()
+        if not text:
+            continue
+        row = text.split(',')
+        try:
             if len(row) < 3:
-                raise ValueError(f"Expected 3 columns, got: {row}")
-            pts.append([float(row[0]), float(row[1]), float(row[2])])
-    if not pts:
+                raise ValueError
+            out.append((float(row[0]), float(row[1]), float(row[2])))
+        except ValueError:
+            if bad_rows is None:
+                raise ValueError(f"line {first_lineno + i}: expected 3 numeric columns, got: {text!r}") from None
+            bad_rows.append((first_lineno + i, text))
+    return np.asarray(out, dtype=float).reshape(-1, 3)
+
+def iter_csv_points(path: str, *, chunk_rows: int = CSV_CHUNK_ROWS,
+                    bad_rows: Optional[List[Tuple[int, str]]] = None) -> Iterator[np.ndarray]:
+    """Yield (k,3) point blocks of at most ``chunk_rows`` rows from a CSV file.
+
+    Each block is parsed in bulk by ``np.loadtxt``; only a block that fails is
+    re-parsed row by row. Bad rows raise ValueError with their line number, or,
+    if a ``bad_rows`` list is given, are appended to it as (lineno, text) and
+    skipped. Memory use is bounded by ``chunk_rows``.
+    """
+    with open(path, 'r', newline='') as f:
+        lineno = 1
+        header_checked = False
+        while True:
+            lines = list(itertools.islice(f, chunk_rows))
+            if not lines:
+                break
+            if not header_checked:
+                for i, line in enumerate(lines):
+                    if line.strip():
+                        if line.lower().startswith('x'):
+                            lines[i] = '\n'
+                        header_checked = True
+                        break
+            try:
+                block = np.loadtxt(lines, delimiter=',', usecols=(0, 1, 2), ndmin=2,
+                                   dtype=float, comments=None)
+            except ValueError:
+                block = _parse_rows_slow(lines, lineno, bad_rows)
+            lineno += len(lines)
+            if block.shape[0]:
+                yield block
+
+def read_csv_points(path: str, *, bad_rows: Optional[List[Tuple[int, str]]] = None) -> np.ndarray:
+    blocks = list(iter_csv_points(path, bad_rows=bad_rows))
+    if not blocks:
         raise ValueError("No points read from CSV")
-    return np.asarray(pts, dtype=float)
+    return np.concatenate(blocks, axis=0)
+
+def write_csv_points(path: str, pts: np.ndarray, *, chunk_rows: int = CSV_CHUNK_ROWS) -> None:
+    """Write x,y,z rows with ``%.9g`` formatting, one bulk format call per chunk."""
+    write_csv_blocks(path, [pts], chunk_rows=chunk_rows)
 
-def write_csv_points(path: str, pts: np.ndarray) -> None:
+def write_csv_blocks(path: str, blocks: Iterable[np.ndarray], *, chunk_rows: int = CSV_CHUNK_ROWS) -> int:
+    """``write_csv_points`` for consecutive (n_i,3) blocks, e.g. from
+    ``reconstruct_chunks``; only one block is held at a time. Returns the row count."""
+    rows = 0
     with open(path, 'w', newline='') as f:
-        w = csv.writer(f)
-        w.writerow(['x','y','z'])
-        for p in pts:
-            w.writerow([f"{p[0]:.9g}", f"{p[1]:.9g}", f"{p[2]:.9g}"])
+        f.write('x,y,z\r\n')
+        for pts in blocks:
+            pts = np.asarray(pts, dtype=float)
+            with stage('csv.write'):
+                for i in range(0, pts.shape[0], chunk_rows):
+                    block = pts[i:i + chunk_rows]
+                    f.write(('%.9g,%.9g,%.9g\r\n' * block.shape[0]) % tuple(block.ravel().tolist()))
+            rows += pts.shape[0]
+    return rows
 
 def save_npz(path: str, mem: Dict[str, Any]) -> None:
-    np.savez_compressed(path, L=mem['L'], u=mem['u'], kappa=mem['kappa'], tau=mem['tau'])
+    extra = {} if mem.get('ds') is None else {'ds': float(mem['ds'])}
+    if mem.get('frames') is not None:
+        extra['frames'] = np.asarray(mem['frames'], dtype=float)
+    np.savez_compressed(path, L=mem['L'], u=mem['u'], kappa=mem['kappa'], tau=mem['tau'], **extra)
 
 def load_npz(path: str) -> Dict[str, Any]:
     data = np.load(path, allow_pickle=False)
-    return {"L": float(data["L"]), "u": data["u"], "kappa": data["kappa"], "tau": data["tau"]}
+    mem = {"L": float(data["L"]), "u": data["u"], "kappa": data["kappa"], "tau": data["tau"]}
+    if "ds" in data:
+        mem["ds"] = float(data["ds"])
+    if "frames" in data:
+        mem["frames"] = data["frames"]
+    return mem
 
 def save_json(path: str, mem: Dict[str, Any]) -> None:
+    obj = {"L": float(mem['L']),
+           "u": mem['u'].tolist(),
+           "kappa": mem['kappa'].tolist(),
+           "tau": mem['tau'].tolist(),
+           "dtypes": {k: np.asarray(mem[k]).dtype.name for k in ('u', 'kappa', 'tau')}}
+    if mem.get('ds') is not None:
+        obj["ds"] = float(mem['ds'])
+    if mem.get('frames') is not None:
+        obj["frames"] = np.asarray(mem['frames'], dtype=float).tolist()
     with open(path, 'w') as f:
-        json.dump({"L": float(mem['L']),
-                   "u": mem['u'].tolist(),
-                   "kappa": mem['kappa'].tolist(),
-                   "tau": mem['tau'].tolist()}, f)
+        json.dump(obj, f)
 
 def load_json(path: str) -> Dict[str, Any]:
     with open(path, 'r') as f:
         obj = json.load(f)
-    return {"L": float(obj['L']),
-            "u": np.array(obj['u'], dtype=float),
-            "kappa": np.array(obj['kappa'], dtype=float),
-            "tau": np.array(obj['tau'], dtype=float)}
+    dtypes = obj.get('dtypes', {})
+    mem = {"L": float(obj['L']),
+           "u": np.array(obj['u'], dtype=dtypes.get('u', float)),
+           "kappa": np.array(obj['kappa'], dtype=dtypes.get('kappa', float)),
+           "tau": np.array(obj['tau'], dtype=dtypes.get('tau', float))}
+    if "ds" in obj:
+        mem["ds"] = float(obj['ds'])
+    if "frames" in obj:
+        mem["frames"] = np.array(obj['frames'], dtype=float).reshape(-1, 8)
+    return mem
+
+MEMORY_SAVERS = {'.npz': save_npz, '.json': save_json, '.cmm': save_cmm}
+MEMORY_LOADERS = {'.npz': load_npz, '.json': load_json, '.cmm': load_cmm}
+
+def _memory_ext(path: str, flag: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in MEMORY_SAVERS:
+        raise SystemExit(f'{flag} must end with .npz, .json or .cmm')
+    return ext
+
+def save_memory(path: str, mem: Dict[str, Any]) -> None:
+    MEMORY_SAVERS[_memory_ext(path, '--out')](path, mem)
+
+def load_memory(path: str) -> Dict[str, Any]:
+    return MEMORY_LOADERS[_memory_ext(path, '--in')](path)
+
+def encode_csv(path: str, *, levels: int = 3, chunk_rows: int = CSV_CHUNK_ROWS,
+               bad_rows: Optional[List[Tuple[int, str]]] = None, dtype: str = 'float64',
+               u_dtype: Optional[str] = None) -> Tuple[int, Dict[str, Any]]:
+    """Encode a CSV file chunk by chunk; only the encoded memory is kept."""
+    enc = CurveMemoryStream(history=None)  # the memory covers the whole file
+    blocks = iter_csv_points(path, chunk_rows=chunk_rows, bad_rows=bad_rows)
+    while True:
+        with stage('csv.read'):
+            block = next(blocks, None)
+        if block is None:
+            break
+        enc.append(block)
+    if enc.n == 0:
+        raise ValueError("No points read from CSV")
+    return enc.n, enc.snapshot(levels=levels, dtype=dtype, u_dtype=u_dtype)
+
+def _step_size(mem: Dict[str, Any], ds: Optional[float], num: Optional[int]) -> Optional[float]:
+    if ds is not None:
+        return float(ds)
+    if num is not None:
+        if int(num) < 2:
+            raise SystemExit('--num must be at least 2')
+        return float(mem['L']) / (int(num) - 1)
+    return None
 
 def cmd_encode(args: argparse.Namespace) -> None:
-    pts = read_csv_points(args.infile)
-    mem = curve_memory_3d(pts, levels=args.levels)
-    if args.out.lower().endswith('.npz'):
-        save_npz(args.out, mem)
-    elif args.out.lower().endswith('.json'):
-        save_json(args.out, mem)
-    else:
-        raise SystemExit('--out must end with .npz or .json')
-    print(f"Encoded {len(pts)} points -> {args.out}")
+    _memory_ext(args.out, '--out')
+    bad: Optional[List[Tuple[int, str]]] = [] if args.skip_bad else None
+    n, mem = encode_csv(args.infile, levels=args.levels, chunk_rows=args.chunk_rows, bad_rows=bad,
+                        dtype=args.dtype, u_dtype=args.u_dtype)
+    if args.simplify is not None:
+        mem = simplify_memory(mem, args.simplify, levels=args.levels)
+    if args.checkpoints is not None:
+        add_checkpoints(mem, args.checkpoints)
+    if bad:
+        for lineno, text in bad[:10]:
+            print(f"skipped line {lineno}: {text!r}", file=sys.stderr)
+        print(f"skipped {len(bad)} bad rows", file=sys.stderr)
+    save_memory(args.out, mem)
+    print(f"Encoded {n} points -> {args.out}" +
+          (f" ({mem['u'].shape[0]} knots)" if args.simplify is not None else ""))
 
 def cmd_reconstruct(args: argparse.Namespace) -> None:
-    if args.infile.lower().endswith('.npz'):
-        mem = load_npz(args.infile)
-    elif args.infile.lower().endswith('.json'):
-        mem = load_json(args.infile)
+    mem = load_memory(args.infile)
+    ds = _step_size(mem, args.ds, args.num)
+    if args.range is not None:
+        blocks = [reconstruct_range(mem, args.range[0], args.range[1], ds=ds, method=args.method)]
     else:
-        raise SystemExit('--in must be .npz or .json')
-    ds = None
-    if args.ds is not None:
-        ds = float(args.ds)
-    elif args.num is not None:
-        L = float(mem['L'])
-        ds = L / int(args.num)
-    rec = reconstruct_from_memory(mem, ds=ds)
-    write_csv_points(args.out, rec)
-    print(f"Reconstructed {rec.shape[0]} points -> {args.out}")
+        blocks = reconstruct_chunks(mem, ds=ds, method=args.method, chunk_rows=max(2, args.chunk_rows))
+    rows = write_csv_blocks(args.out, blocks, chunk_rows=args.chunk_rows)
+    print(f"Reconstructed {rows} points -> {args.out}")
 
 def cmd_convert(args: argparse.Namespace) -> None:
-    if args.infile.lower().endswith('.npz'):
-        mem = load_npz(args.infile)
-    elif args.infile.lower().endswith('.json'):
-        mem = load_json(args.infile)
+    _memory_ext(args.out, '--out')
+    mem = load_memory(args.infile)
+    if args.dtype is not None or args.u_dtype is not None:
+        dtype = args.dtype or np.asarray(mem['kappa']).dtype
+        mem = cast_memory(mem, dtype, u_dtype=args.u_dtype)
+    if args.simplify is not None:
+        mem = simplify_memory(mem, args.simplify)
+    if args.checkpoints is not None:
+        add_checkpoints(mem, args.checkpoints)
+    save_memory(args.out, mem)
+    print(f"Converted {args.infile} -> {args.out}")
+
+# -- batch subcommands -------------------------------------------------------
+
+def save_archive(path: str, names: List[str], mems: List[Dict[str, Any]]) -> None:
+    """Store many memories in one .npz: concatenated u/kappa/tau plus offsets."""
+    counts = [m['u'].shape[0] for m in mems]
+    offsets = np.zeros(len(mems) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    cat = lambda key: np.concatenate([m[key] for m in mems]) if mems else np.zeros(0)
+    np.savez(path, names=np.array(names, dtype=str), offsets=offsets,
+             L=np.array([float(m['L']) for m in mems]), u=cat('u'), kappa=cat('kappa'), tau=cat('tau'))
+
+def load_archive(path: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+    data = np.load(path, allow_pickle=False)
+    off = data['offsets']; L = data['L']
+    u, kappa, tau = data['u'], data['kappa'], data['tau']
+    mems = [{'L': float(L[i]), 'u': u[a:b], 'kappa': kappa[a:b], 'tau': tau[a:b]}
+            for i, (a, b) in enumerate(zip(off[:-1], off[1:]))]
+    return [str(n) for n in data['names']], mems
+
+def _expand_inputs(spec: str, exts: Tuple[str, ...]) -> List[str]:
+    if os.path.isdir(spec):
+        paths = [os.path.join(spec, n) for n in os.listdir(spec)]
     else:
-        raise SystemExit('--in must be .npz or .json')
-    if args.out.lower().endswith('.npz'):
-        save_npz(args.out, mem)
-    elif args.out.lower().endswith('.json'):
-        save_json(args.out, mem)
+        paths = glob.glob(spec)
+    paths = sorted(p for p in paths if os.path.isfile(p) and os.path.splitext(p)[1].lower() in exts)
+    if not paths:
+        raise SystemExit(f'no input files match {spec!r}')
+    return paths
+
+def _stem(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+def _encode_task(task: Tuple[str, Optional[str], int, str, Optional[str]]) -> Tuple[str, int, Optional[Dict[str, Any]]]:
+    infile, out, levels, dtype, u_dtype = task
+    n, mem = encode_csv(infile, levels=levels, dtype=dtype, u_dtype=u_dtype)
+    if out is None:
+        return _stem(infile), n, {k: mem[k] for k in ('L', 'u', 'kappa', 'tau')}
+    save_memory(out, mem)
+    return _stem(infile), n, None
+
+def _reconstruct_task(task: Tuple[str, Any, str, Optional[float], Optional[int], str]) -> Tuple[str, int]:
+    name, src, out, ds, num, method = task
+    mem = load_memory(src) if isinstance(src, str) else src
+    return name, write_csv_blocks(out, reconstruct_chunks(mem, ds=_step_size(mem, ds, num), method=method))
+
+def _run_pool(fn, tasks: List[Any], workers: int) -> Iterator[Any]:
+    if workers <= 1 or len(tasks) <= 1:
+        return map(fn, tasks)
+    pool = ProcessPoolExecutor(max_workers=workers)
+    chunksize = max(1, len(tasks) // (workers * 8))
+    def results():
+        with pool:
+            yield from pool.map(fn, tasks, chunksize=chunksize)
+    return results()
+
+def _summary(verb: str, curves: int, points: int, dt: float) -> str:
+    dt = max(dt, 1e-9)
+    return (f"{verb} {curves} curves / {points} points in {dt:.2f}s "
+            f"({curves/dt:.1f} curves/s, {points/dt:.0f} points/s)")
+
+def cmd_encode_batch(args: argparse.Namespace) -> None:
+    inputs = _expand_inputs(args.infile, ('.csv',))
+    if args.out_dir is not None:
+        os.makedirs(args.out_dir, exist_ok=True)
+        outs = [os.path.join(args.out_dir, _stem(p) + '.' + args.format) for p in inputs]
     else:
-        raise SystemExit('--out must be .npz or .json')
-    print(f"Converted {args.infile} -> {args.out}")
+        outs = [None] * len(inputs)
+    tasks = [(p, o, args.levels, args.dtype, args.u_dtype) for p, o in zip(inputs, outs)]
+    t0 = time.perf_counter()
+    names: List[str] = []; mems: List[Dict[str, Any]] = []; points = 0
+    for name, n, mem in _run_pool(_encode_task, tasks, args.workers):
+        points += n
+        if mem is not None:
+            names.append(name); mems.append(mem)
+    if args.archive is not None:
+        save_archive(args.archive, names, mems)
+    print(_summary('Encoded', len(inputs), points, time.perf_counter() - t0))
+
+def cmd_reconstruct_batch(args: argparse.Namespace) -> None:
+    if args.archive is not None:
+        names, srcs = load_archive(args.archive)
+    else:
+        srcs = _expand_inputs(args.infile, tuple(MEMORY_LOADERS))
+        names = [_stem(p) for p in srcs]
+    os.makedirs(args.out_dir, exist_ok=True)
+    tasks = [(n, src, os.path.join(args.out_dir, n + '.csv'), args.ds, args.num, args.method)
+             for n, src in zip(names, srcs)]
+    t0 = time.perf_counter()
+    points = sum(n for _, n in _run_pool(_reconstruct_task, tasks, args.workers))
+    print(_summary('Reconstructed', len(tasks), points, time.perf_counter() - t0))
+
+def cmd_match(args: argparse.Namespace) -> None:
+    if args.archive is not None:
+        names, mems = load_archive(args.archive)
+    else:
+        paths = _expand_inputs(args.infile, tuple(MEMORY_LOADERS))
+        names, mems = [_stem(p) for p in paths], [load_memory(p) for p in paths]
+    matcher = MemoryMatcher(args.grid, reverse=not args.no_reverse, max_shift=args.max_shift)
+    matcher.add(mems)
+    for rank, m in enumerate(matcher.query(load_memory(args.query), args.k, method=args.method, band=args.band), 1):
+        print(f"{rank}\t{names[m.id]}\t{m.distance:.6g}\tshift={m.shift:+.4f}" +
+              ("\treversed" if m.reversed else ""))
+
+def _add_dtype_args(p: argparse.ArgumentParser, default: Optional[str]) -> None:
+    keep = ' (default: keep)' if default is None else f' (default={default})'
+    p.add_argument('--dtype', choices=('float64', 'float32'), default=default,
+                   help='Storage dtype of u/kappa/tau' + keep)
+    p.add_argument('--u-dtype', choices=('float64', 'float32', 'float16'),
+                   help='Storage dtype of u (default: same as --dtype)')
+
+def _add_checkpoint_arg(p: argparse.ArgumentParser) -> None:
+    p.add_argument('--checkpoints', type=int, metavar='N',
+                   help='Store N pose checkpoints for reconstruct --range')
 
 def make_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description='CMA-3D command-line tool')
     sub = p.add_subparsers(dest='cmd', required=True)
 
-    p_enc = sub.add_parser('encode', help='Encode CSV points to CMA-3D memory (NPZ/JSON)')
+    p_enc = sub.add_parser('encode', help='Encode CSV points to CMA-3D memory (NPZ/JSON/CMM)')
     p_enc.add_argument('--in', dest='infile', required=True, help='Input CSV of x,y,z points')
-    p_enc.add_argument('--out', dest='out', required=True, help='Output .npz or .json memory file')
+    p_enc.add_argument('--out', dest='out', required=True, help='Output .npz, .json or .cmm memory file')
     p_enc.add_argument('--levels', type=int, default=3, help='Multiscale levels (default=3)')
+    p_enc.add_argument('--chunk-rows', type=int, default=CSV_CHUNK_ROWS, help='CSV rows parsed per chunk')
+    _add_dtype_args(p_enc, 'float64')
+    p_enc.add_argument('--simplify', type=float, metavar='TOL', help='Keep only the knots needed to reconstruct within TOL')
+    _add_checkpoint_arg(p_enc)
+    p_enc.add_argument('--skip-bad', action='store_true', help='Skip and report malformed CSV rows instead of failing')
+    p_enc.add_argument('--profile', metavar='TRACE_JSON', help='Record per-stage timings to a Chrome trace file')
     p_enc.set_defaults(func=cmd_encode)
 
     p_rec = sub.add_parser('reconstruct', help='Reconstruct points from CMA-3D memory to CSV')
-    p_rec.add_argument('--in', dest='infile', required=True, help='Input memory (.npz/.json)')
+    p_rec.add_argument('--in', dest='infile', required=True, help='Input memory (.npz/.json/.cmm)')
     p_rec.add_argument('--out', dest='out', required=True, help='Output CSV for reconstructed points')
     g = p_rec.add_mutually_exclusive_group()
     g.add_argument('--ds', type=float, help='Arclength step size for reconstruction')
-    g.add_argument('--num', type=int, help='Number of output samples (alternative to --ds)')
+    g.add_argument('--num', type=int, help='Number of output samples spanning the curve (alternative to --ds)')
+    p_rec.add_argument('--range', type=float, nargs=2, metavar=('U0', 'U1'),
+                       help='Reconstruct only the window U0 <= u <= U1 (fast with --checkpoints)')
+    p_rec.add_argument('--chunk-rows', type=int, default=CSV_CHUNK_ROWS,
+                       help='Points reconstructed and written per chunk')
+    p_rec.add_argument('--method', choices=RECONSTRUCT_METHODS, default='step',
+                       help='Integrator: step/scan (1st order) or magnus4 (4th order, use a larger --ds)')
+    p_rec.add_argument('--profile', metavar='TRACE_JSON', help='Record per-stage timings to a Chrome trace file')
     p_rec.set_defaults(func=cmd_reconstruct)
 
-    p_conv = sub.add_parser('convert', help='Convert memory between NPZ and JSON')
-    p_conv.add_argument('--in', dest='infile', required=True, help='Input memory (.npz/.json)')
-    p_conv.add_argument('--out', dest='out', required=True, help='Output memory (.npz/.json)')
+    p_conv = sub.add_parser('convert', help='Convert memory between NPZ, JSON and CMM')
+    p_conv.add_argument('--in', dest='infile', required=True, help='Input memory (.npz/.json/.cmm)')
+    p_conv.add_argument('--out', dest='out', required=True, help='Output memory (.npz/.json/.cmm)')
+    _add_dtype_args(p_conv, None)
+    p_conv.add_argument('--simplify', type=float, metavar='TOL', help='Keep only the knots needed to reconstruct within TOL')
+    _add_checkpoint_arg(p_conv)
     p_conv.set_defaults(func=cmd_convert)
 
+    p_eb = sub.add_parser('encode-batch', help='Encode a directory/glob of CSV files in parallel')
+    p_eb.add_argument('--in', dest='infile', required=True, help='Directory of .csv files or a glob pattern')
+    out = p_eb.add_mutually_exclusive_group(required=True)
+    out.add_argument('--out-dir', help='Write one memory per input into this directory')
+    out.add_argument('--archive', help='Write all memories into one multi-curve .npz archive')
+    p_eb.add_argument('--format', choices=('npz', 'json', 'cmm'), default='npz', help='Memory format for --out-dir')
+    p_eb.add_argument('--levels', type=int, default=3, help='Multiscale levels (default=3)')
+    _add_dtype_args(p_eb, 'float64')
+    p_eb.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (default: CPU count)')
+    p_eb.set_defaults(func=cmd_encode_batch)
+
+    p_rb = sub.add_parser('reconstruct-batch', help='Reconstruct many memories to CSV files in parallel')
+    src = p_rb.add_mutually_exclusive_group(required=True)
+    src.add_argument('--in', dest='infile', help='Directory of memory files or a glob pattern')
+    src.add_argument('--archive', help='Multi-curve .npz archive written by encode-batch')
+    p_rb.add_argument('--out-dir', required=True, help='Directory for the reconstructed CSV files')
+    g = p_rb.add_mutually_exclusive_group()
+    g.add_argument('--ds', type=float, help='Arclength step size for reconstruction')
+    g.add_argument('--num', type=int, help='Number of output samples spanning each curve')
+    p_rb.add_argument('--method', choices=RECONSTRUCT_METHODS, default='step',
+                       help='Integrator: step/scan (1st order) or magnus4 (4th order, use a larger --ds)')
+    p_rb.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (default: CPU count)')
+    p_rb.set_defaults(func=cmd_reconstruct_batch)
+
+    p_m = sub.add_parser('match', help='Rank memories by kappa/tau similarity to a query memory')
+    p_m.add_argument('--query', required=True, help='Query memory (.npz/.json/.cmm)')
+    src = p_m.add_mutually_exclusive_group(required=True)
+    src.add_argument('--in', dest='infile', help='Directory of memory files or a glob pattern')
+    src.add_argument('--archive', help='Multi-curve .npz archive written by encode-batch')
+    p_m.add_argument('--k', type=int, default=10, help='Number of matches to print (default=10)')
+    p_m.add_argument('--method', choices=('xcorr', 'dtw'), default='xcorr',
+                     help='xcorr: best circular shift via FFT; dtw: banded time warping')
+    p_m.add_argument('--grid', type=int, default=256, help='Common u grid size (default=256)')
+    p_m.add_argument('--band', type=float, default=0.1, help='DTW band as a fraction of the grid (default=0.1)')
+    p_m.add_argument('--max-shift', type=float, help='Largest xcorr shift as a fraction of u (default: any)')
+    p_m.add_argument('--no-reverse', action='store_true', help='Do not match reversed curves')
+    p_m.set_defaults(func=cmd_match)
+
     return p
 
 def main(argv=None):
     args = make_parser().parse_args(argv)
-    args.func(args)
+    if getattr(args, 'profile', None):
+        with Profiler() as prof:
+            args.func(args)
+        prof.save_chrome_trace(args.profile)
+        for name, st in sorted(prof.to_dict().items(), key=lambda kv: -kv[1]['seconds']):
+            print(f"{name:28s} {st['calls']:6d} calls {st['seconds']*1e3:10.2f} ms "
+                  f"{st['peak_bytes']/2**20:9.2f} MiB peak", file=sys.stderr)
+    else:
+        args.func(args)
 
 if __name__ == '__main__':
     main()
@@ -1,15 +1,47 @@
 """
 curve_memory: Reference implementation of Curve Memory Alphabet (CMA).
+
+Public names are loaded lazily (module ``__getattr__``): ``import curve_memory``
+imports no submodule, and e.g. ``curve_memory.encode_curve`` loads only the 2D
+modules it needs, not ``cma3d``.
 """
-from .alphabet import Glyph, GlyphFamily
-from .encoder import encode_curve
-from .decoder import decode_curve
-from .compression import wedge_contract
-from .geometry import CurveFrame, CurveHash, kappa_tau_from_polyline
-from .cma3d import curve_memory_3d, reconstruct_from_memory, rmf_sweep
+import importlib
+
+# public name -> defining submodule
+_LAZY = {
+	'Glyph': 'alphabet', 'GlyphFamily': 'alphabet', 'GlyphTable': 'alphabet',
+	'encode_curve': 'encoder', 'encode_table': 'encoder', 'decode_curve': 'decoder', 'wedge_contract': 'compression',
+	'CurveFrame': 'geometry', 'CurveHash': 'geometry', 'curve_hash': 'geometry',
+	'kappa_tau_from_polyline': 'geometry',
+	'CurveMemory': 'cma3d', 'curve_memory_3d': 'cma3d', 'curve_memory_3d_batch': 'cma3d',
+	'reconstruct_from_memory': 'cma3d', 'rmf_sweep': 'cma3d', 'rmf_frames': 'cma3d', 'memory_hash': 'cma3d',
+	'cast_memory': 'cma3d', 'add_checkpoints': 'cma3d', 'reconstruct_range': 'cma3d', 'reconstruct_chunks': 'cma3d',
+	'simplify_memory': 'simplify', 'MemoryMatcher': 'matcher', 'xcorr_distance': 'matcher', 'dtw_distance': 'matcher',
+	'CurveMemoryStream': 'stream', 'CurveHashIndex': 'hashindex', 'Profiler': 'profiling',
+}
+
+_SUBMODULES = {
+	'alphabet', 'cma3d', 'cmab', 'cmm', 'compression', 'decoder', 'encoder', 'ga', 'geometry',
+	'hashindex', 'hyperbolic', 'integrators', 'matcher', 'profiling', 'simplify', 'stream',
+}
 
 __all__ = [
-	'Glyph', 'GlyphFamily', 'encode_curve', 'decode_curve', 'wedge_contract',
-	'CurveFrame', 'CurveHash', 'kappa_tau_from_polyline',
-	'curve_memory_3d', 'reconstruct_from_memory', 'rmf_sweep'
+	'Glyph', 'GlyphFamily', 'GlyphTable', 'encode_curve', 'encode_table', 'decode_curve', 'wedge_contract',
+	'CurveFrame', 'CurveHash', 'curve_hash', 'kappa_tau_from_polyline',
+	'CurveMemory', 'curve_memory_3d', 'curve_memory_3d_batch', 'reconstruct_from_memory', 'rmf_sweep', 'rmf_frames', 'memory_hash', 'cast_memory',
+	'add_checkpoints', 'reconstruct_range', 'reconstruct_chunks', 'simplify_memory', 'CurveMemoryStream', 'CurveHashIndex', 'Profiler',
+	'MemoryMatcher', 'xcorr_distance', 'dtw_distance'
 ]
+
+def __getattr__(name):
+	if name in _LAZY:
+		value = getattr(importlib.import_module('.' + _LAZY[name], __name__), name)
+	elif name in _SUBMODULES:
+		value = importlib.import_module('.' + name, __name__)
+	else:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+	globals()[name] = value
+	return value
+
+def __dir__():
+	return sorted(set(globals()) | set(__all__) | _SUBMODULES)
@@ -1,7 +1,8 @@
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List
+import numpy as np
 
 class GlyphFamily(str, Enum):
     ARC = "arc"
@@ -10,8 +11,105 @@ class GlyphFamily(str, Enum):
     HELIX = "helix"
     CUSTOM = "custom"
 
+# uint8 family codes used by GlyphTable (index into FAMILIES)
+FAMILIES = tuple(GlyphFamily)
+FAMILY_CODE = {fam: i for i, fam in enumerate(FAMILIES)}
+
 @dataclass
 class Glyph:
     family: GlyphFamily
     theta: Dict[str, Any]
     bind: float = 1.0  # ARP-managed weight
+
+@dataclass
+class GlyphTable:
+    """Struct-of-arrays glyph stream.
+
+    ``family`` holds uint8 codes into ``FAMILIES``, ``params`` maps each theta
+    key to a float64 column (NaN where a glyph does not carry that key), and
+    ``bind`` holds the ARP weights. Theta values must be numeric.
+    """
+    family: np.ndarray
+    params: Dict[str, np.ndarray] = field(default_factory=dict)
+    bind: np.ndarray = None
+
+    def __post_init__(self):
+        self.family = np.asarray(self.family, dtype=np.uint8).reshape(-1)
+        n = self.family.shape[0]
+        self.bind = np.ones(n) if self.bind is None else np.asarray(self.bind, dtype=float).reshape(-1)
+        self.params = {k: np.asarray(v, dtype=float).reshape(-1) for k, v in self.params.items()}
+        assert self.bind.shape == (n,), "bind must have one entry per glyph"
+        for col in self.params.values():
+            assert col.shape == (n,), "param columns must have one entry per glyph"
+
+    def __len__(self) -> int:
+        return self.family.shape[0]
+
+    def column(self, key: str, default: float) -> np.ndarray:
+        """Parameter column with absent entries (and missing columns) set to ``default``."""
+        col = self.params.get(key)
+        if col is None:
+            return np.full(len(self), float(default))
+        return np.where(np.isnan(col), float(default), col)
+
+    def slice(self, start: int, stop: int) -> 'GlyphTable':
+        """Rows ``start:stop`` as a table of views."""
+        return GlyphTable(family=self.family[start:stop],
+                          params={k: v[start:stop] for k, v in self.params.items()},
+                          bind=self.bind[start:stop])
+
+    @classmethod
+    def concat(cls, tables: Iterable['GlyphTable']) -> 'GlyphTable':
+        """Concatenate tables; columns missing from some tables are NaN there."""
+        tables = list(tables)
+        keys: Dict[str, None] = {}
+        for t in tables:
+            keys.update(dict.fromkeys(t.params))
+        params = {k: np.concatenate([t.params[k] if k in t.params else np.full(len(t), np.nan)
+                                     for t in tables]) if tables else np.zeros(0) for k in keys}
+        return cls(family=np.concatenate([t.family for t in tables]) if tables else np.zeros(0),
+                   params=params,
+                   bind=np.concatenate([t.bind for t in tables]) if tables else np.zeros(0))
+
+    @classmethod
+    def from_glyphs(cls, glyphs: Iterable[Any]) -> 'GlyphTable':
+        """Build from ``Glyph`` objects (or anything with family/theta/bind)."""
+        return cls._from_items([(g.family, g.theta, getattr(g, 'bind', 1.0)) for g in glyphs])
+
+    @classmethod
+    def from_json(cls, glyphs: Iterable[Dict[str, Any]]) -> 'GlyphTable':
+        """Build from the ``cma["glyphs"]`` list-of-dicts form."""
+        return cls._from_items([(g["family"], g.get("theta", {}), g.get("bind", 1.0)) for g in glyphs])
+
+    @classmethod
+    def _from_items(cls, items: List[Any]) -> 'GlyphTable':
+        n = len(items)
+        family = np.array([FAMILY_CODE[GlyphFamily(f)] for f, _, _ in items], dtype=np.uint8)
+        bind = np.array([float(b) for _, _, b in items])
+        params: Dict[str, np.ndarray] = {}
+        for i, (_, theta, _) in enumerate(items):
+            for k, v in theta.items():
+                if isinstance(v, bool) or not isinstance(v, (int, float)):
+                    raise ValueError(f"GlyphTable needs numeric theta values, got {k}={v!r}")
+                col = params.get(k)
+                if col is None:
+                    col = params[k] = np.full(n, np.nan)
+                col[i] = v
+        return cls(family=family, params=params, bind=bind)
+
+    def _thetas(self) -> List[Dict[str, float]]:
+        keys = list(self.params)
+        cols = [self.params[k].tolist() for k in keys]
+        out = []
+        for row in zip(*cols) if cols else ([] for _ in range(len(self))):
+            out.append({k: v for k, v in zip(keys, row) if v == v})
+        return out
+
+    def to_glyphs(self) -> List[Glyph]:
+        return [Glyph(family=FAMILIES[c], theta=th, bind=b)
+                for c, th, b in zip(self.family.tolist(), self._thetas(), self.bind.tolist())]
+
+    def to_json(self) -> List[Dict[str, Any]]:
+        """The ``cma["glyphs"]`` list-of-dicts form."""
+        return [{"family": FAMILIES[c].value, "theta": th, "bind": b}
+                for c, th, b in zip(self.family.tolist(), self._thetas(), self.bind.tolist())]
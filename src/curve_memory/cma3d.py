@@ -4,19 +4,59 @@ A compact, rigid-motion-invariant representation of 3D space curves using
 arclength-normalized curvature kappa(s) and torsion tau(s), plus multi-scale summaries.
 
 Public functions:
-    curve_memory_3d(points, *, levels=3)
-    reconstruct_from_memory(mem, *, ds=None, start=None, frame=None)
+    curve_memory_3d(points, *, levels=3, dtype=float64, u_dtype=None, checkpoints=None) -> CurveMemory
+    curve_memory_3d_batch(curves, offsets=None, *, dtype=float64, u_dtype=None)
+    memory_from_batch(batch, i, *, levels=None, dtype=None, u_dtype=None)
+    reconstruct_from_memory(mem, *, ds=None, start=None, frame=None, method='step', dtype=None)
+        method: 'step' | 'scan' (first order) | 'magnus4' (4th order)
+    cast_memory(mem, dtype=float64, *, u_dtype=None)
+    add_checkpoints(mem, count, *, ds=None)
+    reconstruct_range(mem, u0, u1, *, ds=None, method='magnus4', dtype=None)
+    reconstruct_chunks(mem, *, ds=None, start=None, frame=None, method='step', dtype=None, chunk_rows=65536)
     rmf_sweep(points)
+    memory_hash(mem)
+    rmf_frames(curves, offsets=None, *, method='reflect', check_tol=None)
 
-This is a standalone helper module (numpy-only) and not yet tightly
-integrated with the 2D Curve Memory Alphabet pipeline.
+Memories can be stored in float32 (``dtype``), with u optionally in float16
+(``u_dtype``). Encoding always runs in float64 and rounds once at the end;
+reconstruction runs in the memory's precision. Measured position drift against
+an all-float64 run on helix, spiral and trefoil test curves (1e2-1e6 samples):
+float32 stays below 1e-5 * L (typically ~1e-7 * L); float16 u stays below
+5e-3 * L and grows where kappa/tau vary quickly, since rounding u shifts each
+sample by up to 2**-12 of the curve.
+
+This module depends only on numpy (``memory_hash`` imports ``CurveHash`` from
+the 2D geometry module on first use) and is not yet tightly integrated with
+the 2D Curve Memory Alphabet pipeline.
 """
 from __future__ import annotations
-from typing import Dict, Any, Optional, Tuple
+from collections.abc import Mapping, MutableMapping, Sequence
+from typing import Dict, Any, Iterator, Optional, Tuple
 import numpy as np
 
+from .profiling import stage
+
 _EPS = 1e-12
 
+# np.trapz was renamed to np.trapezoid in NumPy 2.0 and later removed.
+_trapz = getattr(np, 'trapezoid', None) or np.trapz
+
+_MEMORY_DTYPES = (np.float32, np.float64)
+_U_DTYPES = (np.float16, np.float32, np.float64)
+
+def _float_dtype(dtype, allowed, name: str) -> np.dtype:
+    dt = np.dtype(dtype)
+    if dt.type not in allowed:
+        names = ', '.join(np.dtype(a).name for a in allowed)
+        raise ValueError(f"{name} must be one of {names}, got {dt.name}")
+    return dt
+
+def _cast_arrays(u: np.ndarray, kappa: np.ndarray, tau: np.ndarray, dtype, u_dtype):
+    """u/kappa/tau rounded to the storage dtypes (no copy when they already match)."""
+    dt = _float_dtype(dtype, _MEMORY_DTYPES, 'dtype')
+    udt = dt if u_dtype is None else _float_dtype(u_dtype, _U_DTYPES, 'u_dtype')
+    return u.astype(udt, copy=False), kappa.astype(dt, copy=False), tau.astype(dt, copy=False)
+
 def _normalize(v: np.ndarray) -> np.ndarray:
     n = np.linalg.norm(v, axis=-1, keepdims=True)
     n = np.clip(n, _EPS, None)
@@ -36,109 +76,457 @@ def poly_arclength(points: np.ndarray):
     return seg_len, s, L
 
 def discrete_tangent(points: np.ndarray) -> np.ndarray:
-    diffs = np.diff(points, axis=0)
-    if diffs.size == 0:
-        return np.zeros_like(points)
-    T_seg = _normalize(diffs)
-    Np = points.shape[0]
-    T_v = np.zeros_like(points)
-    T_v[0] = T_seg[0]
-    T_v[-1] = T_seg[-1]
-    if Np > 2:
-        T_v[1:-1] = _normalize(T_seg[:-1] + T_seg[1:])
-    return T_v
+    with stage('cma3d.tangent'):
+        diffs = np.diff(points, axis=0)
+        if diffs.size == 0:
+            return np.zeros_like(points)
+        T_seg = _normalize(diffs)
+        Np = points.shape[0]
+        T_v = np.zeros_like(points)
+        T_v[0] = T_seg[0]
+        T_v[-1] = T_seg[-1]
+        if Np > 2:
+            T_v[1:-1] = _normalize(T_seg[:-1] + T_seg[1:])
+        return T_v
 
 def discrete_curvature(points: np.ndarray, s: np.ndarray) -> np.ndarray:
     N = points.shape[0]
     if N < 3:
         return np.zeros(N)
-    diffs = np.diff(points, axis=0)
-    Lseg = np.linalg.norm(diffs, axis=1)
+    Lseg = np.linalg.norm(np.diff(points, axis=0), axis=1)
     T = discrete_tangent(points)
-    kappa = np.zeros(N)
-    for i in range(1, N-1):
-        ds = 0.5*(Lseg[i-1] + Lseg[i])
-        dT = T[i] - T[i-1]
-        kappa[i] = np.linalg.norm(dT) / max(ds, _EPS)
-    if N >= 2:
-        kappa[0] = kappa[1]
-        kappa[-1] = kappa[-2]
+    ds = np.maximum(0.5*(Lseg[:-1] + Lseg[1:]), _EPS)
+    kappa = np.empty(N)
+    kappa[1:-1] = np.linalg.norm(T[1:-1] - T[:-2], axis=1) / ds
+    kappa[0] = kappa[1]
+    kappa[-1] = kappa[-2]
     return kappa
 
+def _binormals(T: np.ndarray) -> np.ndarray:
+    """Unit binormals B[i] ~ T[i] x T[i-1]; degenerate rows carry the last valid one forward."""
+    N = T.shape[0]
+    cross = np.cross(T[1:], T[:-1])
+    nrm = np.linalg.norm(cross, axis=1)
+    valid = nrm >= 1e-9
+    raw = np.empty_like(T)
+    raw[0] = (0.0, 0.0, 1.0)
+    raw[1:][valid] = cross[valid] / nrm[valid, None]
+    # index of the most recent valid row (0 -> default +z before any valid row)
+    last = np.where(np.concatenate(([False], valid)), np.arange(N), 0)
+    np.maximum.accumulate(last, out=last)
+    B = raw[last]
+    B[0] = B[1]
+    return B
+
 def discrete_torsion(points: np.ndarray, s: np.ndarray) -> np.ndarray:
     N = points.shape[0]
     if N < 4:
         return np.zeros(N)
-    diffs = np.diff(points, axis=0)
-    Lseg = np.linalg.norm(diffs, axis=1)
+    Lseg = np.linalg.norm(np.diff(points, axis=0), axis=1)
     T = discrete_tangent(points)
-    B = np.zeros_like(points)
-    for i in range(1, N):
-        cross = np.cross(T[i], T[i-1])
-        nrm = np.linalg.norm(cross)
-        if nrm < 1e-9:
-            B[i] = B[i-1] if i > 1 else np.array([0.0, 0.0, 1.0])
-        else:
-            B[i] = cross / nrm
-    B[0] = B[1]
+    B = _binormals(T)
+    b0 = B[1:N-2]; b1 = B[2:N-1]
+    ds = np.maximum(0.5*(Lseg[1:N-2] + Lseg[2:N-1]), _EPS)
+    ang = np.arccos(np.clip(np.einsum('ij,ij->i', b0, b1), -1.0, 1.0))
+    sgn = np.sign(np.einsum('ij,ij->i', np.cross(b0, b1), T[2:N-1]))
     tau = np.zeros(N)
-    for i in range(2, N-1):
-        ds = 0.5*(Lseg[i-1] + Lseg[i])
-        bi_1 = B[i-1]
-        bi = B[i]
-        ang = _safe_angle(bi_1, bi)
-        sgn = np.sign(np.dot(np.cross(bi_1, bi), T[i]))
-        tau[i] = sgn * ang / max(ds, _EPS)
+    tau[2:N-1] = sgn * ang / ds
     tau[0] = tau[1]
     tau[1] = tau[2]
     tau[-1] = tau[-2]
     return tau
 
+def _level_stats(ku: np.ndarray, tu: np.ndarray) -> Dict[str, float]:
+    return {
+        'kappa_mean': float(np.mean(ku)),
+        'kappa_std': float(np.std(ku)),
+        'kappa_max': float(np.max(ku)),
+        'kappa_min': float(np.min(ku)),
+        'tau_mean': float(np.mean(tu)),
+        'tau_std': float(np.std(tu)),
+        'tau_max': float(np.max(tu)),
+        'tau_min': float(np.min(tu)),
+    }
+
+def _decimate(m: int) -> np.ndarray:
+    """Indices keeping about half of ``m`` samples (always at least 2)."""
+    return np.linspace(0, m-1, max(2, (m+1)//2)).astype(int)
+
+def _global_norms(u: np.ndarray, kappa: np.ndarray, tau: np.ndarray) -> Dict[str, float]:
+    return {
+        'kappa_L1': float(_trapz(np.abs(kappa), u)),
+        'tau_L1': float(_trapz(np.abs(tau), u)),
+        'kappa_L2': float(np.sqrt(_trapz(kappa*kappa, u))),
+        'tau_L2': float(np.sqrt(_trapz(tau*tau, u))),
+    }
+
 def multiscale_pack(u: np.ndarray, kappa: np.ndarray, tau: np.ndarray, levels: int = 3) -> Dict[str, Any]:
     packs = []
     ku, tu = kappa.copy(), tau.copy()
     uu = u.copy()
     for _ in range(max(1, levels)):
-        packs.append({
-            'u': uu,
-            'kappa': ku,
-            'tau': tu,
-            'stats': {
-                'kappa_mean': float(np.mean(ku)),
-                'kappa_std': float(np.std(ku)),
-                'kappa_max': float(np.max(ku)),
-                'kappa_min': float(np.min(ku)),
-                'tau_mean': float(np.mean(tu)),
-                'tau_std': float(np.std(tu)),
-                'tau_max': float(np.max(tu)),
-                'tau_min': float(np.min(tu)),
-            }
-        })
-        idx = np.linspace(0, uu.shape[0]-1, max(2, (uu.shape[0]+1)//2)).astype(int)
+        packs.append({'u': uu, 'kappa': ku, 'tau': tu, 'stats': _level_stats(ku, tu)})
+        idx = _decimate(uu.shape[0])
         uu = uu[idx]; ku = ku[idx]; tu = tu[idx]
-    return {
-        'levels': packs,
-        'global': {
-            'kappa_L1': float(np.trapz(np.abs(kappa), u)),
-            'tau_L1': float(np.trapz(np.abs(tau), u)),
-            'kappa_L2': float(np.sqrt(np.trapz(kappa*kappa, u))),
-            'tau_L2': float(np.sqrt(np.trapz(tau*tau, u))),
-        }
+    return {'levels': packs, 'global': _global_norms(u, kappa, tau)}
+
+class _PackLevel(Mapping):
+    """One pyramid level: an index array into the base arrays plus memoized stats."""
+    __slots__ = ('_mem', '_idx', '_stats')
+    _KEYS = ('u', 'kappa', 'tau', 'stats')
+
+    def __init__(self, mem: 'CurveMemory', idx: Optional[np.ndarray]):
+        self._mem = mem
+        self._idx = idx
+        self._stats = None
+
+    def _arr(self, key: str) -> np.ndarray:
+        a = getattr(self._mem, key)
+        return a if self._idx is None else a[self._idx]
+
+    def __getitem__(self, key: str):
+        if key == 'stats':
+            if self._stats is None:
+                with stage('cma3d.multiscale_pack'):
+                    self._stats = _level_stats(self._arr('kappa'), self._arr('tau'))
+            return self._stats
+        if key in ('u', 'kappa', 'tau'):
+            return self._arr(key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+class _Levels(Sequence):
+    """Pyramid levels built on first access; level j indexes the base directly."""
+    __slots__ = ('_mem', '_items')
+
+    def __init__(self, mem: 'CurveMemory', count: int):
+        self._mem = mem
+        self._items = [None] * max(1, count)
+
+    def _level(self, i: int) -> _PackLevel:
+        lv = self._items[i]
+        if lv is None:
+            if i == 0:
+                lv = _PackLevel(self._mem, None)
+            else:
+                prev = self._level(i - 1)._idx
+                m = self._mem.u.shape[0] if prev is None else prev.shape[0]
+                idx = _decimate(m)
+                lv = _PackLevel(self._mem, idx if prev is None else prev[idx])
+            self._items[i] = lv
+        return lv
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._level(j) for j in range(*i.indices(len(self._items)))]
+        if i < 0:
+            i += len(self._items)
+        if not 0 <= i < len(self._items):
+            raise IndexError(i)
+        return self._level(i)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+class _Pack(Mapping):
+    __slots__ = ('_mem', '_levels', '_global')
+
+    def __init__(self, mem: 'CurveMemory', levels: int, global_: Optional[Dict[str, float]] = None):
+        self._mem = mem
+        self._levels = _Levels(mem, levels)
+        self._global = global_
+
+    def __getitem__(self, key: str):
+        if key == 'levels':
+            return self._levels
+        if key == 'global':
+            if self._global is None:
+                m = self._mem
+                with stage('cma3d.multiscale_pack'):
+                    self._global = _global_norms(m.u, m.kappa, m.tau)
+            return self._global
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(('levels', 'global'))
+
+    def __len__(self) -> int:
+        return 2
+
+class CurveMemory(MutableMapping):
+    """A CMA-3D memory: L and the u/kappa/tau base arrays plus a lazy pyramid.
+
+    Behaves like the ``{'L', 'u', 'kappa', 'tau', 'pack'}`` dict returned by
+    earlier versions. ``mem['pack']`` has the ``multiscale_pack`` layout, but
+    levels and their stats are built on first access and memoized; each level
+    keeps only an index array into the base arrays (level arrays are gathered
+    on access, not stored). The global norms are likewise computed once on
+    demand. Assigning u/kappa/tau resets the pyramid, and assigning any base
+    field drops the ``frames`` checkpoints and ``ds`` step chosen for the old
+    arrays; other keys (e.g. ``hash``) are stored as extra fields.
+    ``levels=None`` means no pack.
+    """
+    __slots__ = ('L', 'u', 'kappa', 'tau', '_pack', '_extra')
+    _BASE = ('L', 'u', 'kappa', 'tau')
+    _DERIVED = ('frames', 'ds')
+
+    def __init__(self, L: float, u: np.ndarray, kappa: np.ndarray, tau: np.ndarray, *,
+                 levels: Optional[int] = 3, global_: Optional[Dict[str, float]] = None):
+        self.L = float(L)
+        self.u = u
+        self.kappa = kappa
+        self.tau = tau
+        self._pack = None if levels is None else _Pack(self, levels, global_)
+        self._extra: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str):
+        if key in self._BASE:
+            return getattr(self, key)
+        if key == 'pack':
+            if self._pack is None:
+                raise KeyError(key)
+            return self._pack
+        return self._extra[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in self._BASE:
+            setattr(self, key, float(value) if key == 'L' else value)
+            if key != 'L' and isinstance(self._pack, _Pack):
+                self._pack = _Pack(self, len(self._pack._levels))
+            for k in self._DERIVED:
+                self._extra.pop(k, None)
+        elif key == 'pack':
+            self._pack = value
+        else:
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in self._BASE:
+            raise KeyError(f"cannot delete base field {key!r}")
+        if key == 'pack':
+            if self._pack is None:
+                raise KeyError(key)
+            self._pack = None
+        else:
+            del self._extra[key]
+
+    def __iter__(self):
+        yield from self._BASE
+        if self._pack is not None:
+            yield 'pack'
+        yield from self._extra
+
+    def __len__(self) -> int:
+        return 4 + (self._pack is not None) + len(self._extra)
+
+    def __repr__(self) -> str:
+        return f"CurveMemory(L={self.L!r}, n={self.u.shape[0]}, keys={list(self)})"
+
+    def copy(self) -> 'CurveMemory':
+        """Shallow copy sharing the base arrays (the pyramid is rebuilt lazily)."""
+        levels = len(self._pack._levels) if isinstance(self._pack, _Pack) else None
+        out = CurveMemory(self.L, self.u, self.kappa, self.tau, levels=levels)
+        if self._pack is not None and levels is None:
+            out._pack = self._pack
+        out._extra = dict(self._extra)
+        return out
+
+def curve_memory_3d(points: np.ndarray, *, levels: int = 3, dtype=np.float64,
+                    u_dtype=None, checkpoints: Optional[int] = None) -> CurveMemory:
+    """Encode an (N,3) polyline.
+
+    kappa/tau are stored as ``dtype`` (float32 or float64) and u as ``u_dtype``
+    (float16, float32 or float64; defaults to ``dtype``). Geometry is always
+    computed in float64 and rounded once. ``checkpoints`` adds that many pose
+    checkpoints for ``reconstruct_range`` (see ``add_checkpoints``).
+    """
+    with stage('cma3d.curve_memory_3d'):
+        points = np.asarray(points, dtype=float)
+        assert points.ndim == 2 and points.shape[1] == 3, "points must be (N,3)"
+        with stage('cma3d.arclength'):
+            seg_len, s, L = poly_arclength(points)
+        if L < _EPS:
+            u = s*0.0
+            kappa = np.zeros_like(s)
+            tau = np.zeros_like(s)
+        else:
+            u = s / L
+            with stage('cma3d.curvature'):
+                kappa = discrete_curvature(points, s)
+            with stage('cma3d.torsion'):
+                tau = discrete_torsion(points, s)
+        u, kappa, tau = _cast_arrays(u, kappa, tau, dtype, u_dtype)
+        mem = CurveMemory(L if L >= _EPS else 0.0, u, kappa, tau, levels=levels)
+    if checkpoints:
+        add_checkpoints(mem, checkpoints)
+    return mem
+
+def _ragged_input(curves, offsets) -> Tuple[np.ndarray, np.ndarray]:
+    if offsets is None:
+        parts = [np.asarray(c, dtype=float) for c in curves]
+        for c in parts:
+            assert c.ndim == 2 and c.shape[1] == 3, "each curve must be (N,3)"
+        counts = np.array([c.shape[0] for c in parts], dtype=np.int64)
+        points = np.concatenate(parts, axis=0) if parts else np.zeros((0, 3))
+        offsets = np.zeros(counts.shape[0] + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+    else:
+        points = np.asarray(curves, dtype=float)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        assert points.ndim == 2 and points.shape[1] == 3, "points must be (N,3)"
+        assert offsets.ndim == 1 and offsets.shape[0] >= 1, "offsets must be 1-D"
+        assert offsets[0] == 0 and offsets[-1] == points.shape[0], "offsets must span the point buffer"
+    assert np.all(np.diff(offsets) >= 1), "every curve needs at least one point"
+    return points, offsets
+
+def _ragged_layout(offsets: np.ndarray):
+    """Per-curve counts/first/last rows plus per-row curve id and curve-local index."""
+    n = np.diff(offsets)
+    first = offsets[:-1]
+    last = offsets[1:] - 1
+    cid = np.repeat(np.arange(n.shape[0]), n)
+    local = np.arange(offsets[-1]) - first[cid]
+    return n, first, last, cid, local
+
+def _ragged_tangent(diffs: np.ndarray, n, first, last, cid, local):
+    """``discrete_tangent`` for every curve of a ragged buffer; also returns the interior rows."""
+    T_seg = _normalize(diffs)
+    T = np.zeros((local.shape[0], 3))
+    has_seg = n >= 2
+    T[first[has_seg]] = T_seg[first[has_seg]]
+    T[last[has_seg]] = T_seg[last[has_seg] - 1]
+    interior = np.flatnonzero((local > 0) & (local < n[cid] - 1))
+    T[interior] = _normalize(T_seg[interior - 1] + T_seg[interior])
+    return T, interior
+
+def curve_memory_3d_batch(curves, offsets: Optional[np.ndarray] = None, *, dtype=np.float64,
+                          u_dtype=None) -> Dict[str, Any]:
+    """Encode many curves in one vectorized pass.
+
+    ``curves`` is either a list of (N_i,3) arrays, or a concatenated (sum N_i, 3)
+    point buffer together with ``offsets`` (length C+1, curve i owns rows
+    ``offsets[i]:offsets[i+1]``). Per-curve results match ``curve_memory_3d``.
+
+    Returns a ragged memory: ``u``/``kappa``/``tau`` are concatenated value
+    arrays sharing ``offsets``, ``L`` is a (C,) array and ``global`` holds the
+    ``multiscale_pack`` global norms as (C,) arrays. Use ``memory_from_batch``
+    to get a single-curve memory dict.
+
+    ``dtype`` and ``u_dtype`` set the storage dtypes as in ``curve_memory_3d``:
+    geometry and the global norms are computed in float64, and u/kappa/tau are
+    rounded once at the end.
+    """
+    P, offsets = _ragged_input(curves, offsets)
+    C = offsets.shape[0] - 1
+    total = P.shape[0]
+    n, first, last, cid, local = _ragged_layout(offsets)
+    # segment i joins rows i and i+1; boundary segments link different curves
+    diffs = np.diff(P, axis=0)
+    seg_len = np.linalg.norm(diffs, axis=1)
+    inner_seg = local[1:] != 0
+    seg_len[~inner_seg] = 0.0
+    s = np.zeros(total)
+    np.cumsum(seg_len, out=s[1:])
+    s -= s[first][cid]
+    L = s[last].copy()
+    flat = L < _EPS
+    L[flat] = 0.0
+    u = np.zeros(total)
+    ok = ~flat[cid]
+    u[ok] = s[ok] / L[cid][ok]
+
+    T, interior = _ragged_tangent(diffs, n, first, last, cid, local)
+
+    kappa = np.zeros(total)
+    ds = np.maximum(0.5*(seg_len[interior - 1] + seg_len[interior]), _EPS)
+    kappa[interior] = np.linalg.norm(T[interior] - T[interior - 1], axis=1) / ds
+    c3 = n >= 3
+    kappa[first[c3]] = kappa[first[c3] + 1]
+    kappa[last[c3]] = kappa[last[c3] - 1]
+
+    # binormals with per-curve carry-forward (each curve start holds the +z default)
+    cross = np.cross(T[1:], T[:-1])
+    nrm = np.linalg.norm(cross, axis=1)
+    valid = np.concatenate(([False], (nrm >= 1e-9) & inner_seg))
+    raw = np.empty_like(P)
+    raw[first] = (0.0, 0.0, 1.0)
+    raw[valid] = cross[valid[1:]] / nrm[valid[1:], None]
+    idx = np.where(valid, np.arange(total), 0)
+    idx[first] = first
+    np.maximum.accumulate(idx, out=idx)
+    B = raw[idx]
+
+    tau = np.zeros(total)
+    c4 = n >= 4
+    tor = np.flatnonzero((local >= 2) & (local < n[cid] - 1) & c4[cid])
+    b0 = B[tor - 1]; b1 = B[tor]
+    ds = np.maximum(0.5*(seg_len[tor - 1] + seg_len[tor]), _EPS)
+    ang = np.arccos(np.clip(np.einsum('ij,ij->i', b0, b1), -1.0, 1.0))
+    sgn = np.sign(np.einsum('ij,ij->i', np.cross(b0, b1), T[tor]))
+    tau[tor] = sgn * ang / ds
+    # same padding as discrete_torsion: tau[0] = tau[1] (still zero), tau[1] = tau[2]
+    tau[first[c4] + 1] = tau[first[c4] + 2]
+    tau[last[c4]] = tau[last[c4] - 1]
+
+    flat_pts = flat[cid]
+    kappa[flat_pts] = 0.0
+    tau[flat_pts] = 0.0
+
+    # per-curve trapezoid integrals over u
+    seg_cid = cid[1:][inner_seg]
+    du = np.diff(u)[inner_seg]
+    def _seg_trapz(f):
+        w = 0.5*(f[:-1] + f[1:])[inner_seg] * du
+        return np.bincount(seg_cid, weights=w, minlength=C)
+    ak, at = np.abs(kappa), np.abs(tau)
+    glob = {
+        'kappa_L1': _seg_trapz(ak),
+        'tau_L1': _seg_trapz(at),
+        'kappa_L2': np.sqrt(_seg_trapz(kappa*kappa)),
+        'tau_L2': np.sqrt(_seg_trapz(tau*tau)),
     }
+    u, kappa, tau = _cast_arrays(u, kappa, tau, dtype, u_dtype)
+    return {'L': L, 'offsets': offsets, 'u': u, 'kappa': kappa, 'tau': tau, 'global': glob}
 
-def curve_memory_3d(points: np.ndarray, *, levels: int = 3) -> Dict[str, Any]:
-    points = np.asarray(points, dtype=float)
-    assert points.ndim == 2 and points.shape[1] == 3, "points must be (N,3)"
-    seg_len, s, L = poly_arclength(points)
-    if L < _EPS:
-        u = s*0.0
-        kappa = np.zeros_like(s)
-        tau = np.zeros_like(s)
-        return {'L': 0.0, 'u': u, 'kappa': kappa, 'tau': tau, 'pack': multiscale_pack(u, kappa, tau, levels)}
-    u = s / L
-    kappa = discrete_curvature(points, s)
-    tau = discrete_torsion(points, s)
-    return {'L': float(L), 'u': u, 'kappa': kappa, 'tau': tau, 'pack': multiscale_pack(u, kappa, tau, levels)}
+def memory_from_batch(batch: Dict[str, Any], i: int, *, levels: Optional[int] = None,
+                      dtype=None, u_dtype=None) -> Dict[str, Any]:
+    """Slice curve ``i`` out of a ``curve_memory_3d_batch`` result.
+
+    Arrays are views into the batch, unless ``dtype`` or ``u_dtype`` asks for
+    other storage dtypes (as in ``cast_memory``; ``dtype`` defaults to the
+    batch's kappa dtype). Pass ``levels`` to also build the
+    ``multiscale_pack`` for that curve.
+    """
+    a, b = int(batch['offsets'][i]), int(batch['offsets'][i+1])
+    u, kappa, tau = batch['u'][a:b], batch['kappa'][a:b], batch['tau'][a:b]
+    if dtype is not None or u_dtype is not None:
+        u, kappa, tau = _cast_arrays(u, kappa, tau, kappa.dtype if dtype is None else dtype, u_dtype)
+    return CurveMemory(float(batch['L'][i]), u, kappa, tau, levels=levels)
+
+def cast_memory(mem: Dict[str, Any], dtype=np.float64, *, u_dtype=None) -> Dict[str, Any]:
+    """Copy of ``mem`` with u/kappa/tau stored as ``dtype`` (u as ``u_dtype``).
+
+    A ``CurveMemory`` stays a ``CurveMemory`` (its pyramid is rebuilt from the
+    cast arrays); other mappings come back as a plain dict. ``ds`` is kept and
+    checkpoints are recomputed from the cast arrays.
+    """
+    u, kappa, tau = _cast_arrays(np.asarray(mem['u']), np.asarray(mem['kappa']),
+                                 np.asarray(mem['tau']), dtype, u_dtype)
+    if isinstance(mem, CurveMemory):
+        out = mem.copy()
+        out['u'] = u; out['kappa'] = kappa; out['tau'] = tau
+        if mem.get('ds') is not None:
+            out['ds'] = mem['ds']
+    else:
+        out = dict(mem, u=u, kappa=kappa, tau=tau)
+    if mem.get('frames') is not None:
+        add_checkpoints(out, len(mem['frames']))
+    return out
 
 def frenet_step(T: np.ndarray, N: np.ndarray, B: np.ndarray, k: float, t: float, ds: float):
     ang_k = k * ds
@@ -153,31 +541,372 @@ def frenet_step(T: np.ndarray, N: np.ndarray, B: np.ndarray, k: float, t: float,
     T_final = _normalize(T_new); N_final = _normalize(N_final); B_final = _normalize(B_final)
     return T_final, N_final, B_final
 
+def memory_hash(mem: Dict[str, Any]):
+    """Rigid-motion-invariant ``CurveHash`` of a CMA-3D memory.
+
+    I_kappa and I_tau are the arclength integrals of kappa and tau; area is the
+    magnitude of the vector area (1/2 sum of p_i x p_i+1) of the curve closed by
+    its end-to-start chord, taken from ``reconstruct_from_memory``.
+    Reconstruction starts from a fixed frame, so equal memories hash equally;
+    moved copies of a curve agree up to rounding in kappa/tau (area ~1e-5 rel),
+    which the default ``CurveHashIndex`` rtol (1e-4) absorbs.
+    """
+    from .geometry import CurveHash  # keeps the 2D pipeline out of cma3d's imports
+    L = float(mem['L'])
+    if L < _EPS:
+        return CurveHash(I_kappa=0.0, I_tau=0.0, area=0.0)
+    u = np.asarray(mem['u'], dtype=float)
+    I_kappa = L * float(_trapz(np.asarray(mem['kappa'], dtype=float), u))
+    I_tau = L * float(_trapz(np.asarray(mem['tau'], dtype=float), u))
+    pts = reconstruct_from_memory(mem, method='scan', dtype=np.float64)
+    rel = pts - pts[0]
+    area = 0.5 * float(np.linalg.norm(np.cross(rel[:-1], rel[1:]).sum(axis=0)))
+    return CurveHash(I_kappa=I_kappa, I_tau=I_tau, area=area)
+
+def _quat_mul(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Hamilton product of (...,4) quaternion arrays stored as (w, x, y, z)."""
+    aw, ax, ay, az = a[..., 0], a[..., 1], a[..., 2], a[..., 3]
+    bw, bx, by, bz = b[..., 0], b[..., 1], b[..., 2], b[..., 3]
+    return np.stack([
+        aw*bw - ax*bx - ay*by - az*bz,
+        aw*bx + ax*bw + ay*bz - az*by,
+        aw*by - ax*bz + ay*bw + az*bx,
+        aw*bz + ax*by - ay*bx + az*bw,
+    ], axis=-1)
+
+def _quat_scan(q: np.ndarray, local: Optional[np.ndarray] = None) -> np.ndarray:
+    """Inclusive prefix product q[0] q[1] ... q[i] by recursive doubling (log2(n) passes).
+
+    With ``local`` (curve-local row index of a ragged buffer) the scan restarts at
+    every curve.
+    """
+    q = q.copy()
+    d = 1
+    while d < q.shape[0]:
+        if local is None:
+            q[d:] = _quat_mul(q[:-d], q[d:])
+        else:
+            m = local[d:] >= d
+            if not m.any():
+                break
+            q[d:] = np.where(m[:, None], _quat_mul(q[:-d], q[d:]), q[d:])
+        d *= 2
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+def _frenet_step_quats(k: np.ndarray, t: np.ndarray, ds) -> np.ndarray:
+    """Body-frame rotations equivalent to ``frenet_step``: about B by k*ds, then about T by t*ds."""
+    hk = 0.5 * k * ds; ht = 0.5 * t * ds
+    ck, sk, ct, st = np.cos(hk), np.sin(hk), np.cos(ht), np.sin(ht)
+    # qz(k*ds) * qx(t*ds)
+    return np.stack([ck*ct, ck*st, sk*st, sk*ct], axis=-1)
+
+def _reconstruct_scan(kq: np.ndarray, tq: np.ndarray, h: np.ndarray, p: np.ndarray,
+                      T: np.ndarray, N: np.ndarray, poses: bool = False):
+    """``kq``/``tq`` are samples at the end of each step of length ``h``.
+
+    With ``poses`` also returns the body rotation (quaternion, relative to the
+    start frame) at every output point.
+    """
+    with stage('reconstruct.rotations'):
+        q = _frenet_step_quats(kq, tq, h)
+    with stage('reconstruct.scan'):
+        q = _quat_scan(q)
+    with stage('reconstruct.positions'):
+        w, x, y, z = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+        # first column of each body rotation: the tangent in (T0, N0, B0) coordinates
+        e = np.stack([1.0 - 2.0*(y*y + z*z), 2.0*(x*y + w*z), 2.0*(x*z - w*y)], axis=1)
+        F0 = np.stack([T, N, np.cross(T, N)], axis=0)
+        pts = np.empty((kq.shape[0] + 1, 3), dtype=kq.dtype)
+        pts[0] = p
+        np.cumsum((e @ F0) * h[:, None], axis=0, out=pts[1:])
+        pts[1:] += p
+    if poses:
+        return pts, np.concatenate([np.array([[1.0, 0.0, 0.0, 0.0]], dtype=q.dtype), q], axis=0)
+    return pts
+
+def _quat_frame(q: np.ndarray, F0: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """World (T, N, B) after the body rotation ``q`` from the frame with rows ``F0``."""
+    w, x, y, z = np.asarray(q, dtype=float)
+    T = np.array([1 - 2*(y*y + z*z), 2*(x*y + w*z), 2*(x*z - w*y)]) @ F0
+    N = np.array([2*(x*y - w*z), 1 - 2*(x*x + z*z), 2*(y*z + w*x)]) @ F0
+    return T, N, np.cross(T, N)
+
+RECONSTRUCT_METHODS = ('step', 'scan', 'magnus4')
+
+# Gauss-Legendre nodes of the 4th-order Magnus step
+_GAUSS2 = (0.5 - np.sqrt(3.0)/6.0, 0.5 + np.sqrt(3.0)/6.0)
+
+def _magnus4_steps(k1: np.ndarray, t1: np.ndarray, k2: np.ndarray, t2: np.ndarray, h: np.ndarray):
+    """Per-step SE(3) increments of the 4th-order Magnus method (step lengths ``h``).
+
+    The body twist is angular velocity w = (tau, 0, kappa) with unit speed along
+    T. With twists xi1, xi2 at the two Gauss nodes, each step is
+    exp(h/2 (xi1 + xi2) + sqrt(3)/12 h**2 [xi1, xi2]), applied in closed form:
+    a rotation quaternion plus the body-frame translation V(theta) rho.
+    """
+    # Python-float constant so float32 steps stay float32 under NumPy 2 promotion
+    c = 3.0**0.5 / 12.0 * h * h
+    z = np.zeros_like(k1)
+    w1 = np.stack([t1, z, k1], axis=1)
+    w2 = np.stack([t2, z, k2], axis=1)
+    theta = 0.5 * h[:, None] * (w1 + w2) + c[:, None] * np.cross(w1, w2)
+    # rho = h/2 (e1 + e1) + c (w1 x e1 - w2 x e1)
+    rho = np.stack([h, c * (k1 - k2), z], axis=1)
+    a = np.linalg.norm(theta, axis=1)
+    half = 0.5 * np.sinc(a / (2.0*np.pi))            # sin(a/2) / a
+    q = np.concatenate([np.cos(0.5*a)[:, None], half[:, None] * theta], axis=1)
+    b = 0.5 * np.sinc(a / (2.0*np.pi))**2              # (1 - cos a) / a**2
+    small = a < 1e-2
+    a_safe = np.where(small, 1.0, a)
+    a2 = a * a
+    cc = np.where(small, 1.0/6.0 - a2/120.0 + a2*a2/5040.0, (a_safe - np.sin(a_safe)) / a_safe**3)
+    tr = np.cross(theta, rho)
+    trans = rho + b[:, None] * tr + cc[:, None] * np.cross(theta, tr)
+    return q, trans
+
+def _reconstruct_magnus4(kq: np.ndarray, tq: np.ndarray, h: np.ndarray, p: np.ndarray,
+                         T: np.ndarray, N: np.ndarray, poses: bool = False):
+    """``kq``/``tq`` are (M-1, 2) samples at the two Gauss nodes of each step of length ``h``.
+
+    With ``poses`` also returns the body rotation (quaternion, relative to the
+    start frame) at every output point.
+    """
+    with stage('reconstruct.rotations'):
+        q, trans = _magnus4_steps(kq[:, 0], tq[:, 0], kq[:, 1], tq[:, 1], h)
+    with stage('reconstruct.scan'):
+        Q = _quat_scan(q)
+    with stage('reconstruct.positions'):
+        # step n starts from the composed rotation of steps 0..n-1
+        R = np.empty_like(Q)
+        R[0] = (1.0, 0.0, 0.0, 0.0)
+        R[1:] = Q[:-1]
+        F0 = np.stack([T, N, np.cross(T, N)], axis=0)
+        pts = np.empty((kq.shape[0] + 1, 3), dtype=kq.dtype)
+        pts[0] = p
+        np.cumsum(_quat_rotate(R, trans) @ F0, axis=0, out=pts[1:])
+        pts[1:] += p
+    if poses:
+        return pts, np.concatenate([R, Q[-1:]], axis=0)
+    return pts
+
 def reconstruct_from_memory(mem: Dict[str, Any], *, ds: Optional[float] = None,
                              start: Optional[np.ndarray] = None,
-                             frame: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None) -> np.ndarray:
+                             frame: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+                             method: str = 'step', dtype=None) -> np.ndarray:
+    """Integrate kappa/tau back into a polyline.
+
+    ``method='step'`` runs ``frenet_step`` sample by sample. ``method='scan'``
+    builds every step rotation at once, composes them with a quaternion
+    prefix product and sums tangents with ``np.cumsum``; it follows the same
+    discretization, so results agree to rounding error, but it is loop-free.
+    Both are first order in ``ds``. ``method='magnus4'`` is a 4th-order Magnus
+    integrator on SE(3): kappa/tau are sampled at two Gauss points per step and
+    each step's rotation and displacement come from the closed-form SE(3)
+    exponential, so it reaches a given accuracy with far fewer steps (and is
+    exact for constant kappa/tau). It is loop-free like ``'scan'``. Every
+    method returns points at arclength ``i*ds`` below L plus a last point at
+    exactly L, reached by a shortened final step.
+
+    Without ``ds`` the memory's own ``'ds'`` entry is used if present (see
+    ``simplify.simplify_memory``), else L / max(50, len(u)).
+
+    Points come back as ``dtype``, by default float32 for float32 kappa/tau and
+    float64 otherwise. ``'scan'``/``'magnus4'`` compute in that precision; ``'step'``
+    always integrates in float64 and rounds the result.
+    """
+    if method not in RECONSTRUCT_METHODS:
+        raise ValueError(f"unknown method: {method!r}")
+    if dtype is None:
+        dtype = np.result_type(np.asarray(mem['kappa']).dtype, np.asarray(mem['tau']).dtype, np.float32)
+    dtype = _float_dtype(dtype, _MEMORY_DTYPES, 'dtype')
+    with stage('cma3d.reconstruct'):
+        if float(mem['L']) < _EPS:
+            return np.zeros((2,3), dtype=dtype)
+        s = _arclengths(float(mem['L']), _step_size(mem, ds))
+        return _reconstruct(mem, s, start, frame, method, dtype)
+
+def _step_size(mem: Dict[str, Any], ds: Optional[float]) -> float:
+    """``ds``, else ``mem['ds']``, else L / max(50, len(u))."""
+    if ds is None:
+        ds = mem.get('ds')
+    ds = (float(mem['L']) / max(50, np.shape(mem['u'])[0])) if ds is None else float(ds)
+    if not ds > 0:
+        raise ValueError("ds must be positive")
+    return ds
+
+def _arclengths(L: float, ds: float, s0: float = 0.0, s1: Optional[float] = None) -> np.ndarray:
+    """Sample arclengths ``s0 + i*ds`` up to ``s1`` (default and at most L).
+
+    When the window reaches L it ends exactly there: with a shorter last step,
+    or by moving a grid point within 1e-6*ds of L onto it.
+    """
+    end = L if s1 is None else min(s1, L)
+    n = int(np.floor((end - s0) / ds + 1e-9)) + 1
+    s = s0 + np.arange(max(n, 1)) * ds
+    if end >= L:
+        if L - s[-1] > 1e-6 * ds:
+            s = np.append(s, L)
+        else:
+            s[-1] = L
+    return s
+
+def _reconstruct(mem, s, start, frame, method, dtype, poses: bool = False, end_pose: bool = False):
+    """Points at the arclengths ``s`` (at least two), starting at ``s[0]``.
+
+    With ``end_pose`` also returns ``(point, (T, N, B))`` at ``s[-1]``, to
+    continue from there.
+    """
     u = mem['u']; kappa = mem['kappa']; tau = mem['tau']; L = float(mem['L'])
-    if L < _EPS:
-        return np.zeros((2,3))
     def interp(arr, u_query):
         return np.interp(u_query, u, arr)
-    M = max(50, u.shape[0])
-    ds = (L / M) if ds is None else float(ds)
-    M = max(2, int(np.ceil(L / max(ds, _EPS))))
+    h = np.diff(s)
     p = np.zeros(3) if start is None else np.asarray(start, float)
     if frame is None:
         T = np.array([1.0, 0.0, 0.0]); N = np.array([0.0, 1.0, 0.0]); B = np.array([0.0, 0.0, 1.0])
     else:
         T, N, B = frame; T = _normalize(np.asarray(T,float)); N = _normalize(np.asarray(N,float)); B = _normalize(np.asarray(B,float))
-    pts = [p.copy()]; s_acc = 0.0
-    for _ in range(M-1):
-        s_acc = min(L, s_acc + ds)
-        uq = s_acc / L
-        k = float(interp(kappa, uq)); t = float(interp(tau, uq))
-        T, N, B = frenet_step(T, N, B, k, t, ds)
-        p = p + T * ds
-        pts.append(p.copy())
-    return np.stack(pts, axis=0)
+    if method == 'scan':
+        with stage('reconstruct.interp'):
+            uq = np.minimum(L, s[1:]) / L
+            kq = interp(kappa, uq).astype(dtype, copy=False)
+            tq = interp(tau, uq).astype(dtype, copy=False)
+        out = _reconstruct_scan(kq, tq, h.astype(dtype), p.astype(dtype), T.astype(dtype), N.astype(dtype),
+                                poses or end_pose)
+    elif method == 'magnus4':
+        with stage('reconstruct.interp'):
+            uq = np.minimum(L, s[:-1, None] + h[:, None] * np.asarray(_GAUSS2)) / L
+            kq = interp(kappa, uq).astype(dtype, copy=False)
+            tq = interp(tau, uq).astype(dtype, copy=False)
+        out = _reconstruct_magnus4(kq, tq, h.astype(dtype), p.astype(dtype), T.astype(dtype), N.astype(dtype),
+                                   poses or end_pose)
+    if method != 'step':
+        if not end_pose:
+            return out
+        pts, R = out
+        return pts, (pts[-1], _quat_frame(R[-1], np.stack([T, N, np.cross(T, N)])))
+    with stage('reconstruct.step'):
+        pts = [p.copy()]
+        for s_acc, step in zip(np.minimum(L, s[1:]).tolist(), h.tolist()):
+            uq = s_acc / L
+            k = float(interp(kappa, uq)); t = float(interp(tau, uq))
+            T, N, B = frenet_step(T, N, B, k, t, step)
+            p = p + T * step
+            pts.append(p.copy())
+        pts = np.stack(pts, axis=0).astype(dtype, copy=False)
+    return (pts, (p, (T, N, B))) if end_pose else pts
+
+def reconstruct_chunks(mem: Dict[str, Any], *, ds: Optional[float] = None,
+                       start: Optional[np.ndarray] = None,
+                       frame: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+                       method: str = 'step', dtype=None, chunk_rows: int = 1 << 16) -> Iterator[np.ndarray]:
+    """``reconstruct_from_memory`` as consecutive blocks of at most ``chunk_rows`` points.
+
+    Each block continues from the last pose of the previous one, so only one
+    block is held at a time and curves with more points than fit in memory
+    can be written out piece by piece. The concatenated blocks are the full
+    reconstruction on the same grid, up to rounding (``'scan'`` and
+    ``'magnus4'`` restart their prefix products at every block).
+    """
+    if method not in RECONSTRUCT_METHODS:
+        raise ValueError(f"unknown method: {method!r}")
+    if chunk_rows < 2:
+        raise ValueError("chunk_rows must be at least 2")
+    if dtype is None:
+        dtype = np.result_type(np.asarray(mem['kappa']).dtype, np.asarray(mem['tau']).dtype, np.float32)
+    dtype = _float_dtype(dtype, _MEMORY_DTYPES, 'dtype')
+    L = float(mem['L'])
+    if L < _EPS:
+        yield np.zeros((2,3), dtype=dtype)
+        return
+    ds = _step_size(mem, ds)
+    a, b = 0, chunk_rows - 1
+    while True:
+        # rows a..b of the full grid; after the first block row a repeats the last point
+        s = _arclengths(L, ds, a * ds, b * ds)
+        if s.shape[0] < 2:
+            return
+        with stage('cma3d.reconstruct'):
+            pts, (start, frame) = _reconstruct(mem, s, start, frame, method, dtype, end_pose=True)
+        yield pts if a == 0 else pts[1:]
+        if s[-1] >= L:
+            return
+        a, b = b, b + chunk_rows
+
+def add_checkpoints(mem: Dict[str, Any], count: int, *, ds: Optional[float] = None) -> Dict[str, Any]:
+    """Store ``count`` evenly spaced pose checkpoints in ``mem['frames']`` (in place).
+
+    Poses come from a ``'magnus4'`` reconstruction with the default start and
+    frame, so they lie on the curve ``reconstruct_from_memory`` draws. Rows are
+    ``[s, px, py, pz, qw, qx, qy, qz]``: arclength, position and the frame
+    (columns T, N, B) as a unit quaternion, at multiples of the step. An
+    explicit ``ds`` is also stored as ``mem['ds']``. Returns ``mem``.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    L = float(mem['L'])
+    if ds is not None:
+        mem['ds'] = float(ds)
+    if L < _EPS:
+        mem['frames'] = np.array([[0.0, 0, 0, 0, 1, 0, 0, 0]])
+        return mem
+    s = _arclengths(L, _step_size(mem, ds))
+    idx = np.unique(np.arange(count) * (s.shape[0] - 1) // count)
+    pts, R = _reconstruct(mem, s, None, None, 'magnus4', np.dtype(np.float64), poses=True)
+    mem['frames'] = np.concatenate([s[idx, None], pts[idx], R[idx]], axis=1)
+    return mem
+
+def reconstruct_range(mem: Dict[str, Any], u0: float, u1: float, *, ds: Optional[float] = None,
+                      method: str = 'magnus4', dtype=None) -> np.ndarray:
+    """Reconstruct only the window ``u0 <= u <= u1``.
+
+    Integration starts from the last ``mem['frames']`` checkpoint at or before
+    ``u0`` (from the curve start if there are none), so the cost is the window
+    length plus at most one checkpoint spacing. Points are at the arclengths
+    ``i*ds`` of ``reconstruct_from_memory(mem, ds=ds)`` that fall in the
+    window, plus the curve end when ``u1 == 1``, so adjacent windows tile the
+    full reconstruction for any ``ds``; a checkpoint off that grid is joined to
+    it by one short step. With ``'magnus4'`` the points match the full
+    reconstruction up to its (4th-order) step error. Other methods restart
+    from those (more accurate) poses, so they differ from their own full
+    reconstruction by its accumulated drift. Windows are independent, so a
+    long curve can be reconstructed in parallel pieces.
+    """
+    if not 0.0 <= u0 <= u1 <= 1.0:
+        raise ValueError("need 0 <= u0 <= u1 <= 1")
+    if method not in RECONSTRUCT_METHODS:
+        raise ValueError(f"unknown method: {method!r}")
+    if dtype is None:
+        dtype = np.result_type(np.asarray(mem['kappa']).dtype, np.asarray(mem['tau']).dtype, np.float32)
+    dtype = _float_dtype(dtype, _MEMORY_DTYPES, 'dtype')
+    L = float(mem['L'])
+    if L < _EPS:
+        return np.zeros((1, 3), dtype=dtype)
+    ds = _step_size(mem, ds)
+    s_lo, s_hi = u0 * L, u1 * L
+    tol = 1e-9 * ds
+    frames = mem.get('frames')
+    s_c, p, frame = 0.0, None, None
+    if frames is not None and len(frames):
+        frames = np.asarray(frames, dtype=float)
+        c = int(np.searchsorted(frames[:, 0], s_lo + tol, side='right')) - 1
+        if c >= 0:
+            s_c, p = float(frames[c, 0]), frames[c, 1:4]
+            frame = _quat_frame(frames[c, 4:8], np.eye(3))
+    # the full reconstruction's grid from the first multiple of ds at or after
+    # the checkpoint, reached by a short first step when they differ
+    s = _arclengths(L, ds, np.ceil(s_c / ds - 1e-9) * ds, s_hi)
+    keep = (s >= s_lo - tol) & (s <= s_hi + tol)
+    if s[0] - s_c > tol:
+        s = np.insert(s, 0, s_c)
+        keep = np.insert(keep, 0, False)
+    else:
+        s[0] = s_c
+    with stage('cma3d.reconstruct_range'):
+        if s.shape[0] < 2:
+            pts = np.asarray(p if p is not None else np.zeros(3), dtype=dtype)[None, :]
+        else:
+            pts = _reconstruct(mem, s, p, frame, method, dtype)
+    return pts[keep]
 
 def rmf_sweep(points: np.ndarray):
     pts = np.asarray(points, float)
@@ -198,10 +927,108 @@ def rmf_sweep(points: np.ndarray):
         Nv[i] = Np_i; Bv[i] = Bp_i
     return T, Nv, Bv
 
+def _rmf_start(T0: np.ndarray) -> np.ndarray:
+    """Initial normals chosen exactly as in ``rmf_sweep`` for rows of start tangents."""
+    a = np.zeros_like(T0)
+    near_x = np.abs(T0[:, 0]) > 0.9
+    a[~near_x, 0] = 1.0
+    a[near_x, 1] = 1.0
+    B0 = _normalize(np.cross(T0, a))
+    return _normalize(np.cross(B0, T0))
+
+def _quat_rotate(q: np.ndarray, v: np.ndarray) -> np.ndarray:
+    w = q[:, :1]; r = q[:, 1:]
+    uv = np.cross(r, v)
+    return v + 2.0*w*uv + 2.0*np.cross(r, uv)
+
+def rmf_frames(curves, offsets: Optional[np.ndarray] = None, *, method: str = 'reflect',
+               check_tol: Optional[float] = None):
+    """Vectorized rotation-minimizing frames for one or many curves.
+
+    ``curves`` is a single (N,3) array, a list of arrays, or a concatenated
+    buffer with ``offsets`` (see ``curve_memory_3d_batch``). Returns ``(T, N, B)``
+    shaped like the input buffer. Initial frames are chosen as in ``rmf_sweep``.
+
+    ``method='reflect'`` uses the double-reflection method (Wang et al. 2008):
+    each step is the rotation composed of two reflections, and all steps are
+    combined with a segmented quaternion prefix product. ``method='project'``
+    reproduces ``rmf_sweep``'s projection scheme as a prefix product of
+    projection matrices.
+
+    With ``check_tol`` set, frames are also computed with ``rmf_sweep`` per
+    curve and a ValueError is raised if N or B differ by more than ``check_tol``.
+    """
+    if method not in ('reflect', 'project'):
+        raise ValueError(f"unknown method: {method!r}")
+    if offsets is None and isinstance(curves, np.ndarray) and curves.ndim == 2:
+        if curves.shape[0] == 0:
+            return np.zeros((0, 3)), np.zeros((0, 3)), np.zeros((0, 3))
+        offsets = np.array([0, curves.shape[0]], dtype=np.int64)
+    P, offsets = _ragged_input(curves, offsets)
+    n, first, last, cid, local = _ragged_layout(offsets)
+    diffs = np.diff(P, axis=0)
+    T, _ = _ragged_tangent(diffs, n, first, last, cid, local)
+    N0 = _rmf_start(T[first])[cid]
+    if method == 'reflect':
+        # step j-1 -> j lives on row j; curve starts hold the identity
+        j = np.flatnonzero(local > 0)
+        v1 = diffs[j - 1]
+        c1 = np.einsum('ij,ij->i', v1, v1)
+        short = c1 < _EPS*_EPS
+        n1 = v1 / np.sqrt(np.where(short, 1.0, c1))[:, None]
+        n1[short] = T[j - 1][short]
+        tL = T[j - 1] - 2.0*np.einsum('ij,ij->i', n1, T[j - 1])[:, None]*n1
+        v2 = T[j] - tL
+        c2 = np.linalg.norm(v2, axis=1)
+        ok = c2 > 1e-9  # tangent reversal: no rotation is well defined, keep the frame
+        j, n1 = j[ok], n1[ok]
+        n2 = v2[ok] / c2[ok, None]
+        q = np.zeros((P.shape[0], 4))
+        q[:, 0] = 1.0
+        # H2 H1 is conjugation by the quaternion n2 n1; store its conjugate so
+        # the left-to-right scan yields conj(q_j ... q_1)
+        q[j, 0] = -np.einsum('ij,ij->i', n2, n1)
+        q[j, 1:] = -np.cross(n2, n1)
+        Q = _quat_scan(q, local)
+        Q[:, 1:] *= -1.0
+        N = _quat_rotate(Q, N0)
+    else:
+        M = np.broadcast_to(np.eye(3), (P.shape[0], 3, 3)).copy()
+        j = np.flatnonzero(local > 0)
+        M[j] -= T[j][:, :, None] * T[j][:, None, :]
+        d = 1
+        while d < P.shape[0]:
+            m = local[d:] >= d
+            if not m.any():
+                break
+            Mk = M[d:] @ M[:-d]
+            Mk /= np.maximum(np.abs(Mk).max(axis=(1, 2), keepdims=True), _EPS)
+            M[d:] = np.where(m[:, None, None], Mk, M[d:])
+            d *= 2
+        N = np.einsum('nij,nj->ni', M, N0)
+    N = _normalize(N - T*np.einsum('ij,ij->i', T, N)[:, None])
+    B = _normalize(np.cross(T, N))
+    if check_tol is not None:
+        for a, b in zip(first, last + 1):
+            _, Nr, Br = rmf_sweep(P[a:b])
+            err = max(np.abs(N[a:b] - Nr).max(), np.abs(B[a:b] - Br).max())
+            if err > check_tol:
+                raise ValueError(f"rmf_frames deviates from rmf_sweep by {err:.3g} on rows {a}:{b}")
+    return T, N, B
+
 __all__ = [
+    'CurveMemory',
     'curve_memory_3d',
+    'curve_memory_3d_batch',
+    'memory_from_batch',
     'reconstruct_from_memory',
-    'rmf_sweep'
+    'cast_memory',
+    'add_checkpoints',
+    'reconstruct_range',
+    'reconstruct_chunks',
+    'rmf_sweep',
+    'rmf_frames',
+    'memory_hash',
 ]
 
 if __name__ == "__main__":
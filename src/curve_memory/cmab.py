@@ -0,0 +1,266 @@
+"""CMAB: binary container for 2D CMA v0.3 glyph streams.
+
+Layout (little-endian)::
+
+    header   magic    8s   b'CMA2DBN\\0'
+             version  u2   container version (1)
+             flags    u2   reserved (0)
+             json_len u4
+    json     UTF-8 JSON: the CMA fields other than glyphs/hash/frames
+             (version, pi_mode, meta, ...) plus "columns", the list of
+             {"name", "codec", "bound"} column declarations
+    blocks   tag b'GLYB', count u4, then
+               family  u1[count]   codes into ``alphabet.FAMILIES``
+               one encoded column per declaration (``bind`` + theta keys)
+    sections tag b'HASH', len u4, UTF-8 JSON of the hash dict
+             tag b'FRMS', ndim u4, shape u4[ndim], f8[prod(shape)]
+             tag b'END\\0', 0
+
+Column codecs:
+
+``raw``    f8[count]; bit-exact, NaN marks an absent theta key.
+``quant``  values rounded to multiples of ``2*bound`` and delta coded:
+           width u1, has_mask u1, m u4, [presence bitmap], base i8,
+           (m-1) deltas as int{8,16,32,64}. Decoded values are within
+           ``bound`` (plus float rounding) of the originals.
+
+With only raw columns (the default) ``load_cmab(save_cmab(cma))`` returns the
+JSON form unchanged. ``CMABWriter`` / ``CMABReader`` write and read one block
+at a time, so neither side needs the whole stream in memory.
+"""
+from __future__ import annotations
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union
+import json
+import struct
+import numpy as np
+
+from .alphabet import FAMILIES, GlyphTable
+
+MAGIC = b'CMA2DBN\0'
+VERSION = 1
+BLOCK_SIZE = 1 << 16
+_HEADER = struct.Struct('<8sHHI')
+_TAG = struct.Struct('<4sI')
+_QUANT = struct.Struct('<BBI')
+_INT_WIDTHS = ((1, np.int8), (2, np.int16), (4, np.int32), (8, np.int64))
+
+def _read_exact(f: BinaryIO, n: int) -> bytes:
+    buf = f.read(n)
+    if len(buf) != n:
+        raise ValueError("truncated CMAB stream")
+    return buf
+
+def _as_table(glyphs: Any) -> GlyphTable:
+    if isinstance(glyphs, GlyphTable):
+        return glyphs
+    glyphs = list(glyphs)
+    if glyphs and isinstance(glyphs[0], dict):
+        return GlyphTable.from_json(glyphs)
+    return GlyphTable.from_glyphs(glyphs)
+
+def _encode_quant(col: np.ndarray, step: float) -> bytes:
+    present = ~np.isnan(col)
+    vals = col[present] / step
+    if vals.size and not np.all(np.abs(vals) < 2.0**62):
+        raise ValueError("value out of range for quantization step")
+    q = np.rint(vals).astype(np.int64)
+    d = np.diff(q)
+    lo = int(d.min()) if d.size else 0
+    hi = int(d.max()) if d.size else 0
+    for width, dt in _INT_WIDTHS:
+        info = np.iinfo(dt)
+        if info.min <= lo and hi <= info.max:
+            break
+    has_mask = not present.all()
+    parts = [_QUANT.pack(width, has_mask, q.size)]
+    if has_mask:
+        parts.append(np.packbits(present).tobytes())
+    if q.size:
+        parts.append(q[:1].astype('<i8').tobytes())
+        parts.append(d.astype(np.dtype(dt).newbyteorder('<')).tobytes())
+    return b''.join(parts)
+
+def _decode_quant(f: BinaryIO, count: int, step: float) -> np.ndarray:
+    width, has_mask, m = _QUANT.unpack(_read_exact(f, _QUANT.size))
+    dt = dict(_INT_WIDTHS)[width]
+    if has_mask:
+        present = np.unpackbits(np.frombuffer(_read_exact(f, (count + 7) // 8), dtype=np.uint8),
+                                count=count).astype(bool)
+    else:
+        present = np.ones(count, dtype=bool)
+    out = np.full(count, np.nan)
+    if m:
+        q = np.empty(m, dtype=np.int64)
+        q[0] = np.frombuffer(_read_exact(f, 8), dtype='<i8')[0]
+        d = np.frombuffer(_read_exact(f, (m - 1) * width), dtype=np.dtype(dt).newbyteorder('<'))
+        np.cumsum(d, out=q[1:])
+        q[1:] += q[0]
+        out[present] = q * step
+    return out
+
+class CMABWriter:
+    """Write a CMAB stream block by block.
+
+    ``quantize`` maps column names (theta keys or ``"bind"``) to an absolute
+    error bound; those columns use the ``quant`` codec, all others ``raw``.
+    Columns are fixed by the first ``write``; ``fields`` holds the other CMA
+    fields (version, pi_mode, meta, ...) stored in the header.
+    """
+
+    def __init__(self, f: Union[str, BinaryIO], *, fields: Optional[Dict[str, Any]] = None,
+                 quantize: Optional[Dict[str, float]] = None, block_size: int = BLOCK_SIZE):
+        self._own = isinstance(f, str)
+        self._f = open(f, 'wb') if self._own else f
+        self.fields = dict(fields or {"version": "0.3"})
+        self.quantize = dict(quantize or {})
+        for name, bound in self.quantize.items():
+            if not bound > 0:
+                raise ValueError(f"quantization bound for {name!r} must be positive")
+        self.block_size = block_size
+        self.columns: Optional[List[Dict[str, Any]]] = None
+        self.count = 0
+
+    def __enter__(self) -> 'CMABWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _start(self, keys: List[str]) -> None:
+        self.columns = [{"name": k, "codec": "quant" if k in self.quantize else "raw",
+                         "bound": float(self.quantize.get(k, 0.0))} for k in ["bind"] + keys]
+        blob = json.dumps(dict(self.fields, columns=self.columns)).encode('utf-8')
+        self._f.write(_HEADER.pack(MAGIC, VERSION, 0, len(blob)))
+        self._f.write(blob)
+
+    def write(self, glyphs: Any) -> None:
+        """Append glyphs (``GlyphTable``, JSON glyph dicts or ``Glyph`` objects)."""
+        table = _as_table(glyphs)
+        if self.columns is None:
+            self._start(list(table.params))
+        extra = set(table.params) - {c["name"] for c in self.columns}
+        if extra:
+            raise ValueError(f"theta keys {sorted(extra)} not declared by the first write")
+        for start in range(0, len(table), self.block_size):
+            self._write_block(table.slice(start, start + self.block_size))
+
+    def _write_block(self, t: GlyphTable) -> None:
+        n = len(t)
+        parts = [_TAG.pack(b'GLYB', n), t.family.tobytes()]
+        for c in self.columns:
+            col = t.bind if c["name"] == "bind" else t.params.get(c["name"])
+            if col is None:
+                col = np.full(n, np.nan)
+            if c["codec"] == "quant":
+                parts.append(_encode_quant(col, 2.0 * c["bound"]))
+            else:
+                parts.append(col.astype('<f8').tobytes())
+        self._f.write(b''.join(parts))
+        self.count += n
+
+    def close(self, *, hash: Optional[Dict[str, Any]] = None, frames: Any = None) -> None:
+        """Write the optional hash/frames sections and the end tag."""
+        if self._f is None:
+            return
+        if self.columns is None:
+            self._start([])
+        if hash is not None:
+            blob = json.dumps(hash).encode('utf-8')
+            self._f.write(_TAG.pack(b'HASH', len(blob)) + blob)
+        if frames is not None:
+            fr = np.asarray(frames, dtype=float)
+            shape = np.asarray(fr.shape, dtype='<u4')
+            self._f.write(_TAG.pack(b'FRMS', fr.ndim) + shape.tobytes() + fr.astype('<f8').tobytes())
+        self._f.write(_TAG.pack(b'END\0', 0))
+        if self._own:
+            self._f.close()
+        self._f = None
+
+class CMABReader:
+    """Read a CMAB stream; iterating yields one ``GlyphTable`` per block.
+
+    ``fields`` and ``columns`` are available after construction; ``hash`` and
+    ``frames`` once the blocks have been consumed.
+    """
+
+    def __init__(self, f: Union[str, BinaryIO]):
+        self._own = isinstance(f, str)
+        self._f = open(f, 'rb') if self._own else f
+        magic, version, _flags, json_len = _HEADER.unpack(_read_exact(self._f, _HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("not a CMAB stream")
+        if version != VERSION:
+            raise ValueError(f"unsupported CMAB version {version}")
+        self.fields = json.loads(_read_exact(self._f, json_len).decode('utf-8'))
+        self.columns = self.fields.pop("columns")
+        self.hash: Optional[Dict[str, Any]] = None
+        self.frames: Optional[np.ndarray] = None
+        self._done = False
+
+    def __enter__(self) -> 'CMABReader':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._own and self._f is not None:
+            self._f.close()
+        self._f = None
+
+    def __iter__(self) -> Iterator[GlyphTable]:
+        f = self._f
+        while not self._done:
+            tag, n = _TAG.unpack(_read_exact(f, _TAG.size))
+            if tag == b'GLYB':
+                family = np.frombuffer(_read_exact(f, n), dtype=np.uint8)
+                if n and int(family.max()) >= len(FAMILIES):
+                    raise ValueError("unknown glyph family code")
+                cols = {}
+                for c in self.columns:
+                    if c["codec"] == "quant":
+                        cols[c["name"]] = _decode_quant(f, n, 2.0 * c["bound"])
+                    else:
+                        cols[c["name"]] = np.frombuffer(_read_exact(f, 8 * n), dtype='<f8').astype(float)
+                bind = cols.pop("bind")
+                yield GlyphTable(family=family, params=cols, bind=bind)
+            elif tag == b'HASH':
+                self.hash = json.loads(_read_exact(f, n).decode('utf-8'))
+            elif tag == b'FRMS':
+                shape = tuple(np.frombuffer(_read_exact(f, 4 * n), dtype='<u4').tolist())
+                size = int(np.prod(shape, dtype=np.int64))
+                self.frames = np.frombuffer(_read_exact(f, 8 * size), dtype='<f8').reshape(shape).astype(float)
+            elif tag == b'END\0':
+                self._done = True
+            else:
+                raise ValueError(f"unknown CMAB section {tag!r}")
+
+    def read_table(self) -> GlyphTable:
+        """All remaining blocks as one ``GlyphTable``."""
+        blocks = list(self)
+        if not blocks:
+            return GlyphTable(family=np.zeros(0), params={c["name"]: np.zeros(0) for c in self.columns
+                                                          if c["name"] != "bind"})
+        return GlyphTable.concat(blocks)
+
+def save_cmab(path: str, cma: Dict[str, Any], *, quantize: Optional[Dict[str, float]] = None,
+              block_size: int = BLOCK_SIZE) -> None:
+    """Write a CMA dict (list or ``GlyphTable`` glyphs) to ``path``."""
+    fields = {k: v for k, v in cma.items() if k not in ("glyphs", "hash", "frames")}
+    with CMABWriter(path, fields=fields, quantize=quantize, block_size=block_size) as w:
+        w.write(cma.get("glyphs", []))
+        w.close(hash=cma.get("hash"), frames=cma.get("frames"))
+
+def load_cmab(path: str, *, table: bool = False) -> Dict[str, Any]:
+    """Read a CMAB file into a CMA dict; ``table=True`` keeps glyphs as a ``GlyphTable``."""
+    with CMABReader(path) as r:
+        glyphs = r.read_table()
+        cma = dict(r.fields)
+        cma["glyphs"] = glyphs if table else glyphs.to_json()
+        if r.hash is not None:
+            cma["hash"] = r.hash
+        if r.frames is not None:
+            cma["frames"] = r.frames if table else r.frames.tolist()
+    return cma
+
+__all__ = ['CMABWriter', 'CMABReader', 'save_cmab', 'load_cmab']
@@ -0,0 +1,159 @@
+"""CMM: memory-mappable binary container for CMA-3D memories.
+
+Layout (little-endian)::
+
+    offset 0   header, 128 bytes (96 used, rest reserved)
+               magic    8s   b'CMA3DMM\\0'
+               version  u2
+               flags    u2   bit 0: pack section, bit 1: ds, bit 2: frames present
+               dtypes   4s   numpy type chars of u, kappa, tau (+ pad), e.g. b'ddd\\0'
+               count    u8   samples per array
+               L        f8   curve length
+               u_off    u8   byte offsets of the three arrays
+               k_off    u8
+               t_off    u8
+               pack_off u8   byte offset / length of the UTF-8 JSON pack section
+               pack_len u8   (both 0 when absent)
+               ds       f8   reconstruction step (``mem['ds']``, 0 when absent)
+               f_off    u8   byte offset / row count of the frames section
+               f_rows   u8   (both 0 when absent)
+    u_off      u      [count]
+    k_off      kappa  [count]
+    t_off      tau    [count]
+    pack_off   JSON   {"levels": [{"n": .., "stats": {..}}, ...], "global": {..}}
+    f_off      f8     [f_rows, 8] pose checkpoints (``mem['frames']``, see
+                      ``cma3d.add_checkpoints``)
+
+Arrays start on 64-byte boundaries, so ``load_cmm`` can hand out ``np.memmap``
+views without reading or copying the payload. The pack section keeps the
+per-level stats and global norms only; level arrays are subsamples of the base
+arrays and are not stored.
+"""
+from __future__ import annotations
+from typing import Any, Dict
+import json
+import struct
+import numpy as np
+
+MAGIC = b'CMA3DMM\0'
+VERSION = 1
+ALIGN = 64
+_HEADER = struct.Struct('<8sHH4sQdQQQQQ')
+_HEADER_SIZE = 128  # struct + reserved space
+_FLAG_PACK = 1
+_FLAG_DS = 2
+_FLAG_FRAMES = 4
+_EXTRA = struct.Struct('<dQQ')  # ds, f_off, f_rows
+
+def _aligned(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+def _pack_meta(pack: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'levels': [{'n': len(lv['u']) if 'u' in lv else lv.get('n', 0), 'stats': lv['stats']}
+                   for lv in pack.get('levels', [])],
+        'global': pack.get('global', {}),
+    }
+
+def save_cmm(path: str, mem: Dict[str, Any], *, pack: bool = True) -> None:
+    """Write ``mem`` (a ``curve_memory_3d`` dict) to ``path``.
+
+    Arrays are written in their own dtype (float64 by default; float32 and a
+    float16 u from ``curve_memory_3d(dtype=..., u_dtype=...)`` are kept as is
+    and load back unchanged). ``pack=False`` skips the pack section even if
+    ``mem`` has one.
+    """
+    arrays = [np.ascontiguousarray(mem[k]) for k in ('u', 'kappa', 'tau')]
+    count = arrays[0].shape[0]
+    for a in arrays:
+        assert a.ndim == 1 and a.shape[0] == count, "u, kappa and tau must be 1-D and equal length"
+    codes = b''.join(a.dtype.char.encode('ascii') for a in arrays) + b'\0'
+    offs = []
+    pos = _HEADER_SIZE
+    for a in arrays:
+        pos = _aligned(pos)
+        offs.append(pos)
+        pos += a.nbytes
+    blob = b''
+    flags = 0
+    if pack and mem.get('pack') is not None:
+        blob = json.dumps(_pack_meta(mem['pack'])).encode('utf-8')
+        flags |= _FLAG_PACK
+    pack_off = _aligned(pos) if blob else 0
+    frames = mem.get('frames')
+    f_off = f_rows = 0
+    if frames is not None:
+        frames = np.ascontiguousarray(frames, dtype='<f8').reshape(-1, 8)
+        f_off = _aligned(pack_off + len(blob) if blob else pos)
+        f_rows = frames.shape[0]
+        flags |= _FLAG_FRAMES
+    ds = mem.get('ds')
+    if ds is not None:
+        flags |= _FLAG_DS
+    header = _HEADER.pack(MAGIC, VERSION, flags, codes, count, float(mem['L']),
+                          offs[0], offs[1], offs[2], pack_off, len(blob))
+    header += _EXTRA.pack(0.0 if ds is None else float(ds), f_off, f_rows)
+    with open(path, 'wb') as f:
+        f.write(header.ljust(_HEADER_SIZE, b'\0'))
+        for off, a in zip(offs, arrays):
+            f.seek(off)
+            a.astype(a.dtype.newbyteorder('<'), copy=False).tofile(f)
+        if blob:
+            f.seek(pack_off)
+            f.write(blob)
+        if frames is not None:
+            f.seek(f_off)
+            frames.tofile(f)
+
+def read_cmm_header(path: str) -> Dict[str, Any]:
+    """Parse and validate the fixed header of a CMM file."""
+    with open(path, 'rb') as f:
+        raw = f.read(_HEADER_SIZE)
+    if len(raw) < _HEADER_SIZE:
+        raise ValueError(f"{path}: truncated CMM header")
+    magic, version, flags, codes, count, L, u_off, k_off, t_off, pack_off, pack_len = \
+        _HEADER.unpack(raw[:_HEADER.size])
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a CMM file")
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported CMM version {version}")
+    dtypes = [np.dtype(chr(c)).newbyteorder('<') for c in codes[:3]]
+    ds, f_off, f_rows = _EXTRA.unpack_from(raw, _HEADER.size)
+    return {'version': version, 'flags': flags, 'dtypes': dtypes, 'count': count, 'L': L,
+            'offsets': (u_off, k_off, t_off), 'pack_off': pack_off, 'pack_len': pack_len,
+            'ds': ds if flags & _FLAG_DS else None,
+            'frames': (f_off, f_rows) if flags & _FLAG_FRAMES else None}
+
+def load_cmm(path: str, *, mmap: bool = True) -> Dict[str, Any]:
+    """Open a CMM file.
+
+    With ``mmap=True`` (default) u/kappa/tau are read-only ``np.memmap`` views
+    into the file, so opening is O(1) regardless of size. ``mmap=False`` reads
+    them into regular arrays.
+    """
+    h = read_cmm_header(path)
+    n = h['count']
+    mem: Dict[str, Any] = {'L': float(h['L'])}
+    for key, dt, off in zip(('u', 'kappa', 'tau'), h['dtypes'], h['offsets']):
+        if n == 0:
+            mem[key] = np.zeros(0, dtype=dt)
+        elif mmap:
+            mem[key] = np.memmap(path, dtype=dt, mode='r', offset=off, shape=(n,))
+        else:
+            with open(path, 'rb') as f:
+                f.seek(off)
+                mem[key] = np.fromfile(f, dtype=dt, count=n)
+    if h['ds'] is not None:
+        mem['ds'] = h['ds']
+    if h['frames'] is not None:
+        f_off, f_rows = h['frames']
+        with open(path, 'rb') as f:
+            f.seek(f_off)
+            mem['frames'] = np.fromfile(f, dtype='<f8', count=8 * f_rows).reshape(f_rows, 8)
+    if h['flags'] & _FLAG_PACK:
+        with open(path, 'rb') as f:
+            f.seek(h['pack_off'])
+            mem['pack'] = json.loads(f.read(h['pack_len']).decode('utf-8'))
+    return mem
+
+__all__ = ['save_cmm', 'load_cmm', 'read_cmm_header']
@@ -1,25 +1,155 @@
+"""
+Glyph contraction (``wedge_contract``).
 
-from typing import List
-from .alphabet import Glyph
+Contraction runs on the columnar ``GlyphTable``; lists of glyphs are converted
+on the way in and out. The rules follow docs/COMPRESSION_CASES.md:
 
-def wedge_contract(glyphs: List[Glyph]) -> List[Glyph]:
+1. Parallel arcs: adjacent arcs whose curvature has the same sign merge into
+   one longer arc. Adjacent glyphs of any other family merge the same way.
+2. Clothoid + arc: a clothoid whose curvature is within ``ktol`` of a
+   neighbouring arc (same sign) becomes part of that arc.
+3. Opposite pairs: an arc followed by an arc of opposite turning
+   (|k1 L1 + k2 L2| <= ``turn_tol``) cancels to a straight (k = 0) clothoid.
+
+Merging sums L and takes L-weighted means of the other parameters (k, tau, ...),
+so the total turning sum(k*L) of a merged run is preserved exactly; bind is
+the plain mean over the run. Runs of length one are passed through untouched.
+Cancelled pairs keep their length and net heading but drop their lateral
+offset (about k*L^2).
+"""
+from typing import Any, List, Sequence, Union
+import numpy as np
+from .alphabet import FAMILY_CODE, Glyph, GlyphFamily, GlyphTable
+
+_ARC = FAMILY_CODE[GlyphFamily.ARC]
+_CLOTHOID = FAMILY_CODE[GlyphFamily.CLOTHOID]
+# parameters the decoder reads with a default; absent entries count as that value
+_DEFAULTS = {"k": 0.0, "tau": 0.0}
+
+def _run_starts(family: np.ndarray, sign: np.ndarray) -> np.ndarray:
+    n = family.shape[0]
+    start = np.empty(n, dtype=bool)
+    start[:1] = True
+    start[1:] = (family[1:] != family[:-1]) | (sign[1:] != sign[:-1])
+    return np.flatnonzero(start)
+
+def _arc_sign(family: np.ndarray, k: np.ndarray) -> np.ndarray:
+    return np.where(family == _ARC, np.sign(k), 0.0)
+
+def _wmean(vals: np.ndarray, w: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Per-run mean of ``vals`` weighted by ``w``; unweighted where a run's weight is 0."""
+    present = ~np.isnan(vals)
+    w = np.where(present, w, 0.0)
+    v = np.where(present, vals, 0.0)
+    num = np.add.reduceat(v * w, starts)
+    den = np.add.reduceat(w, starts)
+    cnt = np.add.reduceat(present.astype(np.int64), starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = np.where(den != 0, num / den, np.add.reduceat(v, starts) / cnt)
+    out[cnt == 0] = np.nan
+    return out
+
+def _merge_runs(table: GlyphTable, starts: np.ndarray) -> GlyphTable:
+    n = len(table)
+    if starts.shape[0] == n:
+        return table
+    counts = np.diff(np.append(starts, n))
+    single = counts == 1
+    L = table.column("L", 1.0)
+    params = {}
+    for key, col in table.params.items():
+        if key == "L":
+            out = np.add.reduceat(L, starts)
+        elif key in _DEFAULTS:
+            out = _wmean(table.column(key, _DEFAULTS[key]), L, starts, counts)
+        else:
+            out = _wmean(col, L, starts, counts)
+        out[single] = col[starts[single]]
+        params[key] = out
+    bind = np.add.reduceat(table.bind, starts) / counts
+    return GlyphTable(family=table.family[starts], params=params, bind=bind)
+
+def _pair_starts(cand: np.ndarray) -> np.ndarray:
+    """Greedy left-to-right non-overlapping pairs (i, i+1) among candidate positions."""
+    idx = np.flatnonzero(cand)
+    if idx.size == 0:
+        return idx
+    chain = np.empty(idx.size, dtype=bool)
+    chain[0] = True
+    chain[1:] = np.diff(idx) != 1
+    first = np.maximum.accumulate(np.where(chain, np.arange(idx.size), 0))
+    return idx[(np.arange(idx.size) - first) % 2 == 0]
+
+def contract_table(table: GlyphTable, *, ktol: float = 1e-3, turn_tol: float = 1e-9,
+                   cancel: bool = True) -> GlyphTable:
+    """Apply the contraction rules to a ``GlyphTable``; see the module docstring."""
+    return _contract(table, ktol, turn_tol, cancel)[0]
+
+def _contract(table: GlyphTable, ktol: float = 1e-3, turn_tol: float = 1e-9,
+              cancel: bool = True):
+    """``contract_table`` plus the first input row of each output row."""
+    starts = np.arange(len(table))
+    if len(table) < 2:
+        return table, starts
+    family = table.family.copy()
+    k = table.column("k", 0.0)
+    sign = np.sign(k)
+    # clothoid -> arc where the curvature matches a neighbouring arc
+    same = (np.abs(k[1:] - k[:-1]) <= ktol) & (sign[1:] == sign[:-1])
+    clo = family == _CLOTHOID
+    arc = family == _ARC
+    to_arc = np.zeros(len(table), dtype=bool)
+    to_arc[:-1] |= clo[:-1] & arc[1:] & same
+    to_arc[1:] |= clo[1:] & arc[:-1] & same
+    family[to_arc] = _ARC
+    table = GlyphTable(family=family, params=table.params, bind=table.bind)
+    runs = _run_starts(family, _arc_sign(family, k))
+    table, starts = _merge_runs(table, runs), starts[runs]
+    if cancel and len(table) > 1:
+        family = table.family
+        k = table.column("k", 0.0)
+        turn = k * table.column("L", 1.0)
+        cand = (family[:-1] == _ARC) & (family[1:] == _ARC) & (np.abs(turn[:-1] + turn[1:]) <= turn_tol)
+        i = _pair_starts(cand)
+        if i.size:
+            family = family.copy()
+            family[i] = family[i + 1] = _CLOTHOID
+            kcol = table.column("k", 0.0)
+            kcol[i] = kcol[i + 1] = 0.0
+            params = dict(table.params, k=kcol)
+            table = GlyphTable(family=family, params=params, bind=table.bind)
+            k = table.column("k", 0.0)
+            runs = _run_starts(family, _arc_sign(family, k))
+            table, starts = _merge_runs(table, runs), starts[runs]
+    return table, starts
+
+def compression_ratio(before: Union[int, Sequence[Any]], after: Union[int, Sequence[Any]]) -> float:
+    """Glyph-count ratio before/after contraction (counts or glyph sequences)."""
+    nb = before if isinstance(before, int) else len(before)
+    na = after if isinstance(after, int) else len(after)
+    return nb / max(na, 1)
+
+def wedge_contract(glyphs: Union[List[Glyph], GlyphTable], **rules: Any) -> Union[List[Glyph], GlyphTable]:
     """
-    Placeholder for wedge-product based contraction rules.
-    For now, perform a simple adjacent-family coalesce heuristic.
+    Contract adjacent glyphs by the wedge-compression rules (see module docstring).
+    A ``GlyphTable`` is returned as a ``GlyphTable``; a list of glyphs as a list
+    of ``Glyph``. Non-numeric theta values in a list are not part of the table;
+    they are carried along per merged run, the last glyph's value winning.
+    ``rules`` are passed to ``contract_table``.
     """
+    if isinstance(glyphs, GlyphTable):
+        return contract_table(glyphs, **rules)
     if not glyphs:
         return glyphs
-    out = [glyphs[0]]
-    for g in glyphs[1:]:
-        if out and out[-1].family == g.family:
-            # naive contraction by averaging parameters when identical families
-            theta = dict(out[-1].theta)
-            for k,v in g.theta.items():
-                if k in theta and isinstance(theta[k], (int,float)) and isinstance(v, (int,float)):
-                    theta[k] = 0.5*(theta[k]+v)
-                else:
-                    theta[k] = v
-            out[-1] = type(out[-1])(family=out[-1].family, theta=theta, bind=0.5*(out[-1].bind+g.bind))
-        else:
-            out.append(g)
+    numeric, extras = [], []
+    for g in glyphs:
+        num = {k: v for k, v in g.theta.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+        numeric.append(Glyph(g.family, num, getattr(g, 'bind', 1.0)))
+        extras.append({k: v for k, v in g.theta.items() if k not in num})
+    table, starts = _contract(GlyphTable.from_glyphs(numeric), **rules)
+    out = table.to_glyphs()
+    if any(extras):
+        for g, a, b in zip(out, starts, np.append(starts[1:], len(glyphs))):
+            for i in range(a, b):
+                g.theta.update(extras[i])
     return out
@@ -1,28 +1,17 @@
 
-from typing import Dict, Any, List, Tuple
-import math
+from typing import Dict, Any, List, Tuple, Union
+import numpy as np
+from .alphabet import GlyphTable
+from .integrators import glyph_columns, integrate_se2_arrays
 
-def decode_curve(cma: Dict[str,Any]) -> List[Tuple[float,float]]:
+def decode_curve(cma: Union[Dict[str,Any], GlyphTable],
+                 as_array: bool = False) -> Union[List[Tuple[float,float]], np.ndarray]:
     """
-    Decode a CMA JSON dict into a polyline (very rough reconstruction).
-    Each glyph contributes a short segment; real implementation would integrate frames.
+    Decode a CMA JSON dict into a polyline by SE(2) integration of its glyphs
+    (see ``integrate_se2_arrays``).
+    ``cma`` may also be a ``GlyphTable``, or a dict whose ``glyphs`` is one.
+    ``as_array`` returns an (N+1, 2) array instead of a list of tuples.
     """
-    pts: List[Tuple[float,float]] = [(0.0,0.0)]
-    x,y,theta = 0.0,0.0,0.0
-    for g in cma.get("glyphs", []):
-        th = g["theta"]
-        k = float(th.get("k", 0.0))
-        L = float(th.get("L", 1.0))
-        # naive arc step
-        if abs(k) < 1e-6:
-            dx, dy = L*math.cos(theta), L*math.sin(theta)
-            x += dx; y += dy
-        else:
-            R = 1.0/max(abs(k), 1e-6)
-            dtheta = L * k
-            theta_mid = theta + 0.5*dtheta
-            x += R * (math.sin(theta + dtheta) - math.sin(theta))
-            y -= R * (math.cos(theta + dtheta) - math.cos(theta))
-            theta += dtheta
-        pts.append((x,y))
-    return pts
+    glyphs = cma if isinstance(cma, GlyphTable) else cma.get("glyphs", [])
+    pts = integrate_se2_arrays(*glyph_columns(glyphs))
+    return pts if as_array else [tuple(p) for p in pts.tolist()]
@@ -1,26 +1,39 @@
 
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Union
 import json, math
-from .alphabet import Glyph, GlyphFamily
-from .geometry import kappa_tau_from_polyline
+import numpy as np
+from dataclasses import asdict
+from .alphabet import FAMILY_CODE, GlyphFamily, GlyphTable
+from .geometry import kappa_tau_array, curve_hash
 from .compression import wedge_contract
 
-def encode_curve(points: List[Tuple[float,float]], pi_mode: Dict[str, Any] = None) -> Dict[str, Any]:
+def encode_table(points: Union[List[Tuple[float,float]], np.ndarray]) -> GlyphTable:
+    """
+    Contracted glyphs of a polyline as a columnar ``GlyphTable``.
+    This is the glyph stream ``encode_curve`` stores; ``GlyphTable.to_json``
+    gives its list form.
+    """
+    kappas, taus = kappa_tau_array(points)
+    family = np.where(np.abs(kappas) < 0.5, FAMILY_CODE[GlyphFamily.CLOTHOID], FAMILY_CODE[GlyphFamily.ARC])
+    return wedge_contract(GlyphTable(family=family, params={"k": kappas, "L": np.ones_like(kappas)}))
+
+def encode_curve(points: Union[List[Tuple[float,float]], np.ndarray], pi_mode: Dict[str, Any] = None,
+                 with_hash: bool = False) -> Dict[str, Any]:
     """
     Encode a polyline into a CMA JSON dict.
     This is a minimal heuristic encoder: map curvature patterns to simple glyphs.
+    With ``with_hash`` the spec's optional ``hash`` field is filled from ``curve_hash``.
+    Use ``encode_table`` for the glyphs as a columnar ``GlyphTable``.
     """
     if pi_mode is None:
         pi_mode = {"type":"adaptive","alpha":0.1,"mu":0.02}
-    kappas, taus = kappa_tau_from_polyline(points)
-    glyphs: List[Glyph] = []
-    for k in kappas:
-        fam = GlyphFamily.CLOTHOID if abs(k) < 0.5 else GlyphFamily.ARC
-        glyphs.append(Glyph(family=fam, theta={"k": float(k), "L": 1.0}, bind=1.0))
-    glyphs = wedge_contract(glyphs)
-    return {
+    glyphs = encode_table(points).to_json()
+    cma = {
         "version":"0.3",
         "pi_mode": pi_mode,
-        "glyphs":[{"family":g.family.value, "theta":g.theta, "bind":g.bind} for g in glyphs],
+        "glyphs": glyphs,
         "meta":{"created_at": None}
     }
+    if with_hash:
+        cma["hash"] = asdict(curve_hash(cma))
+    return cma
@@ -1,7 +1,9 @@
 
 from dataclasses import dataclass
-from typing import List, Tuple
-import math
+from typing import Any, Dict, List, Tuple, Union
+import numpy as np
+from .alphabet import GlyphTable
+from .decoder import decode_curve
 
 @dataclass
 class CurveFrame:
@@ -15,22 +17,66 @@ class CurveHash:
     I_tau: float
     area: float
 
-def kappa_tau_from_polyline(points: List[Tuple[float, float]]):
-    """Compute discrete curvature (kappa) and approximate torsion (0 in 2D)."""
+def kappa_tau_array(points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Array form of ``kappa_tau_from_polyline`` for an (N,2) polyline.
+
+    Turning angles between consecutive segments are wrapped to (-pi, pi] and
+    divided by the incoming segment length, all in one pass; returns float64
+    arrays of length N-2 (``[0.0]`` for fewer than 3 points).
+    """
+    P = np.asarray(points, dtype=float)
+    if P.shape[0] < 3:
+        return np.zeros(1), np.zeros(1)
+    assert P.ndim == 2 and P.shape[1] == 2, "points must be (N,2)"
+    V = np.diff(P, axis=0)
+    a = np.arctan2(V[:, 1], V[:, 0])
+    d = a[1:] - a[:-1]
+    da = np.arctan2(np.sin(d), np.cos(d))
+    ds = np.hypot(V[:-1, 0], V[:-1, 1])
+    return da / np.maximum(ds, 1e-12), np.zeros_like(da)
+
+def kappa_tau_from_polyline(points: Union[List[Tuple[float, float]], np.ndarray]):
+    """Compute discrete curvature (kappa) and approximate torsion (0 in 2D).
+
+    ndarray input returns ndarrays (see ``kappa_tau_array``); lists of points
+    return lists of floats.
+    """
+    if isinstance(points, np.ndarray):
+        return kappa_tau_array(points)
     if len(points) < 3:
         return [0.0], [0.0]
-    kappas = []
-    taus = []
-    for i in range(1, len(points)-1):
-        x0,y0 = points[i-1]
-        x1,y1 = points[i]
-        x2,y2 = points[i+1]
-        v1 = (x1-x0, y1-y0)
-        v2 = (x2-x1, y2-y1)
-        a1 = math.atan2(v1[1], v1[0])
-        a2 = math.atan2(v2[1], v2[0])
-        da = math.atan2(math.sin(a2-a1), math.cos(a2-a1))
-        ds = math.hypot(*v1)
-        kappas.append(da/max(ds, 1e-12))
-        taus.append(0.0)
-    return kappas, taus
+    kappas, taus = kappa_tau_array(points)
+    return kappas.tolist(), taus.tolist()
+
+def polygon_area(points: List[Tuple[float, float]]) -> float:
+    """Signed shoelace area of the polyline closed by its end-to-start chord."""
+    if len(points) < 3:
+        return 0.0
+    x0, y0 = points[0]
+    acc = 0.0
+    for (x1, y1), (x2, y2) in zip(points[1:-1], points[2:]):
+        acc += (x1 - x0)*(y2 - y0) - (x2 - x0)*(y1 - y0)
+    return 0.5*acc
+
+def curve_hash(cma: Dict[str, Any]) -> CurveHash:
+    """Rigid-motion-invariant hash of a 2D CMA dict (``encode_curve`` output, list or table glyphs).
+
+    I_kappa / I_tau are the integrals of k and tau over glyph length; area is
+    the signed area enclosed by the decoded curve. Decoding always starts from
+    the same canonical frame, so all three are invariant under rigid motions of
+    the original points.
+    """
+    glyphs = cma.get("glyphs", [])
+    if isinstance(glyphs, GlyphTable):
+        L = glyphs.column("L", 1.0)
+        I_kappa = float(np.dot(glyphs.column("k", 0.0), L))
+        I_tau = float(np.dot(glyphs.column("tau", 0.0), L))
+        return CurveHash(I_kappa=I_kappa, I_tau=I_tau, area=polygon_area(decode_curve(glyphs)))
+    I_kappa = 0.0
+    I_tau = 0.0
+    for g in glyphs:
+        th = g["theta"]
+        L = float(th.get("L", 1.0))
+        I_kappa += float(th.get("k", 0.0)) * L
+        I_tau += float(th.get("tau", 0.0)) * L
+    return CurveHash(I_kappa=I_kappa, I_tau=I_tau, area=polygon_area(decode_curve(cma)))
@@ -0,0 +1,185 @@
+"""Exact and near-duplicate lookup over ``CurveHash`` values.
+
+``CurveHashIndex`` quantizes each (I_kappa, I_tau, area) triple onto a grid
+whose cell size is the near-duplicate tolerance and keeps the integer keys
+sorted lexicographically. A query binary-searches the cells its tolerance
+spans and then checks the actual values, so lookups cost O(log n) plus the
+candidates found, independent of archive size.
+
+The tolerance is ``tol + rtol*|h|`` per component, as in ``np.isclose``. With
+``rtol > 0`` the grid is uniform in ``asinh(rtol*h/tol) / rtol``: cells are
+``tol`` wide near zero and ``rtol*|h|`` wide for large values. The defaults
+come from the rigid-motion noise of ``memory_hash``, about 1e-5 relative
+for float32 memories (float64 ones agree to ~1e-9), with a 10x margin.
+
+The index can be saved as a directory of ``.npy`` files and reopened with
+``mmap=True``; queries then touch only the pages the binary searches visit.
+"""
+from __future__ import annotations
+from dataclasses import astuple
+from typing import Any, Iterable, List, Optional, Sequence, Union
+import json
+import os
+import numpy as np
+
+from .geometry import CurveHash
+
+HashLike = Union[CurveHash, Sequence[float], np.ndarray]
+
+HASH_NOISE = 1e-5           # relative rigid-motion noise of memory_hash (float32 memories)
+DEFAULT_RTOL = 10 * HASH_NOISE
+DEFAULT_TOL = 1e-6          # absolute floor for components near zero (e.g. I_tau of planar curves)
+
+def _as_values(hashes: Any) -> np.ndarray:
+    if isinstance(hashes, CurveHash):
+        vals = np.array([astuple(hashes)], dtype=float)
+    elif isinstance(hashes, np.ndarray):
+        vals = np.asarray(hashes, dtype=float).reshape(-1, 3)
+    else:
+        hashes = list(hashes)
+        if hashes and isinstance(hashes[0], CurveHash):
+            vals = np.array([astuple(h) for h in hashes], dtype=float)
+        else:
+            vals = np.asarray(hashes, dtype=float).reshape(-1, 3)
+    if not np.all(np.isfinite(vals)):
+        raise ValueError("curve hashes must be finite")
+    return vals
+
+class CurveHashIndex:
+    """Sorted quantized-key index of curve hashes.
+
+    ``query`` matches components within ``tol + rtol*|h|`` (``tol`` and
+    ``rtol`` are scalars or 3 values); that tolerance is also the grid cell
+    size. ``rtol=0`` gives a purely absolute, uniform grid. Ids default to
+    insertion order. Additions are buffered and merged into the sorted arrays
+    on the next query.
+    """
+
+    def __init__(self, tol: Union[float, Sequence[float]] = DEFAULT_TOL,
+                 rtol: Union[float, Sequence[float]] = DEFAULT_RTOL):
+        self.tol = np.broadcast_to(np.asarray(tol, dtype=float), (3,)).copy()
+        self.rtol = np.broadcast_to(np.asarray(rtol, dtype=float), (3,)).copy()
+        if np.any(self.tol <= 0):
+            raise ValueError("tol must be positive")
+        if np.any(self.rtol < 0):
+            raise ValueError("rtol must be non-negative")
+        self._vals = np.zeros((0, 3))
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._keys = [np.zeros(0, dtype=np.int64) for _ in range(3)]
+        self._pending: List[np.ndarray] = []
+        self._pending_ids: List[np.ndarray] = []
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return self._ids.shape[0] + sum(p.shape[0] for p in self._pending)
+
+    def _scale(self, vals: np.ndarray) -> np.ndarray:
+        """Monotone map under which a tolerance cell has unit width."""
+        rel = self.rtol > 0
+        r = np.where(rel, self.rtol, 1.0)
+        return np.where(rel, np.arcsinh(vals * (r / self.tol)) / r, vals / self.tol)
+
+    def _quantize(self, vals: np.ndarray) -> np.ndarray:
+        return np.floor(self._scale(vals)).astype(np.int64)
+
+    def add(self, hashes: Any, ids: Optional[Iterable[int]] = None) -> np.ndarray:
+        """Add one ``CurveHash``, a list of them, or an (n,3) array. Returns the ids."""
+        vals = _as_values(hashes)
+        if ids is None:
+            ids = np.arange(self._next_id, self._next_id + vals.shape[0], dtype=np.int64)
+        else:
+            ids = np.asarray(list(ids) if not isinstance(ids, np.ndarray) else ids, dtype=np.int64)
+            assert ids.shape == (vals.shape[0],), "one id per hash"
+        if ids.size:
+            self._next_id = max(self._next_id, int(ids.max()) + 1)
+        self._pending.append(vals)
+        self._pending_ids.append(ids)
+        return ids
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        vals = np.concatenate([np.asarray(self._vals)] + self._pending)
+        ids = np.concatenate([np.asarray(self._ids)] + self._pending_ids)
+        keys = self._quantize(vals)
+        order = np.lexsort((keys[:, 2], keys[:, 1], keys[:, 0]))
+        self._vals = vals[order]
+        self._ids = ids[order]
+        self._keys = [np.ascontiguousarray(keys[order, c]) for c in range(3)]
+        self._pending = []
+        self._pending_ids = []
+
+    def _span(self, col: int, lo: int, hi: int, a: int, b: int):
+        c = self._keys[col][lo:hi]
+        return lo + int(np.searchsorted(c, a, 'left')), lo + int(np.searchsorted(c, b, 'right'))
+
+    def _candidates(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """Rows whose keys lie in the box ``lo <= key <= hi``."""
+        n = self._ids.shape[0]
+        rows = []
+        for a in range(lo[0], hi[0] + 1):
+            lo0, hi0 = self._span(0, 0, n, a, a)
+            if lo0 == hi0:
+                continue
+            for b in range(lo[1], hi[1] + 1):
+                lo1, hi1 = self._span(1, lo0, hi0, b, b)
+                if lo1 == hi1:
+                    continue
+                lo2, hi2 = self._span(2, lo1, hi1, lo[2], hi[2])
+                if lo2 < hi2:
+                    rows.append(np.arange(lo2, hi2))
+        return np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+
+    def lookup(self, h: HashLike) -> np.ndarray:
+        """Ids whose hash equals ``h`` exactly."""
+        self._flush()
+        v = _as_values(h)[0]
+        key = self._quantize(v)
+        rows = self._candidates(key, key)
+        rows = rows[np.all(np.asarray(self._vals[rows]) == v, axis=1)]
+        return np.asarray(self._ids[rows])
+
+    def query(self, h: HashLike, tol: Union[None, float, Sequence[float]] = None,
+              rtol: Union[None, float, Sequence[float]] = None) -> np.ndarray:
+        """Ids whose hash is within ``tol + rtol*|h|`` of ``h`` per component.
+
+        ``tol`` and ``rtol`` default to the index tolerances; larger values
+        search more cells.
+        """
+        self._flush()
+        v = _as_values(h)[0]
+        tol = self.tol if tol is None else np.broadcast_to(np.asarray(tol, dtype=float), (3,))
+        rtol = self.rtol if rtol is None else np.broadcast_to(np.asarray(rtol, dtype=float), (3,))
+        t = tol + rtol * np.abs(v)
+        rows = self._candidates(self._quantize(v - t), self._quantize(v + t))
+        rows = rows[np.all(np.abs(np.asarray(self._vals[rows]) - v) <= t, axis=1)]
+        return np.asarray(self._ids[rows])
+
+    # -- persistence -----------------------------------------------------------
+    def save(self, path: str) -> None:
+        """Write the index to directory ``path`` (created if missing)."""
+        self._flush()
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'values.npy'), np.asarray(self._vals))
+        np.save(os.path.join(path, 'ids.npy'), np.asarray(self._ids))
+        for c in range(3):
+            np.save(os.path.join(path, f'key{c}.npy'), np.asarray(self._keys[c]))
+        with open(os.path.join(path, 'index.json'), 'w') as f:
+            json.dump({'version': 2, 'tol': self.tol.tolist(), 'rtol': self.rtol.tolist(),
+                       'next_id': self._next_id}, f)
+
+    @classmethod
+    def load(cls, path: str, *, mmap: bool = True) -> 'CurveHashIndex':
+        """Open an index saved with ``save``; ``mmap=True`` leaves the arrays on disk."""
+        with open(os.path.join(path, 'index.json')) as f:
+            meta = json.load(f)
+        # version 1 indexes were built on the absolute grid
+        idx = cls(tol=meta['tol'], rtol=meta.get('rtol', 0.0))
+        mode = 'r' if mmap else None
+        idx._vals = np.load(os.path.join(path, 'values.npy'), mmap_mode=mode)
+        idx._ids = np.load(os.path.join(path, 'ids.npy'), mmap_mode=mode)
+        idx._keys = [np.load(os.path.join(path, f'key{c}.npy'), mmap_mode=mode) for c in range(3)]
+        idx._next_id = meta['next_id']
+        return idx
+
+__all__ = ['CurveHashIndex']
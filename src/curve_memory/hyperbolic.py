@@ -106,6 +106,163 @@ def geodesic_distance(p1: tuple[float, float, float], p2: tuple[float, float, fl
     cosh_val = max(cosh_val, 1.0)
     return kappa * math.acosh(cosh_val)
 
+# -- array kernels --------------------------------------------------------------
+# Broadcasting versions of the scalar helpers above. Each regime evaluates the
+# same expression in the same order as the scalar code. pi_a_over_pi and its
+# callers use np.sinh in both forms and match bit for bit; geodesic_distance
+# uses libm (math.cosh/sinh/acosh), which NumPy's vectorized loops only match
+# to a few ulp.
+
+def pi_a_over_pi_array(r, kappa, eps: float = 1e-10) -> np.ndarray:
+    r = np.asarray(r, dtype=float); kappa = np.asarray(kappa, dtype=float)
+    with np.errstate(all='ignore'):
+        x = r / kappa
+        ax = np.abs(x)
+        x2 = x * x
+        sinh_x = np.where(ax < 1e-2, x * (1 + x2 * (1/6 + x2 / 120)), np.sinh(x))
+        ratio = (kappa * sinh_x) / r
+        fallback = ((np.abs(r) < eps) | (np.abs(kappa) < eps) | (ax > 700)
+                    | ~np.isfinite(ratio) | ~(ratio > 0.0))
+    return np.where(fallback, 1.0, ratio)
+
+def full_turn_deg_array(r, kappa) -> np.ndarray:
+    return 360.0 * pi_a_over_pi_array(r, kappa)
+
+def rotate_cmd_array(delta_deg_a, r, kappa) -> np.ndarray:
+    frac = np.asarray(delta_deg_a, dtype=float) / full_turn_deg_array(r, kappa)
+    return frac * 2 * math.pi
+
+def geodesic_distance_array(p1, p2, kappa) -> np.ndarray:
+    """``geodesic_distance`` over (..., 3) point arrays, broadcasting ``p1``, ``p2`` and ``kappa``.
+
+    Where the scalar version raises OverflowError (``r / kappa`` beyond ~710)
+    this returns inf or nan instead.
+    """
+    p1 = np.asarray(p1, dtype=float); p2 = np.asarray(p2, dtype=float)
+    kappa = np.asarray(kappa, dtype=float)
+    x1, y1, z1 = p1[..., 0], p1[..., 1], p1[..., 2]
+    x2, y2, z2 = p2[..., 0], p2[..., 1], p2[..., 2]
+    r1 = np.sqrt(x1 ** 2 + y1 ** 2 + z1 ** 2)
+    r2 = np.sqrt(x2 ** 2 + y2 ** 2 + z2 ** 2)
+    with np.errstate(all='ignore'):
+        dot = x1*x2 + y1*y2 + z1*z2
+        cos_theta = np.maximum(np.minimum(dot / (r1 * r2), 1.0), -1.0)
+        a = r1 / kappa; b = r2 / kappa
+        cosh_val = (np.cosh(a) * np.cosh(b) - np.sinh(a) * np.sinh(b) * cos_theta)
+        cosh_val = np.maximum(cosh_val, 1.0)
+        d = kappa * np.arccosh(cosh_val)
+    return np.where(r1 == 0, r2, np.where(r2 == 0, r1, d))
+
+# -- pairwise distances ---------------------------------------------------------
+
+_CDIST_MAX_BYTES = 64 << 20
+_BLOCK_TEMPS = 4  # float64 temporaries alive per block element
+
+def _geodesic_terms(P: np.ndarray, kappa: float):
+    P = np.asarray(P, dtype=float)
+    assert P.ndim == 2 and P.shape[1] == 3, "points must be (N,3)"
+    r = np.sqrt(np.einsum('ij,ij->i', P, P))
+    with np.errstate(all='ignore'):
+        U = np.where(r[:, None] > 0, P / r[:, None], 0.0)
+    return r, U, np.cosh(r / kappa), np.sinh(r / kappa)
+
+def _geodesic_cosh(ta, tb) -> np.ndarray:
+    """cosh(d / kappa) for every pair of a block, clamped to >= 1."""
+    _, Ua, ca, sa = ta
+    _, Ub, cb, sb = tb
+    cos_theta = np.clip(Ua @ Ub.T, -1.0, 1.0)
+    with np.errstate(all='ignore'):
+        return np.maximum(np.outer(ca, cb) - np.outer(sa, sb) * cos_theta, 1.0)
+
+def _geodesic_finish(cosh_val: np.ndarray, ra: np.ndarray, rb: np.ndarray, kappa: float) -> np.ndarray:
+    with np.errstate(all='ignore'):
+        d = kappa * np.arccosh(cosh_val)
+    d = np.where(ra == 0, rb, d)
+    return np.where(rb == 0, ra, d)
+
+def _geodesic_block(ta, tb, kappa: float) -> np.ndarray:
+    return _geodesic_finish(_geodesic_cosh(ta, tb), ta[0][:, None], tb[0][None, :], kappa)
+
+def _block_sizes(n: int, m: int, max_bytes: int):
+    cells = max(1, max_bytes // (8 * _BLOCK_TEMPS))
+    cols = max(1, min(m, cells))
+    rows = max(1, min(n, cells // cols))
+    return rows, cols
+
+def _take(terms, sl):
+    return tuple(t[sl] for t in terms)
+
+def geodesic_cdist(A, B=None, kappa: float = 1.0, *, max_bytes: int = _CDIST_MAX_BYTES,
+                   out: np.ndarray = None) -> np.ndarray:
+    """All-pairs ``geodesic_distance`` between rows of ``A`` (N,3) and ``B`` (M,3).
+
+    ``B=None`` means ``B = A``. The matrix is filled in row/column blocks whose
+    temporaries stay under ``max_bytes``; pass ``out`` (e.g. an ``np.memmap``)
+    to keep the result itself out of RAM. Directions are compared through unit
+    vectors and a matrix product, so values agree with ``geodesic_distance`` to
+    rounding error rather than bit for bit.
+    """
+    ta = _geodesic_terms(A, kappa)
+    tb = ta if B is None else _geodesic_terms(B, kappa)
+    n, m = ta[0].shape[0], tb[0].shape[0]
+    if out is None:
+        out = np.empty((n, m))
+    assert out.shape == (n, m), "out must be (N,M)"
+    rows, cols = _block_sizes(n, m, max_bytes)
+    for i in range(0, n, rows):
+        bi = _take(ta, slice(i, i + rows))
+        for j in range(0, m, cols):
+            out[i:i + rows, j:j + cols] = _geodesic_block(bi, _take(tb, slice(j, j + cols)), kappa)
+    return out
+
+def geodesic_knn(A, B=None, kappa: float = 1.0, k: int = 1, *, max_bytes: int = _CDIST_MAX_BYTES,
+                 exclude_self: bool = None):
+    """The ``k`` nearest rows of ``B`` for every row of ``A`` by geodesic distance.
+
+    Returns ``(indices, distances)``, both (N,k), sorted by distance. Blocks are
+    reduced to a running top-k as they are produced, so the full matrix never
+    exists. With ``B=None`` the query set is ``A`` itself and each point's own
+    index is skipped (set ``exclude_self=False`` to keep it).
+    """
+    ta = _geodesic_terms(A, kappa)
+    tb = ta if B is None else _geodesic_terms(B, kappa)
+    if exclude_self is None:
+        exclude_self = B is None
+    n, m = ta[0].shape[0], tb[0].shape[0]
+    k = min(k, m - 1 if exclude_self else m)
+    if k <= 0:
+        return np.zeros((n, 0), dtype=np.int64), np.zeros((n, 0))
+    rows, cols = _block_sizes(n, m, max_bytes)
+    cols = max(cols, k)
+    rows = max(1, min(n, max_bytes // (8 * _BLOCK_TEMPS * (cols + k))))
+    # for kappa > 0, d = kappa * acosh(c) increases with c = cosh(d / kappa)
+    # (including the r == 0 special cases), so rank on c and only take acosh of
+    # the winners; otherwise rank on the distances themselves
+    fast = kappa > 0
+    idx = np.empty((n, k), dtype=np.int64)
+    dist = np.empty((n, k))
+    for i in range(0, n, rows):
+        bi = _take(ta, slice(i, i + rows))
+        nb = bi[0].shape[0]
+        best_c = np.full((nb, k), np.inf)
+        best_i = np.full((nb, k), -1, dtype=np.int64)
+        for j in range(0, m, cols):
+            bj = _take(tb, slice(j, j + cols))
+            c = _geodesic_cosh(bi, bj) if fast else _geodesic_block(bi, bj, kappa)
+            if exclude_self:
+                lo, hi = max(i, j), min(i + nb, j + c.shape[1])
+                if lo < hi:
+                    c[np.arange(lo - i, hi - i), np.arange(lo - j, hi - j)] = np.inf
+            c = np.concatenate([best_c, c], axis=1)
+            sel = np.argpartition(c, k - 1, axis=1)[:, :k]
+            best_c = np.take_along_axis(c, sel, axis=1)
+            best_i = np.where(sel < k, np.take_along_axis(best_i, np.minimum(sel, k - 1), axis=1), sel - k + j)
+        d = _geodesic_finish(best_c, bi[0][:, None], tb[0][best_i], kappa) if fast else best_c
+        order = np.argsort(d, axis=1, kind='stable')
+        dist[i:i + nb] = np.take_along_axis(d, order, axis=1)
+        idx[i:i + nb] = np.take_along_axis(best_i, order, axis=1)
+    return idx, dist
+
 def move_towards(p: tuple[float,float,float], target: tuple[float,float,float], kappa: float, step: float) -> tuple[float,float,float]:
     dist = geodesic_distance(p, target, kappa)
     if dist == 0 or step <= 0: return p
@@ -120,5 +277,7 @@ class HyperbolicConstraint:
 
 __all__ = [
     'full_turn_deg','rotate_cmd','pi_a_over_pi','pi_a_over_pi_high_precision','validate_hyperbolic_params',
-    'adaptive_pi_metrics','geodesic_distance','move_towards','HyperbolicConstraint'
+    'adaptive_pi_metrics','geodesic_distance','move_towards','HyperbolicConstraint',
+    'pi_a_over_pi_array','full_turn_deg_array','rotate_cmd_array','geodesic_distance_array',
+    'geodesic_cdist','geodesic_knn'
 ]
@@ -1,24 +1,40 @@
 """
 Path integration for CMA glyphs in SE(2) / SE(3).
 """
-from typing import List, Tuple
-import math
+from typing import Any, Iterable, List, Tuple, Union
+import numpy as np
+from .alphabet import GlyphTable
 
-def integrate_se2(glyphs) -> List[Tuple[float,float]]:
-    """Very rough SE(2) integration of glyph sequence into a polyline."""
-    pts = [(0.0,0.0)]
-    x,y,theta = 0.0,0.0,0.0
-    for g in glyphs:
-        th = g.theta
-        k = float(th.get("k",0.0))
-        L = float(th.get("L",1.0))
-        if abs(k)<1e-6:
-            x += L*math.cos(theta); y += L*math.sin(theta)
-        else:
-            R = 1.0/max(abs(k),1e-6)
-            dtheta = L*k
-            x += R*(math.sin(theta+dtheta)-math.sin(theta))
-            y -= R*(math.cos(theta+dtheta)-math.cos(theta))
-            theta += dtheta
-        pts.append((x,y))
+K_STRAIGHT = 1e-6  # |k| below this integrates as a straight segment
+
+def glyph_columns(glyphs: Union[GlyphTable, Iterable[Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(k, L) arrays from a ``GlyphTable``, glyph objects (``.theta``) or JSON glyph dicts."""
+    if isinstance(glyphs, GlyphTable):
+        return glyphs.column("k", 0.0), glyphs.column("L", 1.0)
+    thetas = [g["theta"] if isinstance(g, dict) else g.theta for g in glyphs]
+    k = np.array([float(th.get("k", 0.0)) for th in thetas])
+    L = np.array([float(th.get("L", 1.0)) for th in thetas])
+    return k, L
+
+def integrate_se2_arrays(k: np.ndarray, L: np.ndarray) -> np.ndarray:
+    """Integrate arc/line glyphs (curvature ``k``, length ``L``) from the origin, heading 0.
+
+    Headings are the exclusive cumulative sum of k*L; each glyph moves by its
+    closed-form chord L*sinc(dtheta/2) along the mid-heading, which is the arc
+    displacement (straight when |k| < K_STRAIGHT). Returns (N+1, 2) points.
+    """
+    k = np.asarray(k, dtype=float)
+    L = np.asarray(L, dtype=float)
+    dtheta = np.where(np.abs(k) < K_STRAIGHT, 0.0, k * L)
+    theta = np.concatenate([[0.0], np.cumsum(dtheta)])
+    mid = theta[:-1] + 0.5*dtheta
+    chord = L * np.sinc(dtheta / (2*np.pi))
+    pts = np.zeros((k.shape[0] + 1, 2))
+    np.cumsum(chord * np.cos(mid), out=pts[1:, 0])
+    np.cumsum(chord * np.sin(mid), out=pts[1:, 1])
     return pts
+
+def integrate_se2(glyphs) -> List[Tuple[float,float]]:
+    """SE(2) integration of a glyph sequence (or ``GlyphTable``) into a polyline."""
+    k, L = glyph_columns(glyphs)
+    return [tuple(p) for p in integrate_se2_arrays(k, L).tolist()]
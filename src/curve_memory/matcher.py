@@ -0,0 +1,296 @@
+"""Similarity search over CMA-3D memories in (kappa, tau) space.
+
+Memories are rigid-motion invariant, so comparing their kappa/tau signals
+finds curves of the same shape wherever they sit. Each memory is resampled
+to ``n`` midpoints ``u_i = (i + 0.5) / n`` of [0, 1]; the distance between two
+signals ``a`` and ``b`` is the RMS difference over the grid,
+``sqrt(mean_i |a_i - b_i|^2)`` with both channels summed, which approximates
+the L2 distance on [0, 1].
+
+``xcorr_distance`` minimizes that over circular shifts of ``b`` (all ``n`` at
+once with one FFT cross-correlation) and, with ``reverse=True``, over the
+reversed direction too (kappa and tau do not change sign when a curve is
+traversed backwards, so reversal is a flip of u). ``dtw_distance`` instead
+aligns the signals with banded dynamic time warping (Sakoe-Chiba band of
+``band * n`` samples), which tolerates local speed changes but not a global
+shift.
+
+``MemoryMatcher`` holds an archive of resampled signals and answers top-k
+queries in blocks. For the correlation distance, shifts and reversal keep the
+per-channel norms, so ``|‖a‖ - ‖b‖|`` in L1 and L2 bounds the distance from
+below; candidates are visited in order of that bound and the search stops
+once it exceeds the current k-th distance. The norms are those of
+``pack['global']`` (mean |kappa|, RMS kappa, ...) but measured on the
+resampled grid: the pack's trapezoid integrals of the stored samples can
+differ from the grid values by far more than the gaps being compared when a
+memory has few knots, which would make the bound unsafe. DTW can repeat
+samples, so it uses the LB_Keogh envelope bound on the grid instead. Either
+way the pruned top-k equals the exhaustive one.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Mapping, Optional, Tuple
+import numpy as np
+
+from .profiling import stage
+
+_BLOCK = 256      # archive rows scored per FFT batch
+_DTW_BLOCK = 32   # archive rows per DTW batch (memory is block * n^2)
+_NORMS = ('kappa_L1', 'tau_L1', 'kappa_L2', 'tau_L2')
+
+@dataclass
+class Match:
+    id: int
+    distance: float
+    shift: float    # the match at u + shift lines up with the query at u, in (-0.5, 0.5]
+    reversed: bool  # the match is closest when traversed backwards
+
+def resample_memory(mem: Mapping[str, Any], n: int = 256) -> np.ndarray:
+    """(2, n) kappa/tau of ``mem`` at the grid midpoints ``(i + 0.5) / n``."""
+    if n < 2:
+        raise ValueError("n must be at least 2")
+    u = np.asarray(mem['u'], dtype=float)
+    out = np.zeros((2, n))
+    if u.shape[0] == 0:
+        return out
+    grid = (np.arange(n) + 0.5) / n
+    with stage('matcher.resample'):
+        out[0] = np.interp(grid, u, np.asarray(mem['kappa'], dtype=float))
+        out[1] = np.interp(grid, u, np.asarray(mem['tau'], dtype=float))
+    return out
+
+def _grid_norms(sig: np.ndarray) -> np.ndarray:
+    """Per-channel grid L1 (mean abs) and L2 (RMS) norms of (..., 2, n) signals, in ``_NORMS`` order."""
+    return np.concatenate([np.abs(sig).mean(axis=-1), np.sqrt((sig * sig).mean(axis=-1))], axis=-1)
+
+def _norm_bound(q: np.ndarray, norms: np.ndarray) -> np.ndarray:
+    """Lower bound on the shift/reversal distance from per-channel L1/L2 norms.
+
+    ``q`` is (4,), ``norms`` is (m, 4) in ``_NORMS`` order.
+    """
+    d = np.abs(norms - q)
+    lb = np.maximum(d[:, :2], d[:, 2:])
+    return np.sqrt(np.einsum('ij,ij->i', lb, lb))
+
+def _allowed_lags(n: int, max_shift: Optional[float]) -> np.ndarray:
+    if max_shift is None:
+        return np.arange(n)
+    if not 0.0 <= max_shift <= 0.5:
+        raise ValueError("max_shift must be in [0, 0.5]")
+    m = int(round(max_shift * n))
+    return np.unique(np.concatenate([np.arange(m + 1), (n - np.arange(1, m + 1)) % n]))
+
+def _xcorr_block(qspec: np.ndarray, qsq: float, spec: np.ndarray, sq: np.ndarray,
+                 n: int, lags: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Best squared RMS distance and lag of one query spectrum against (m, 2, h) spectra."""
+    corr = np.fft.irfft(np.einsum('ch,mch->mh', qspec, spec), n, axis=1)[:, lags]
+    best = np.argmax(corr, axis=1)
+    d2 = (qsq + sq - 2.0 * corr[np.arange(corr.shape[0]), best]) / n
+    return np.maximum(d2, 0.0), lags[best]
+
+def _shift_fraction(lag: int, n: int) -> float:
+    s = lag / n
+    return s - 1.0 if s > 0.5 else s
+
+def xcorr_distance(a: Mapping[str, Any], b: Mapping[str, Any], *, n: int = 256,
+                   reverse: bool = True, max_shift: Optional[float] = None) -> Match:
+    """Smallest RMS kappa/tau distance between ``a`` and circular shifts of ``b``.
+
+    ``max_shift`` limits the shift to that fraction of u (None: any shift,
+    0: aligned only). The result's ``id`` is 0.
+    """
+    ra, rb = resample_memory(a, n), resample_memory(b, n)
+    lags = _allowed_lags(n, max_shift)
+    spec = np.fft.rfft(rb, axis=1)[None]
+    sq = np.einsum('ij,ij->', rb, rb)
+    best = Match(0, np.inf, 0.0, False)
+    for rev in ((False, True) if reverse else (False,)):
+        q = ra[:, ::-1] if rev else ra
+        d2, lag = _xcorr_block(np.conj(np.fft.rfft(q, axis=1)), float(np.einsum('ij,ij->', q, q)),
+                               spec, sq, n, lags)
+        if d2[0] < best.distance ** 2:
+            best = Match(0, float(np.sqrt(d2[0])), _shift_fraction(int(lag[0]), n), rev)
+    return best
+
+def _dtw_block(q: np.ndarray, cands: np.ndarray, w: int) -> np.ndarray:
+    """Banded DTW of (2, n) ``q`` against (m, 2, n) ``cands``: RMS over n steps.
+
+    Cells are filled one anti-diagonal at a time, vectorized over the cells of
+    the diagonal and over candidates.
+    """
+    m, _, n = cands.shape
+    cost = np.einsum('mcij->mij', (q[None, :, :, None] - cands[:, :, None, :]) ** 2)
+    D = np.full((m, n + 1, n + 1), np.inf)
+    D[:, 0, 0] = 0.0
+    for d in range(2 * n - 1):
+        i = np.arange(max(0, d - n + 1, (d - w + 1) // 2), min(n - 1, d, (d + w) // 2) + 1)
+        j = d - i
+        D[:, i + 1, j + 1] = cost[:, i, j] + np.minimum(np.minimum(D[:, i, j + 1], D[:, i + 1, j]), D[:, i, j])
+    return np.sqrt(D[:, n, n] / n)
+
+def _envelope(q: np.ndarray, w: int) -> Tuple[np.ndarray, np.ndarray]:
+    win = np.lib.stride_tricks.sliding_window_view(np.pad(q, ((0, 0), (w, w)), mode='edge'), 2 * w + 1, axis=1)
+    return win.min(axis=2), win.max(axis=2)
+
+def _keogh_bound(lo: np.ndarray, hi: np.ndarray, cands: np.ndarray) -> np.ndarray:
+    """LB_Keogh of (m, 2, n) ``cands`` against a query envelope, in RMS units."""
+    dev = np.maximum(cands - hi, 0.0) + np.maximum(lo - cands, 0.0)
+    return np.sqrt(np.einsum('mcn,mcn->m', dev, dev) / cands.shape[2])
+
+def _band(n: int, band: float) -> int:
+    if not 0.0 <= band <= 1.0:
+        raise ValueError("band must be in [0, 1]")
+    return int(round(band * n))
+
+def dtw_distance(a: Mapping[str, Any], b: Mapping[str, Any], *, n: int = 128,
+                 band: float = 0.1, reverse: bool = True) -> Match:
+    """Banded DTW distance between the kappa/tau signals of ``a`` and ``b``.
+
+    Warping paths stay within ``band * n`` samples of the diagonal. The
+    result's ``id`` is 0 and ``shift`` is 0.
+    """
+    ra, rb = resample_memory(a, n), resample_memory(b, n)
+    w = _band(n, band)
+    best = Match(0, np.inf, 0.0, False)
+    with stage('matcher.dtw'):
+        for rev in ((False, True) if reverse else (False,)):
+            d = float(_dtw_block(ra[:, ::-1] if rev else ra, rb[None], w)[0])
+            if d < best.distance:
+                best = Match(0, d, 0.0, rev)
+    return best
+
+def _iter_memories(mems: Any) -> Iterable[Mapping[str, Any]]:
+    """Memories from a mapping, a list, or a ``curve_memory_3d_batch`` dict."""
+    if isinstance(mems, Mapping) and 'offsets' in mems:
+        off = np.asarray(mems['offsets'])
+        for i, (a, b) in enumerate(zip(off[:-1], off[1:])):
+            yield {'L': float(mems['L'][i]), 'u': mems['u'][a:b],
+                   'kappa': mems['kappa'][a:b], 'tau': mems['tau'][a:b]}
+    elif isinstance(mems, Mapping):
+        yield mems
+    else:
+        yield from mems
+
+class MemoryMatcher:
+    """Top-k search over an archive of memories by kappa/tau shape.
+
+    ``n`` is the common resampling grid, ``reverse`` also matches reversed
+    curves and ``max_shift`` limits circular shifts as in ``xcorr_distance``.
+    Ids default to insertion order. Additions are buffered and merged on the
+    next query; ``scored`` counts the candidates fully scored by the last one.
+    """
+
+    def __init__(self, n: int = 256, *, reverse: bool = True, max_shift: Optional[float] = None):
+        if n < 2:
+            raise ValueError("n must be at least 2")
+        self.n = n
+        self.reverse = reverse
+        self.lags = _allowed_lags(n, max_shift)
+        self._signals = np.zeros((0, 2, n))
+        self._spec = np.zeros((0, 2, n // 2 + 1), dtype=complex)
+        self._sq = np.zeros(0)
+        self._norms = np.zeros((0, 4))
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._pending: List[Tuple[np.ndarray, int]] = []
+        self._next_id = 0
+        self.scored = 0
+
+    def __len__(self) -> int:
+        return self._ids.shape[0] + len(self._pending)
+
+    def add(self, mems: Any, ids: Optional[Iterable[int]] = None) -> np.ndarray:
+        """Add one memory, a list of them, or a ``curve_memory_3d_batch`` dict. Returns the ids."""
+        items = list(_iter_memories(mems))
+        if ids is None:
+            ids = np.arange(self._next_id, self._next_id + len(items), dtype=np.int64)
+        else:
+            ids = np.asarray(list(ids) if not isinstance(ids, np.ndarray) else ids, dtype=np.int64)
+            assert ids.shape == (len(items),), "one id per memory"
+        if ids.size:
+            self._next_id = max(self._next_id, int(ids.max()) + 1)
+        for mem, i in zip(items, ids):
+            self._pending.append((resample_memory(mem, self.n), int(i)))
+        return ids
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        sig = np.stack([p[0] for p in self._pending])
+        self._signals = np.concatenate([self._signals, sig])
+        self._spec = np.concatenate([self._spec, np.fft.rfft(sig, axis=2)])
+        self._sq = np.concatenate([self._sq, np.einsum('mcn,mcn->m', sig, sig)])
+        self._norms = np.concatenate([self._norms, _grid_norms(sig)])
+        self._ids = np.concatenate([self._ids, np.array([p[1] for p in self._pending], dtype=np.int64)])
+        self._pending = []
+
+    def query(self, mem: Mapping[str, Any], k: int = 10, *, method: str = 'xcorr',
+              band: float = 0.1, prune: bool = True) -> List[Match]:
+        """The ``k`` archive entries closest to ``mem``, nearest first.
+
+        ``method`` is ``'xcorr'`` (shifts and reversal, see ``xcorr_distance``)
+        or ``'dtw'`` (banded warping with ``band``, see ``dtw_distance``).
+        ``prune=False`` scores every entry instead of stopping at the lower
+        bound.
+        """
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        if method not in ('xcorr', 'dtw'):
+            raise ValueError(f"unknown method: {method!r}")
+        self._flush()
+        q = resample_memory(mem, self.n)
+        queries = [(q, False), (q[:, ::-1], True)] if self.reverse else [(q, False)]
+        if method == 'xcorr':
+            lb = _norm_bound(_grid_norms(q), self._norms)
+            score, block = self._xcorr_scorer(queries), _BLOCK
+        else:
+            w = _band(self.n, band)
+            envs = [_envelope(qq, w) for qq, _ in queries]
+            lb = np.min([_keogh_bound(lo, hi, self._signals) for lo, hi in envs], axis=0)
+            score, block = self._dtw_scorer(queries, w), _DTW_BLOCK
+        order = np.argsort(lb, kind='stable') if prune else np.arange(lb.shape[0])
+        found: List[Match] = []
+        self.scored = 0
+        with stage('matcher.query'):
+            for start in range(0, order.shape[0], block):
+                rows = order[start:start + block]
+                if prune and len(found) >= k:
+                    kth = found[k - 1].distance
+                    rows = rows[lb[rows] <= kth]
+                    if rows.size == 0:
+                        break
+                self.scored += rows.size
+                found.extend(score(rows))
+                found.sort(key=lambda m: m.distance)
+                del found[k:]
+        return found
+
+    def _xcorr_scorer(self, queries):
+        n = self.n
+        prepared = [(np.conj(np.fft.rfft(qq, axis=1)), float(np.einsum('cn,cn->', qq, qq)), rev)
+                    for qq, rev in queries]
+
+        def score(rows: np.ndarray) -> List[Match]:
+            with stage('matcher.xcorr'):
+                spec, sq = self._spec[rows], self._sq[rows]
+                best = np.full(rows.shape[0], np.inf)
+                lag = np.zeros(rows.shape[0], dtype=np.int64)
+                rev = np.zeros(rows.shape[0], dtype=bool)
+                for qspec, qsq, r in prepared:
+                    d2, lg = _xcorr_block(qspec, qsq, spec, sq, n, self.lags)
+                    better = d2 < best
+                    best[better], lag[better], rev[better] = d2[better], lg[better], r
+            return [Match(int(self._ids[i]), float(np.sqrt(d)), _shift_fraction(int(s), n), bool(r))
+                    for i, d, s, r in zip(rows, best, lag, rev)]
+        return score
+
+    def _dtw_scorer(self, queries, w: int):
+        def score(rows: np.ndarray) -> List[Match]:
+            with stage('matcher.dtw'):
+                cands = self._signals[rows]
+                ds = np.stack([_dtw_block(qq, cands, w) for qq, _ in queries])
+                pick = np.argmin(ds, axis=0)
+            return [Match(int(self._ids[i]), float(ds[p, j]), 0.0, queries[p][1])
+                    for j, (i, p) in enumerate(zip(rows, pick))]
+        return score
+
+__all__ = ['Match', 'MemoryMatcher', 'resample_memory', 'xcorr_distance', 'dtw_distance']
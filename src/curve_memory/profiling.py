@@ -0,0 +1,160 @@
+"""Opt-in per-stage profiling for the CMA-3D pipeline.
+
+Library code marks its stages with ``with stage('cma3d.torsion'):``. While no
+``Profiler`` is active, ``stage`` returns a shared no-op context manager, so
+instrumented code pays one global lookup per stage and nothing else.
+
+Inside ``with Profiler() as prof:`` every stage records wall time, call count
+and, with ``memory=True`` (default), the bytes allocated above the stage's
+starting level (``tracemalloc``, which sees NumPy buffers). Stages nest: an
+outer stage's time and peak include its inner stages. Results export as a
+plain dict (``to_dict``) or as Chrome trace-event JSON (``chrome_trace`` /
+``save_chrome_trace``) for chrome://tracing or Perfetto.
+
+Stage names in use: ``cma3d.curve_memory_3d``, ``cma3d.arclength``,
+``cma3d.tangent``, ``cma3d.curvature``, ``cma3d.torsion``,
+``cma3d.multiscale_pack`` (lazy pack stats), ``cma3d.reconstruct``, ``reconstruct.interp``,
+``reconstruct.rotations``, ``reconstruct.scan``, ``reconstruct.positions``,
+``reconstruct.step``, ``cma3d.reconstruct_range``, ``stream.append``, ``stream.snapshot``,
+``matcher.resample``, ``matcher.query``, ``matcher.xcorr``, ``matcher.dtw``; the CLI adds
+``csv.read`` and ``csv.write``.
+
+The active profiler is process-global; profile one thread at a time.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+_active: Optional['Profiler'] = None
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullStage':
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+_NULL = _NullStage()
+
+class _Stage:
+    __slots__ = ('prof', 'name', 't0', 'mem0', 'peak')
+
+    def __init__(self, prof: 'Profiler', name: str):
+        self.prof = prof
+        self.name = name
+
+    def __enter__(self) -> '_Stage':
+        prof = self.prof
+        if prof.memory:
+            cur, peak = tracemalloc.get_traced_memory()
+            if prof._stack:
+                parent = prof._stack[-1]
+                parent.peak = max(parent.peak, peak)
+            tracemalloc.reset_peak()
+            self.mem0 = self.peak = cur
+        prof._stack.append(self)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        t1 = time.perf_counter()
+        prof = self.prof
+        prof._stack.pop()
+        alloc = 0
+        if prof.memory:
+            _, peak = tracemalloc.get_traced_memory()
+            self.peak = max(self.peak, peak)
+            alloc = self.peak - self.mem0
+            if prof._stack:
+                parent = prof._stack[-1]
+                parent.peak = max(parent.peak, self.peak)
+        prof._record(self.name, self.t0, t1, alloc, len(prof._stack))
+        return False
+
+def stage(name: str):
+    """Context manager timing ``name`` under the active ``Profiler`` (no-op otherwise)."""
+    prof = _active
+    if prof is None:
+        return _NULL
+    return _Stage(prof, name)
+
+def active() -> Optional['Profiler']:
+    """The currently active ``Profiler``, or None."""
+    return _active
+
+class Profiler:
+    """Collects per-stage statistics while active (use as a context manager).
+
+    ``to_dict()`` maps each stage name to ``calls``, ``seconds`` (total),
+    ``bytes`` (summed per-call peak allocation) and ``peak_bytes`` (largest
+    single call). ``events`` keeps one (name, start, duration, bytes, depth)
+    tuple per call for the Chrome trace.
+    """
+
+    def __init__(self, *, memory: bool = True):
+        self.memory = memory
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.events: List[Tuple[str, float, float, int, int]] = []
+        self._stack: List[_Stage] = []
+        self._prev: Optional[Profiler] = None
+        self._started_tracing = False
+        self._origin = time.perf_counter()
+
+    def __enter__(self) -> 'Profiler':
+        global _active
+        self._prev = _active
+        _active = self
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        global _active
+        _active = self._prev
+        self._prev = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return False
+
+    def _record(self, name: str, t0: float, t1: float, alloc: int, depth: int) -> None:
+        st = self.stages.get(name)
+        if st is None:
+            st = self.stages[name] = {'calls': 0, 'seconds': 0.0, 'bytes': 0, 'peak_bytes': 0}
+        st['calls'] += 1
+        st['seconds'] += t1 - t0
+        st['bytes'] += alloc
+        st['peak_bytes'] = max(st['peak_bytes'], alloc)
+        self.events.append((name, t0, t1 - t0, alloc, depth))
+
+    def reset(self) -> None:
+        self.stages.clear()
+        self.events.clear()
+        self._origin = time.perf_counter()
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {name: dict(st) for name, st in self.stages.items()}
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Chrome trace-event format: one complete ('X') event per stage call."""
+        pid = os.getpid()
+        tid = threading.get_ident()
+        events = [{
+            'name': name, 'cat': name.split('.', 1)[0], 'ph': 'X', 'pid': pid, 'tid': tid,
+            'ts': (t0 - self._origin) * 1e6, 'dur': dur * 1e6,
+            'args': {'bytes': alloc, 'depth': depth},
+        } for name, t0, dur, alloc, depth in self.events]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+__all__ = ['Profiler', 'stage', 'active']
@@ -0,0 +1,159 @@
+"""Tolerance-driven knot simplification of CMA-3D memories.
+
+``simplify_memory(mem, tol)`` keeps a subset of the (u, kappa, tau) samples
+as knots of a piecewise-linear signal and picks a reconstruction step, so that
+``reconstruct_from_memory`` of the result stays within ``tol`` of the
+reconstruction of ``mem`` at every output point (compared at equal
+arclength, including the curve end at s = L). The step is stored as
+``mem['ds']`` and used whenever ``reconstruct_from_memory`` is called without
+``ds``.
+
+Knots are chosen greedily: each segment extends from its first knot as far as
+a straight line to a later sample stays within ``eps`` of every kappa and tau
+sample in between (a slope-window test, vectorized over growing windows).
+Changing kappa and tau by at most ``eps`` moves each step rotation by at most
+``2*eps*ds``, which bounds the position drift by ``eps * L**2``. That bound
+is loose, so ``eps`` is bisected (in log space) between ``tol / L**2`` and the
+signal range, keeping the largest value whose reconstruction passes the check;
+the step size is then doubled while the check still passes. The bound
+therefore holds as measured rather than as estimated. If no bisection point
+passes, ``tol / L**2`` itself is tried, and only if that fails too is the
+memory returned unsimplified.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+from .cma3d import _EPS, CurveMemory, _arclengths, add_checkpoints, reconstruct_from_memory
+
+_WINDOW = 16
+_BISECT = 8         # log-space bisection steps for eps
+_MAX_COARSEN = 64   # reconstruction step at most this many times the original
+
+def simplify_knots(u: np.ndarray, signals: List[np.ndarray], eps: float) -> np.ndarray:
+    """Indices of knots whose linear interpolation stays within ``eps`` of every signal.
+
+    Always keeps the first and last sample. Samples with repeated u only end a
+    segment when nothing further fits.
+    """
+    u = np.asarray(u, dtype=float)
+    ys = [np.asarray(y, dtype=float) for y in signals]
+    n = u.shape[0]
+    if n <= 2:
+        return np.arange(n)
+    keep = [0]
+    i, w = 0, _WINDOW
+    while i < n - 1:
+        while True:
+            stop = min(n, i + 1 + w)
+            du = u[i+1:stop] - u[i]
+            flat = du <= 0.0
+            dus = np.where(flat, 1.0, du)
+            ok = ~flat
+            for y in ys:
+                dy = y[i+1:stop] - y[i]
+                slope = dy / dus
+                lo = (dy - eps) / dus
+                hi = (dy + eps) / dus
+                # repeated u: no slope constraint if within eps, infeasible otherwise
+                fits = np.abs(dy) <= eps
+                lo[flat] = np.where(fits[flat], -np.inf, np.inf)
+                hi[flat] = np.where(fits[flat], np.inf, -np.inf)
+                lo_prev = np.maximum.accumulate(np.concatenate(([-np.inf], lo[:-1])))
+                hi_prev = np.minimum.accumulate(np.concatenate(([np.inf], hi[:-1])))
+                ok &= (lo_prev <= slope) & (slope <= hi_prev)
+            bad = np.flatnonzero(~ok)
+            if bad.size:
+                end = i + max(int(bad[0]), 1)
+            elif stop == n:
+                end = n - 1
+            else:
+                w *= 2
+                continue
+            break
+        keep.append(end)
+        w = max(_WINDOW, 2 * (end - i))
+        i = end
+    return np.asarray(keep, dtype=np.int64)
+
+def _default_ds(mem: Dict[str, Any]) -> float:
+    ds = mem.get('ds')
+    if ds is not None:
+        return float(ds)
+    return float(mem['L']) / max(50, np.asarray(mem['u']).shape[0])
+
+def _max_error(ref: np.ndarray, s_ref: np.ndarray, pts: np.ndarray, s: np.ndarray) -> float:
+    """Largest distance between ``pts`` and ``ref`` compared at equal arclength.
+
+    ``s_ref`` and ``s`` are the arclengths of the rows; both grids end at L, so
+    the tail after the last full step is checked too.
+    """
+    d = pts - np.stack([np.interp(s, s_ref, ref[:, c]) for c in range(3)], axis=1)
+    return float(np.sqrt(np.einsum('ij,ij->i', d, d).max()))
+
+def simplify_memory(mem: Dict[str, Any], tol: float, *, method: str = 'scan',
+                    levels: Optional[int] = 3) -> CurveMemory:
+    """Knot-simplified copy of ``mem`` whose reconstruction stays within ``tol``.
+
+    Error is measured against ``reconstruct_from_memory(mem, method=method)``
+    with default start and frame. The result keeps the input dtypes and carries
+    the chosen reconstruction step as ``'ds'``; if ``mem`` has checkpoints, the
+    same number is rebuilt for the result.
+    """
+    if not tol > 0:
+        raise ValueError("tol must be positive")
+    out = _simplify(mem, tol, method, levels)
+    if mem.get('frames') is not None:
+        add_checkpoints(out, len(mem['frames']))
+    return out
+
+def _simplify(mem: Dict[str, Any], tol: float, method: str, levels: Optional[int]) -> CurveMemory:
+    L = float(mem['L'])
+    u = np.asarray(mem['u']); kappa = np.asarray(mem['kappa']); tau = np.asarray(mem['tau'])
+    out = CurveMemory(L, u, kappa, tau, levels=levels)
+    ds_ref = _default_ds(mem)
+    out['ds'] = ds_ref
+    if L < _EPS or u.shape[0] <= 2:
+        return out
+    ref = reconstruct_from_memory(mem, ds=ds_ref, method=method, dtype=np.float64)
+    s_ref = _arclengths(L, ds_ref)
+
+    def error(cand: CurveMemory, ds: float) -> Tuple[float, int]:
+        pts = reconstruct_from_memory(cand, ds=ds, method=method, dtype=np.float64)
+        return _max_error(ref, s_ref, pts, _arclengths(L, ds)), pts.shape[0]
+
+    def attempt(eps: float) -> Optional[CurveMemory]:
+        idx = simplify_knots(u, [kappa, tau], eps)
+        cand = CurveMemory(L, u[idx], kappa[idx], tau[idx], levels=levels)
+        return cand if error(cand, ds_ref)[0] <= tol else None
+
+    lo = tol / (L * L)
+    hi = max(lo, float(np.ptp(kappa)), float(np.ptp(tau)))
+    found = attempt(hi)
+    if found is None:
+        for _ in range(_BISECT):
+            mid = float(np.sqrt(lo * hi))
+            cand = attempt(mid)
+            if cand is None:
+                hi = mid
+            else:
+                lo, found = mid, cand
+    if found is None:
+        # no bisection point passed: fall back to the analytic bound itself
+        found = attempt(lo)
+    if found is None:
+        return out
+    found['ds'] = ds_ref
+    f = 2
+    while f <= _MAX_COARSEN:
+        ds = L / max(2, int(np.ceil(L / ds_ref / f)))
+        err, m = error(found, ds)
+        if err > tol:
+            break
+        found['ds'] = ds
+        if m <= 2:
+            break
+        f *= 2
+    return found
+
+__all__ = ['simplify_memory', 'simplify_knots']
@@ -0,0 +1,367 @@
+"""Incremental CMA-3D encoding for live point feeds.
+
+``CurveMemoryStream`` consumes (x, y, z) samples one chunk at a time and keeps
+kappa, tau, arclength and the ``multiscale_pack`` global statistics up to date
+in O(1) work per sample (chunks are processed with whole-array kernels). Only
+a four-point window of geometry is needed to finalize each new vertex, so the
+working state is constant; retained samples are capped by ``history``
+(``DEFAULT_HISTORY`` unless given), so memory stays bounded on arbitrarily
+long feeds. ``history=None`` retains everything and grows without bound.
+
+When the full stream is retained, ``snapshot()`` matches ``curve_memory_3d``
+on the concatenated points (up to floating point rounding).
+"""
+from __future__ import annotations
+from typing import Any, Dict, Optional
+import math
+import numpy as np
+
+from .cma3d import _EPS, CurveMemory, _cast_arrays, _normalize
+from .profiling import stage
+
+_BLOCK_MIN = 16  # chunks at least this long take the vectorized path
+DEFAULT_HISTORY = 1 << 20  # samples kept for snapshot() by default (<= 48 MiB of buffer)
+
+def _unit(v):
+    n = max(math.sqrt(v[0]*v[0] + v[1]*v[1] + v[2]*v[2]), _EPS)
+    return (v[0]/n, v[1]/n, v[2]/n)
+
+def _cross(a, b):
+    return (a[1]*b[2] - a[2]*b[1], a[2]*b[0] - a[0]*b[2], a[0]*b[1] - a[1]*b[0])
+
+def _dot(a, b):
+    return a[0]*b[0] + a[1]*b[1] + a[2]*b[2]
+
+class _Moments:
+    """Running count/mean/M2/min/max (Welford)."""
+    __slots__ = ('n', 'mean', 'm2', 'lo', 'hi')
+
+    def __init__(self):
+        self.n = 0; self.mean = 0.0; self.m2 = 0.0
+        self.lo = math.inf; self.hi = -math.inf
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+        if x < self.lo: self.lo = x
+        if x > self.hi: self.hi = x
+
+    def extend(self, x: np.ndarray) -> None:
+        """Merge a block of samples (Chan et al. pairwise update)."""
+        nb = x.shape[0]
+        if nb == 0:
+            return
+        mb = float(x.mean())
+        m2b = float(np.square(x - mb).sum())
+        n = self.n + nb
+        d = mb - self.mean
+        self.mean += d * nb / n
+        self.m2 += m2b + d * d * self.n * nb / n
+        self.n = n
+        self.lo = min(self.lo, float(x.min()))
+        self.hi = max(self.hi, float(x.max()))
+
+    def copy(self) -> '_Moments':
+        m = _Moments()
+        m.n, m.mean, m.m2, m.lo, m.hi = self.n, self.mean, self.m2, self.lo, self.hi
+        return m
+
+    def summary(self, prefix: str) -> Dict[str, float]:
+        if self.n == 0:
+            return {f'{prefix}_mean': 0.0, f'{prefix}_std': 0.0, f'{prefix}_max': 0.0, f'{prefix}_min': 0.0}
+        return {f'{prefix}_mean': self.mean, f'{prefix}_std': math.sqrt(self.m2 / self.n),
+                f'{prefix}_max': self.hi, f'{prefix}_min': self.lo}
+
+class CurveMemoryStream:
+    """Streaming counterpart of ``curve_memory_3d``.
+
+    Usage::
+
+        enc = CurveMemoryStream(history=100_000)
+        for chunk in feed:
+            enc.append(chunk)       # (3,) or (k,3)
+        mem = enc.snapshot()        # same layout as curve_memory_3d
+
+    Only the latest ``history`` samples (default ``DEFAULT_HISTORY``) are
+    retained for ``snapshot()``: its u/kappa/tau and pack levels describe that
+    window, while ``pack['global']`` and ``stats()`` always cover the whole
+    stream. ``history=None`` opts in to keeping every sample, so memory grows
+    with the stream; use it only when the whole curve is needed.
+
+    The last vertex of a curve is padded from its neighbour (as in
+    ``discrete_curvature``/``discrete_torsion``), so its values are provisional
+    until the next sample arrives; the running totals only absorb finalized
+    values and add the padded tail on demand.
+    """
+
+    def __init__(self, history: Optional[int] = DEFAULT_HISTORY):
+        if history is not None and history < 4:
+            raise ValueError("history must be at least 4 samples")
+        self.history = history
+        self.n = 0                # samples seen
+        self.s = 0.0              # arclength so far
+        self._p = None            # last point
+        self._tseg = None         # last segment tangent
+        self._lseg = 0.0          # last segment length
+        self._seg01 = 0.0         # first segment length
+        self._T = None            # tangent at vertex n-2 (previous vertex)
+        self._B = (0.0, 0.0, 1.0) # binormal at vertex n-2 (carry-forward state)
+        self._k_last = 0.0        # newest finalized kappa / tau
+        self._t_last = 0.0
+        self._k1 = 0.0            # kappa[1], tau[2] (pads for the start of the curve)
+        self._t2 = 0.0
+        self._km = _Moments()     # finalized kappa[1:n-1] / tau[2:n-1]
+        self._tm = _Moments()
+        self._ik1 = self._ik2 = 0.0  # trapezoid integrals over s of |kappa|, kappa^2
+        self._it1 = self._it2 = 0.0  # ... and of |tau|, tau^2
+        cap = 1024 if history is None else min(1024, 2 * history)
+        self._buf = np.zeros((cap, 3))  # columns: s, kappa, tau; at most 2*history rows
+        self._base = 0            # global index of _buf[0]
+        self._len = 0             # rows in use
+
+    # -- ingest -------------------------------------------------------------
+    def append(self, points) -> None:
+        with stage('stream.append'):
+            self._append(points)
+
+    def _append(self, points) -> None:
+        pts = np.asarray(points, dtype=float)
+        if pts.ndim == 1:
+            pts = pts[None, :]
+        assert pts.ndim == 2 and pts.shape[1] == 3, "points must be (3,) or (k,3)"
+        # the first four samples set up the start-of-curve padding one at a time
+        head = max(0, min(4 - self.n, pts.shape[0]))
+        for x, y, z in pts[:head].tolist():
+            self._push((x, y, z))
+        rest = pts[head:]
+        if rest.shape[0] >= _BLOCK_MIN:
+            self._push_block(rest)
+        else:
+            for x, y, z in rest.tolist():
+                self._push((x, y, z))
+
+    def _make_room(self) -> None:
+        if self._len < self._buf.shape[0]:
+            return
+        cap = 2 * self._buf.shape[0]
+        if self.history is None or self._buf.shape[0] < 2 * self.history:
+            # grow geometrically, up to 2*history rows
+            buf = np.zeros((cap if self.history is None else min(cap, 2 * self.history), 3))
+            buf[:self._len] = self._buf
+            self._buf = buf
+        else:
+            keep = self.history
+            self._buf[:keep] = self._buf[self._len - keep:self._len]
+            self._base += self._len - keep
+            self._len = keep
+
+    def _store(self, s: float) -> None:
+        self._make_room()
+        self._buf[self._len] = (s, 0.0, 0.0)
+        self._len += 1
+
+    def _store_block(self, s: np.ndarray) -> None:
+        i = 0
+        while i < s.shape[0]:
+            self._make_room()
+            take = min(self._buf.shape[0] - self._len, s.shape[0] - i)
+            rows = self._buf[self._len:self._len + take]
+            rows[:, 0] = s[i:i + take]
+            rows[:, 1:] = 0.0
+            self._len += take
+            i += take
+
+    def _set(self, i: int, col: int, val: float) -> None:
+        j = i - self._base
+        if j >= 0:
+            self._buf[j, col] = val
+
+    def _set_block(self, i0: int, col: int, vals: np.ndarray) -> None:
+        j0 = i0 - self._base
+        skip = max(0, -j0)
+        if skip < vals.shape[0]:
+            self._buf[j0 + skip:j0 + vals.shape[0], col] = vals[skip:]
+
+    def _push_block(self, pts: np.ndarray) -> None:
+        """Vectorized ``_push`` for k samples once the stream has at least four."""
+        k = pts.shape[0]
+        n = self.n
+        d = np.diff(np.concatenate([np.asarray(self._p)[None, :], pts]), axis=0)
+        l = np.linalg.norm(d, axis=1)
+        S = np.concatenate([np.asarray(self._tseg)[None, :], _normalize(d)])
+        Ls = np.concatenate([[self._lseg], l])
+        s_new = self.s + np.cumsum(l)
+        self._store_block(s_new)
+        # vertices n-1 .. n+k-2 become interior
+        T = _normalize(S[:-1] + S[1:])
+        Tprev = np.concatenate([np.asarray(self._T)[None, :], T[:-1]])
+        ds = np.maximum(0.5*(Ls[:-1] + Ls[1:]), _EPS)
+        kappa = np.linalg.norm(T - Tprev, axis=1) / ds
+        c = np.cross(T, Tprev)
+        nrm = np.linalg.norm(c, axis=1)
+        valid = nrm >= 1e-9
+        raw = np.empty((k + 1, 3))
+        raw[0] = self._B
+        raw[1:][valid] = c[valid] / nrm[valid, None]
+        last = np.where(np.concatenate(([False], valid)), np.arange(k + 1), 0)
+        np.maximum.accumulate(last, out=last)
+        Bfull = raw[last]
+        Bprev, B = Bfull[:-1], Bfull[1:]
+        ang = np.arccos(np.clip(np.einsum('ij,ij->i', Bprev, B), -1.0, 1.0))
+        sgn = np.sign(np.einsum('ij,ij->i', np.cross(Bprev, B), T))
+        tau = sgn * ang / ds
+        self._set_block(n - 1, 1, kappa)
+        self._set_block(n - 1, 2, tau)
+        self._km.extend(kappa); self._tm.extend(tau)
+        seg = Ls[:-1]
+        kp = np.concatenate([[self._k_last], kappa[:-1]])
+        tp = np.concatenate([[self._t_last], tau[:-1]])
+        self._ik1 += float(np.dot(0.5*(np.abs(kp) + np.abs(kappa)), seg))
+        self._ik2 += float(np.dot(0.5*(kp*kp + kappa*kappa), seg))
+        self._it1 += float(np.dot(0.5*(np.abs(tp) + np.abs(tau)), seg))
+        self._it2 += float(np.dot(0.5*(tp*tp + tau*tau), seg))
+        self._k_last = float(kappa[-1]); self._t_last = float(tau[-1])
+        self._T = tuple(T[-1].tolist()); self._B = tuple(B[-1].tolist())
+        self._tseg = tuple(S[-1].tolist()); self._lseg = float(l[-1])
+        self._p = tuple(pts[-1].tolist())
+        self.s = float(s_new[-1])
+        self.n = n + k
+
+    def _push(self, p) -> None:
+        m = self.n
+        if m > 0:
+            d = (p[0] - self._p[0], p[1] - self._p[1], p[2] - self._p[2])
+            l = math.sqrt(d[0]*d[0] + d[1]*d[1] + d[2]*d[2])
+            tseg = _unit(d)
+            self.s += l
+        self._store(self.s)
+        if m >= 2:
+            self._finalize_vertex(m - 1, tseg, l)
+        elif m == 1:
+            self._T = tseg  # T[0] is the first segment tangent
+            self._seg01 = l
+        if m > 0:
+            self._tseg = tseg; self._lseg = l
+        self._p = p
+        self.n = m + 1
+
+    def _finalize_vertex(self, i: int, tseg, l: float) -> None:
+        """Vertex ``i`` just became interior (sample i+1 arrived)."""
+        tp = self._tseg
+        T = _unit((tp[0] + tseg[0], tp[1] + tseg[1], tp[2] + tseg[2]))
+        Tprev = self._T
+        ds = max(0.5*(self._lseg + l), _EPS)
+        dT = (T[0] - Tprev[0], T[1] - Tprev[1], T[2] - Tprev[2])
+        k = math.sqrt(_dot(dT, dT)) / ds
+        self._set(i, 1, k)
+        self._km.add(k)
+        if i == 1:
+            self._k1 = k
+            self._set(0, 1, k)
+            seg = self._lseg  # s[1] - s[0]
+            self._ik1 += abs(k) * seg; self._ik2 += k * k * seg
+        else:
+            seg = self._lseg
+            self._ik1 += 0.5*(abs(self._k_last) + abs(k)) * seg
+            self._ik2 += 0.5*(self._k_last*self._k_last + k*k) * seg
+        c = _cross(T, Tprev)
+        nrm = math.sqrt(_dot(c, c))
+        Bprev = self._B
+        B = (c[0]/nrm, c[1]/nrm, c[2]/nrm) if nrm >= 1e-9 else (Bprev if i > 1 else (0.0, 0.0, 1.0))
+        if i >= 2:
+            dot = min(max(_dot(Bprev, B), -1.0), 1.0)
+            sg = _dot(_cross(Bprev, B), T)
+            sgn = (sg > 0) - (sg < 0)
+            t = sgn * math.acos(dot) / ds
+            self._set(i, 2, t)
+            self._tm.add(t)
+            if i == 2:
+                self._t2 = t
+                self._set(1, 2, t)
+                # tau[0] = 0, tau[1] = tau[2]
+                seg01 = self._seg01
+                self._it1 += 0.5*abs(t)*seg01 + abs(t)*self._lseg
+                self._it2 += 0.5*t*t*seg01 + t*t*self._lseg
+            else:
+                self._it1 += 0.5*(abs(self._t_last) + abs(t)) * self._lseg
+                self._it2 += 0.5*(self._t_last*self._t_last + t*t) * self._lseg
+            self._t_last = t
+        self._k_last = k
+        self._T = T
+        self._B = B
+
+    # -- summaries ----------------------------------------------------------
+    def _padded(self):
+        """Moments and integrals including the padded endpoint samples."""
+        n = self.n
+        km, tm = self._km.copy(), self._tm.copy()
+        ik1, ik2, it1, it2 = self._ik1, self._ik2, self._it1, self._it2
+        if n >= 3:
+            km.add(self._k1); km.add(self._k_last)
+            k = self._k_last
+            ik1 += abs(k) * self._lseg; ik2 += k * k * self._lseg
+        else:
+            for _ in range(n):
+                km.add(0.0)
+        if n >= 4:
+            tm.add(0.0); tm.add(self._t2); tm.add(self._t_last)
+            t = self._t_last
+            it1 += abs(t) * self._lseg; it2 += t * t * self._lseg
+        else:
+            for _ in range(n):
+                tm.add(0.0)
+        return km, tm, ik1, ik2, it1, it2
+
+    def stats(self) -> Dict[str, float]:
+        """O(1) whole-stream summary: length, running moments and ``pack['global']`` norms."""
+        km, tm, ik1, ik2, it1, it2 = self._padded()
+        L = self.s
+        out = {'n': self.n, 'L': L}
+        if L < _EPS:
+            zero = _Moments()
+            for _ in range(self.n):
+                zero.add(0.0)
+            out.update(zero.summary('kappa')); out.update(zero.summary('tau'))
+            out.update({'kappa_L1': 0.0, 'tau_L1': 0.0, 'kappa_L2': 0.0, 'tau_L2': 0.0})
+            return out
+        out.update(km.summary('kappa')); out.update(tm.summary('tau'))
+        out.update({'kappa_L1': ik1 / L, 'tau_L1': it1 / L,
+                    'kappa_L2': math.sqrt(ik2 / L), 'tau_L2': math.sqrt(it2 / L)})
+        return out
+
+    def snapshot(self, *, levels: int = 3, dtype=np.float64, u_dtype=None) -> Dict[str, Any]:
+        """Memory dict for the retained samples (see class docstring).
+
+        ``dtype`` / ``u_dtype`` choose the storage precision as in ``curve_memory_3d``.
+        """
+        with stage('stream.snapshot'):
+            return self._snapshot(levels, dtype, u_dtype)
+
+    def _snapshot(self, levels: int, dtype=np.float64, u_dtype=None) -> Dict[str, Any]:
+        if self.n == 0:
+            raise ValueError("no samples appended")
+        lo = 0 if self.history is None else max(0, self._len - self.history)
+        rows = self._buf[lo:self._len]
+        s = rows[:, 0] - rows[0, 0]
+        kappa = rows[:, 1].copy()
+        tau = rows[:, 2].copy()
+        last = rows.shape[0] - 1
+        if self.n >= 3:
+            kappa[last] = self._k_last
+        if self.n >= 4:
+            tau[last] = self._t_last
+        L = float(s[-1])
+        st = self.stats()
+        if L < _EPS or self.s < _EPS:
+            u = s * 0.0
+            kappa[:] = 0.0; tau[:] = 0.0
+            L = 0.0
+        else:
+            u = s / L
+        glob = {k: st[k] for k in ('kappa_L1', 'tau_L1', 'kappa_L2', 'tau_L2')}
+        u, kappa, tau = _cast_arrays(u, kappa, tau, dtype, u_dtype)
+        return CurveMemory(L, u, kappa, tau, levels=levels, global_=glob)
+
+__all__ = ['CurveMemoryStream']
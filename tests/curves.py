@@ -0,0 +1,11 @@
+"""Curve factories shared by the tests."""
+import numpy as np
+
+def helix(n=600, turns=3.0, c=0.1):
+    """Unit-radius helix with pitch ``2*pi*c`` per turn."""
+    t = np.linspace(0, 2*np.pi*turns, n)
+    return np.stack([np.cos(t), np.sin(t), c*t], axis=1)
+
+def trefoil(n):
+    t = np.linspace(0, 2*np.pi, n)
+    return np.stack([np.sin(t) + 2*np.sin(2*t), np.cos(t) - 2*np.cos(2*t), -np.sin(3*t)], axis=1)
@@ -6,3 +6,17 @@ def test_roundtrip_basic():
     cma = encode_curve(pts)
     rec = decode_curve(cma)
     assert len(rec) > 0
+
+def test_lazy_package_import():
+    import subprocess, sys
+    code = ("import sys, curve_memory\n"
+            "assert 'numpy' not in sys.modules\n"
+            "from curve_memory import encode_curve, decode_curve\n"
+            "assert 'curve_memory.cma3d' not in sys.modules\n"
+            "assert curve_memory.cma3d.curve_memory_3d is curve_memory.curve_memory_3d\n")
+    subprocess.run([sys.executable, '-c', code], check=True)
+    # the 3D path does not pull in the 2D pipeline
+    code = ("import sys\n"
+            "from curve_memory import curve_memory_3d\n"
+            "assert not {'curve_memory.geometry', 'curve_memory.decoder'} & set(sys.modules)\n")
+    subprocess.run([sys.executable, '-c', code], check=True)
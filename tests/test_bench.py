@@ -0,0 +1,34 @@
+import importlib.util
+import json
+import os
+
+_spec = importlib.util.spec_from_file_location(
+    'bench', os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'bench.py'))
+bench = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench)
+
+def test_run_and_compare(tmp_path):
+    path = str(tmp_path / 'base.json')
+    assert bench.main(['--cases', 'encode_curve,rmf_sweep', '--sizes', '1e2,2e4', '--repeat', '1',
+                       '--no-imports', '--save', path]) == 0
+    with open(path) as f:
+        base = json.load(f)
+    # rmf_sweep is capped below 2e4
+    assert sorted(base['results']) == ['encode_curve@100', 'encode_curve@20000', 'rmf_sweep@100']
+    assert bench.compare(base, base, 0.25) == []
+    fast = json.loads(json.dumps(base))
+    fast['results']['encode_curve@100']['throughput'] *= 10
+    fast['results']['rmf_sweep@100']['peak_bytes'] = 1
+    problems = bench.compare(base, fast, 0.25)
+    assert len(problems) == 2 and 'throughput' in problems[0] and 'peak memory' in problems[1]
+    with open(path, 'w') as f:
+        json.dump(fast, f)
+    assert bench.main(['--cases', 'encode_curve', '--sizes', '1e2', '--repeat', '1', '--no-imports',
+                       '--compare', path]) == 1
+
+def test_import_cases():
+    res = bench.measure_import('import curve_memory', 1)
+    assert 0 < res['seconds'] < 10 and res['peak_bytes'] >= 0
+    out = bench.measure_import(
+        "import sys, curve_memory; curve_memory.decode_curve; assert 'curve_memory.cma3d' not in sys.modules", 1)
+    assert out['seconds'] > 0
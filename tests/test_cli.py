@@ -0,0 +1,133 @@
+import importlib.util
+import json
+import os
+import sys
+import numpy as np
+import pytest
+from curves import helix
+
+_spec = importlib.util.spec_from_file_location(
+    'cma3d_cli', os.path.join(os.path.dirname(__file__), '..', 'scripts', 'cma3d_cli.py'))
+cli = importlib.util.module_from_spec(_spec)
+sys.modules['cma3d_cli'] = cli  # lets worker processes unpickle the task functions
+_spec.loader.exec_module(cli)
+
+def test_csv_roundtrip_chunked(tmp_path):
+    path = str(tmp_path / 'pts.csv')
+    pts = helix(1000)
+    cli.write_csv_points(path, pts, chunk_rows=64)
+    assert open(path).readline().strip() == 'x,y,z'
+    blocks = list(cli.iter_csv_points(path, chunk_rows=100))
+    assert max(b.shape[0] for b in blocks) <= 100
+    np.testing.assert_allclose(np.concatenate(blocks), pts, rtol=1e-8)
+
+def test_csv_bad_rows(tmp_path):
+    path = tmp_path / 'bad.csv'
+    path.write_text('X,Y,Z\n1,2,3\n\n4,5\n6,7,8,9\nfoo,1,2\n')
+    with pytest.raises(ValueError, match='line 4'):
+        cli.read_csv_points(str(path))
+    bad = []
+    pts = cli.read_csv_points(str(path), bad_rows=bad)
+    assert pts.tolist() == [[1.0, 2.0, 3.0], [6.0, 7.0, 8.0]]
+    assert [b[0] for b in bad] == [4, 6]
+
+def test_encode_reconstruct(tmp_path):
+    src = str(tmp_path / 'h.csv')
+    cli.write_csv_points(src, helix())
+    for ext in ('.npz', '.json', '.cmm'):
+        mem_path = str(tmp_path / ('h' + ext))
+        cli.main(['encode', '--in', src, '--out', mem_path, '--chunk-rows', '97'])
+        out = str(tmp_path / 'r.csv')
+        cli.main(['reconstruct', '--in', mem_path, '--out', out, '--num', '600'])
+        rec = cli.read_csv_points(out)
+        assert rec.shape == (600, 3)
+    # the curve is reconstructed and written in blocks of --chunk-rows points
+    chunked = str(tmp_path / 'c.csv')
+    for method in ('step', 'magnus4'):
+        cli.main(['reconstruct', '--in', mem_path, '--out', out, '--method', method])
+        cli.main(['reconstruct', '--in', mem_path, '--out', chunked, '--method', method, '--chunk-rows', '7'])
+        np.testing.assert_allclose(cli.read_csv_points(chunked), cli.read_csv_points(out), atol=1e-7)
+    cli.main(['reconstruct', '--in', mem_path, '--out', out, '--num', '10', '--method', 'magnus4'])
+    coarse = cli.read_csv_points(out)
+    assert coarse.shape == (10, 3)
+    # N samples span [0, L]: the last one is the curve end, not L - ds
+    np.testing.assert_allclose(coarse[-1], rec[-1], atol=0.05)
+
+def test_batch_subcommands(tmp_path, capsys):
+    src = tmp_path / 'in'
+    src.mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(5):
+        cli.write_csv_points(str(src / f'c{i}.csv'), np.cumsum(rng.normal(size=(40 + i, 3)), axis=0))
+    cli.main(['encode-batch', '--in', str(src), '--out-dir', str(tmp_path / 'mem'), '--format', 'cmm', '--workers', '2'])
+    assert 'curves/s' in capsys.readouterr().out
+    archive = str(tmp_path / 'all.npz')
+    cli.main(['encode-batch', '--in', str(src / '*.csv'), '--archive', archive, '--workers', '1'])
+    names, mems = cli.load_archive(archive)
+    assert names == [f'c{i}' for i in range(5)]
+    single = cli.load_memory(str(tmp_path / 'mem' / 'c3.cmm'))
+    np.testing.assert_array_equal(mems[3]['kappa'], single['kappa'])
+    cli.main(['reconstruct-batch', '--archive', archive, '--out-dir', str(tmp_path / 'rec'),
+              '--num', '30', '--method', 'scan', '--workers', '2'])
+    assert sorted(os.listdir(tmp_path / 'rec')) == [f'c{i}.csv' for i in range(5)]
+    capsys.readouterr()
+    cli.main(['match', '--query', str(tmp_path / 'mem' / 'c2.cmm'), '--archive', archive, '--k', '3'])
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 3 and lines[0].split('\t')[:2] == ['1', 'c2']
+    cli.main(['match', '--query', str(tmp_path / 'mem' / 'c2.cmm'), '--in', str(tmp_path / 'mem'),
+              '--method', 'dtw', '--grid', '32'])
+    assert capsys.readouterr().out.splitlines()[0].split('\t')[:2] == ['1', 'c2']
+
+def test_profile_trace(tmp_path, capsys):
+    src = str(tmp_path / 'h.csv')
+    cli.write_csv_points(src, helix())
+    trace = str(tmp_path / 'enc.json')
+    cli.main(['encode', '--in', src, '--out', str(tmp_path / 'h.npz'), '--profile', trace])
+    names = {e['name'] for e in json.load(open(trace))['traceEvents']}
+    assert {'csv.read', 'stream.append', 'stream.snapshot'} <= names
+    trace = str(tmp_path / 'rec.json')
+    cli.main(['reconstruct', '--in', str(tmp_path / 'h.npz'), '--out', str(tmp_path / 'r.csv'),
+              '--method', 'scan', '--profile', trace])
+    names = {e['name'] for e in json.load(open(trace))['traceEvents']}
+    assert {'reconstruct.scan', 'csv.write'} <= names
+    assert 'reconstruct.scan' in capsys.readouterr().err
+
+def test_reduced_precision_formats(tmp_path):
+    src = str(tmp_path / 'h.csv')
+    cli.write_csv_points(src, helix())
+    for ext in ('.npz', '.json', '.cmm'):
+        path = str(tmp_path / ('h' + ext))
+        cli.main(['encode', '--in', src, '--out', path, '--dtype', 'float32', '--u-dtype', 'float16'])
+        mem = cli.load_memory(path)
+        assert (mem['u'].dtype, mem['kappa'].dtype, mem['tau'].dtype) == (np.float16, np.float32, np.float32)
+    wide = str(tmp_path / 'wide.json')
+    cli.main(['convert', '--in', str(tmp_path / 'h.npz'), '--out', wide, '--u-dtype', 'float32'])
+    mem = cli.load_memory(wide)
+    assert mem['u'].dtype == mem['kappa'].dtype == np.float32
+
+def test_encode_simplify(tmp_path):
+    src = str(tmp_path / 'h.csv')
+    cli.write_csv_points(src, helix())
+    for ext in ('.npz', '.json', '.cmm'):
+        path = str(tmp_path / ('h' + ext))
+        cli.main(['encode', '--in', src, '--out', path, '--simplify', '1e-3'])
+        mem = cli.load_memory(path)
+        assert mem['u'].shape[0] < 300 and mem['ds'] > 0
+        out = str(tmp_path / 'r.csv')
+        cli.main(['reconstruct', '--in', path, '--out', out])
+        assert cli.read_csv_points(out).shape[0] == int(round(mem['L'] / mem['ds'])) + 1
+
+def test_checkpoints_range(tmp_path):
+    src = str(tmp_path / 'h.csv')
+    cli.write_csv_points(src, helix())
+    full, part = str(tmp_path / 'full.csv'), str(tmp_path / 'part.csv')
+    for ext in ('.npz', '.json', '.cmm'):
+        path = str(tmp_path / ('h' + ext))
+        cli.main(['encode', '--in', src, '--out', path, '--checkpoints', '8'])
+        assert cli.load_memory(path)['frames'].shape == (8, 8)
+        cli.main(['reconstruct', '--in', path, '--out', full, '--method', 'magnus4'])
+        cli.main(['reconstruct', '--in', path, '--out', part, '--method', 'magnus4', '--range', '0.5', '0.75'])
+        rec, win = cli.read_csv_points(full), cli.read_csv_points(part)
+        i0 = int(np.argmin(np.linalg.norm(rec - win[0], axis=1)))
+        np.testing.assert_allclose(win, rec[i0:i0 + win.shape[0]], atol=1e-6)
+        assert abs(win.shape[0] - rec.shape[0] / 4) <= 2
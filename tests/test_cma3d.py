@@ -0,0 +1,336 @@
+import numpy as np
+import pytest
+from curve_memory.cma3d import (
+    _EPS, _arclengths, _magnus4_steps, _safe_angle, curve_memory_3d, discrete_curvature, discrete_tangent, discrete_torsion,
+    curve_memory_3d_batch, memory_from_batch, poly_arclength, reconstruct_from_memory,
+    CurveMemory, add_checkpoints, cast_memory, reconstruct_chunks, reconstruct_range, rmf_frames, rmf_sweep,
+)
+from curves import helix, trefoil
+
+# Reference per-vertex loop kernels (the original implementations).
+def _loop_curvature(points):
+    N = points.shape[0]
+    if N < 3:
+        return np.zeros(N)
+    Lseg = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    T = discrete_tangent(points)
+    kappa = np.zeros(N)
+    for i in range(1, N-1):
+        ds = 0.5*(Lseg[i-1] + Lseg[i])
+        kappa[i] = np.linalg.norm(T[i] - T[i-1]) / max(ds, _EPS)
+    kappa[0] = kappa[1]
+    kappa[-1] = kappa[-2]
+    return kappa
+
+def _loop_torsion(points):
+    N = points.shape[0]
+    if N < 4:
+        return np.zeros(N)
+    Lseg = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    T = discrete_tangent(points)
+    B = np.zeros_like(points)
+    for i in range(1, N):
+        cross = np.cross(T[i], T[i-1])
+        nrm = np.linalg.norm(cross)
+        if nrm < 1e-9:
+            B[i] = B[i-1] if i > 1 else np.array([0.0, 0.0, 1.0])
+        else:
+            B[i] = cross / nrm
+    B[0] = B[1]
+    tau = np.zeros(N)
+    for i in range(2, N-1):
+        ds = 0.5*(Lseg[i-1] + Lseg[i])
+        ang = _safe_angle(B[i-1], B[i])
+        sgn = np.sign(np.dot(np.cross(B[i-1], B[i]), T[i]))
+        tau[i] = sgn * ang / max(ds, _EPS)
+    tau[0] = tau[1]
+    tau[1] = tau[2]
+    tau[-1] = tau[-2]
+    return tau
+
+def _curves():
+    rng = np.random.default_rng(0)
+    line = np.stack([np.linspace(0, 1, 20), np.zeros(20), np.zeros(20)], axis=1)
+    # straight lead-in then a helix: exercises the degenerate-binormal carry-forward
+    bent = np.concatenate([line - [1.0, 0.0, 0.0], helix(50) + [0.0, -1.0, 0.0]])
+    return [helix(), helix(4), helix(5), line, bent, np.cumsum(rng.normal(size=(300, 3)), axis=0)]
+
+def test_curvature_matches_loop():
+    for pts in _curves():
+        _, s, _ = poly_arclength(pts)
+        np.testing.assert_allclose(discrete_curvature(pts, s), _loop_curvature(pts), rtol=1e-12, atol=1e-12)
+
+def test_torsion_matches_loop():
+    for pts in _curves():
+        _, s, _ = poly_arclength(pts)
+        np.testing.assert_allclose(discrete_torsion(pts, s), _loop_torsion(pts), rtol=1e-9, atol=1e-9)
+
+def test_short_inputs():
+    assert discrete_curvature(helix(2), None).tolist() == [0.0, 0.0]
+    assert discrete_torsion(helix(3), None).tolist() == [0.0, 0.0, 0.0]
+
+def test_helix_invariants():
+    mem = curve_memory_3d(helix(2000))
+    # unit-radius helix with pitch 0.1: kappa = 1/(1+c^2), tau = c/(1+c^2)
+    c = 0.1
+    assert abs(np.median(mem['kappa']) - 1/(1+c*c)) < 1e-3
+    assert abs(np.median(mem['tau']) - c/(1+c*c)) < 1e-3
+
+def test_batch_matches_single():
+    curves = _curves() + [np.zeros((1, 3)), np.ones((6, 3)), helix(3)]
+    batch = curve_memory_3d_batch(curves)
+    assert batch['offsets'].tolist() == np.cumsum([0] + [len(c) for c in curves]).tolist()
+    for i, pts in enumerate(curves):
+        ref = curve_memory_3d(pts)
+        mem = memory_from_batch(batch, i, levels=3)
+        assert abs(mem['L'] - ref['L']) < 1e-9
+        for key in ('u', 'kappa', 'tau'):
+            np.testing.assert_allclose(mem[key], ref[key], rtol=1e-9, atol=1e-9)
+        for key, val in ref['pack']['global'].items():
+            assert abs(batch['global'][key][i] - val) < 1e-9
+
+def test_batch_dtype():
+    curves = _curves()
+    batch = curve_memory_3d_batch(curves, dtype=np.float32, u_dtype=np.float16)
+    assert batch['u'].dtype == np.float16 and batch['kappa'].dtype == batch['tau'].dtype == np.float32
+    full = curve_memory_3d_batch(curves)
+    for i, pts in enumerate(curves):
+        ref = curve_memory_3d(pts, dtype=np.float32, u_dtype=np.float16)
+        for mem in (memory_from_batch(batch, i), memory_from_batch(full, i, dtype=np.float32, u_dtype='float16')):
+            for key in ('u', 'kappa', 'tau'):
+                assert mem[key].dtype == ref[key].dtype
+                np.testing.assert_allclose(mem[key], ref[key], rtol=1e-6, atol=1e-6)
+    assert np.shares_memory(memory_from_batch(full, 0)['kappa'], full['kappa'])
+    with pytest.raises(ValueError):
+        curve_memory_3d_batch(curves, dtype=np.float16)
+
+def test_batch_offsets_input():
+    curves = [helix(10), helix(7)]
+    a = curve_memory_3d_batch(curves)
+    b = curve_memory_3d_batch(np.concatenate(curves), offsets=[0, 10, 17])
+    np.testing.assert_array_equal(a['tau'], b['tau'])
+    np.testing.assert_array_equal(a['L'], b['L'])
+
+def test_reconstruct_scan_matches_step():
+    mem = curve_memory_3d(helix())
+    frame = (np.array([0.0, 0.0, 1.0]), np.array([1.0, 0.0, 0.0]), np.array([0.0, 1.0, 0.0]))
+    for kw in ({}, {'ds': mem['L']/1000}, {'start': [1.0, -2.0, 0.5], 'frame': frame}):
+        ref = reconstruct_from_memory(mem, **kw)
+        rec = reconstruct_from_memory(mem, method='scan', **kw)
+        assert rec.shape == ref.shape
+        np.testing.assert_allclose(rec, ref, atol=1e-9)
+
+def test_rmf_project_matches_sweep():
+    curves = _curves()
+    T, N, B = rmf_frames(curves, method='project', check_tol=1e-9)
+    offsets = np.cumsum([0] + [len(c) for c in curves])
+    for pts, a, b in zip(curves, offsets[:-1], offsets[1:]):
+        Tr, Nr, Br = rmf_sweep(pts)
+        np.testing.assert_allclose(T[a:b], Tr, atol=1e-12)
+        np.testing.assert_allclose(N[a:b], Nr, atol=1e-9)
+        np.testing.assert_allclose(B[a:b], Br, atol=1e-9)
+
+def test_rmf_reflect():
+    pts = helix(6000)
+    T, N, B = rmf_frames(pts)
+    # orthonormal frames that agree with the projection sweep as sampling refines
+    np.testing.assert_allclose(np.einsum('ij,ij->i', T, N), 0.0, atol=1e-9)
+    np.testing.assert_allclose(np.linalg.norm(N, axis=1), 1.0, atol=1e-9)
+    np.testing.assert_allclose(np.cross(T, N), B, atol=1e-9)
+    rmf_frames(pts, check_tol=1e-2)
+    with pytest.raises(ValueError):
+        rmf_frames(helix(), check_tol=1e-6)
+    # batching does not change the result
+    T2, N2, B2 = rmf_frames([helix(50), pts])
+    np.testing.assert_allclose(N2[50:], N, atol=1e-12)
+
+def test_curve_memory_lazy_pack_matches_eager():
+    import pickle
+    from curve_memory.cma3d import CurveMemory, multiscale_pack
+    for pts in _curves() + [np.zeros((1, 3))]:
+        mem = curve_memory_3d(pts, levels=4)
+        assert isinstance(mem, CurveMemory) and not hasattr(mem, '__dict__')
+        ref = multiscale_pack(mem['u'], mem['kappa'], mem['tau'], 4)
+        assert mem['pack']['global'] == ref['global']
+        assert len(mem['pack']['levels']) == 4
+        for lv, rv in zip(mem['pack']['levels'], ref['levels']):
+            assert lv['stats'] == rv['stats']
+            for key in ('u', 'kappa', 'tau'):
+                np.testing.assert_array_equal(lv[key], rv[key])
+        again = pickle.loads(pickle.dumps(mem))
+        np.testing.assert_array_equal(again['pack']['levels'][-1]['tau'], ref['levels'][-1]['tau'])
+
+def test_curve_memory_mapping():
+    mem = curve_memory_3d(helix(), levels=2)
+    assert list(mem) == ['L', 'u', 'kappa', 'tau', 'pack'] and len(mem) == 5
+    assert set(dict(mem)) == set(mem.keys()) and mem.get('hash') is None
+    levels = mem['pack']['levels']
+    # levels hold index arrays, not copies; stats are memoized
+    assert levels[0]['u'] is mem['u']
+    assert levels[1]['stats'] is levels[1]['stats']
+    assert levels[-1]['u'].shape[0] == 300
+    mem['hash'] = 'x'
+    assert mem['hash'] == 'x' and 'hash' in mem and len(mem) == 6
+    del mem['hash']
+    mem['tau'] = np.zeros_like(mem['tau'])
+    assert mem['pack']['global']['tau_L1'] == 0.0
+    del mem['pack']
+    assert 'pack' not in mem
+    with pytest.raises(KeyError):
+        del mem['u']
+    assert 'pack' not in memory_from_batch(curve_memory_3d_batch([helix(10)]), 0)
+
+def test_reduced_precision_drift_bound():
+    for n in (1000, 100000):
+        mem = curve_memory_3d(trefoil(n))
+        ref = reconstruct_from_memory(mem, method='scan')
+        m32 = curve_memory_3d(trefoil(n), dtype=np.float32)
+        assert m32['u'].dtype == m32['kappa'].dtype == m32['tau'].dtype == np.float32
+        rec = reconstruct_from_memory(m32, method='scan')
+        assert rec.dtype == np.float32
+        assert np.abs(rec - ref).max() < 1e-5 * mem['L']
+        m16 = curve_memory_3d(trefoil(n), dtype=np.float32, u_dtype=np.float16)
+        assert m16['u'].dtype == np.float16 and m16['kappa'].dtype == np.float32
+        assert np.abs(reconstruct_from_memory(m16, method='scan') - ref).max() < 5e-3 * mem['L']
+    step = reconstruct_from_memory(curve_memory_3d(helix(300), dtype=np.float32))
+    assert step.dtype == np.float32
+
+def test_cast_memory_and_bad_dtype():
+    mem = curve_memory_3d(helix(200))
+    low = cast_memory(mem, np.float32, u_dtype='float16')
+    assert isinstance(low, CurveMemory) and mem['kappa'].dtype == np.float64
+    assert low['u'].dtype == np.float16 and low['pack']['levels'][1]['tau'].dtype == np.float32
+    plain = cast_memory({k: mem[k] for k in ('L', 'u', 'kappa', 'tau')}, 'float32')
+    assert type(plain) is dict and plain['u'].dtype == np.float32
+    with pytest.raises(ValueError):
+        curve_memory_3d(helix(10), dtype=np.float16)
+    with pytest.raises(ValueError):
+        cast_memory(mem, np.int32)
+
+def _analytichelix(r=1.0, c=0.1, turns=3.0):
+    """Exact helix memory plus the matching start point/frame and a point evaluator."""
+    w = np.hypot(r, c)
+    L = 2*np.pi*turns*w
+    u = np.linspace(0, 1, 11)
+    mem = CurveMemory(L, u, np.full(11, r/w**2), np.full(11, c/w**2), levels=None)
+    T = np.array([0.0, r, c]) / w
+    N = np.array([-1.0, 0.0, 0.0])
+    at = lambda s: np.stack([r*np.cos(s/w), r*np.sin(s/w), c*s/w], axis=1)
+    return mem, (np.array([r, 0.0, 0.0]), (T, N, np.cross(T, N))), at
+
+def _endpoint_error(mem, ds, method, ref):
+    """Distance of the curve end (s = L) to that of ``ref`` (a finer run)."""
+    pts = reconstruct_from_memory(mem, ds=ds, method=method)
+    return float(np.linalg.norm(pts[-1] - ref[-1]))
+
+def test_magnus4helix():
+    mem, (start, frame), at = _analytichelix()
+    L = mem['L']
+    pts = reconstruct_from_memory(mem, ds=L/30, method='magnus4', start=start, frame=frame)
+    np.testing.assert_allclose(pts, at(np.arange(pts.shape[0]) * L/30), atol=1e-10)
+    errs = []
+    for K in (200, 400, 800):
+        rec = reconstruct_from_memory(mem, ds=L/K, method='scan', start=start, frame=frame)
+        errs.append(np.linalg.norm(rec - at(np.arange(rec.shape[0]) * L/K), axis=1).max())
+    orders = np.log2(np.array(errs[:-1]) / errs[1:])
+    assert np.all(np.abs(orders - 1.0) < 0.2)
+    assert reconstruct_from_memory(mem, ds=L/30, method='magnus4', dtype=np.float32).dtype == np.float32
+
+@pytest.mark.filterwarnings('error::RuntimeWarning')
+def test_magnus4_float32():
+    mem, (start, frame), at = _analytichelix()
+    mem = cast_memory(mem, np.float32)
+    h = np.full(4, 0.1, dtype=np.float32)
+    k = np.asarray(mem['kappa'][:4])
+    assert all(a.dtype == np.float32 for a in _magnus4_steps(k, k, k, k, h))
+    pts = reconstruct_from_memory(mem, ds=mem['L']/30, method='magnus4', start=start, frame=frame)
+    assert pts.dtype == np.float32
+    np.testing.assert_allclose(pts[-1], at(np.array([mem['L']]))[0], atol=1e-4)
+    add_checkpoints(mem, 10)
+    rng = reconstruct_range(mem, 0.3, 0.6, method='magnus4')
+    assert rng.dtype == np.float32 and np.all(np.isfinite(rng))
+
+def test_reconstruction_ends_at_L():
+    mem, (start, frame), at = _analytichelix()
+    L = mem['L']
+    # 7.5 steps: seven full steps and a half step onto s = L
+    pts = reconstruct_from_memory(mem, ds=L/7.5, method='magnus4', start=start, frame=frame)
+    assert pts.shape == (9, 3)
+    np.testing.assert_allclose(pts, at(np.append(np.arange(8) * L/7.5, L)), atol=1e-10)
+    for method in ('scan', 'step'):
+        pts = reconstruct_from_memory(mem, ds=L/2000.5, method=method, start=start, frame=frame)
+        assert pts.shape == (2002, 3)
+        assert np.linalg.norm(pts[-1] - at(np.array([L]))[0]) < 0.05
+    with pytest.raises(ValueError):
+        reconstruct_from_memory(mem, ds=0.0)
+
+def test_magnus4_convergence_order():
+    u = np.linspace(0, 1, 100001)
+    mem = CurveMemory(10.0, u, 1 + 0.5*np.sin(2*np.pi*u), 0.3*np.cos(3*np.pi*u), levels=None)
+    ref_ds = 10.0 / 20480
+    ref = reconstruct_from_memory(mem, ds=ref_ds, method='magnus4')
+    err = {m: [_endpoint_error(mem, 10.0/K, m, ref) for K in (20, 40, 80, 160)]
+           for m in ('magnus4', 'scan')}
+    assert np.all(np.log2(np.array(err['magnus4'][:-1]) / err['magnus4'][1:]) > 3.5)
+    assert np.all(np.abs(np.log2(np.array(err['scan'][:-1]) / err['scan'][1:]) - 1.0) < 0.2)
+    # 20 magnus4 steps beat 160 first-order steps by far
+    assert err['magnus4'][0] < err['scan'][-1] / 100
+    with pytest.raises(ValueError):
+        reconstruct_from_memory(mem, method='rk4')
+
+def test_reconstruct_range_matches_full():
+    mem = curve_memory_3d(helix(5000), levels=None)
+    full = reconstruct_from_memory(mem, method='magnus4')
+    ds = mem['L'] / 5000
+    plain = reconstruct_range(mem, 0.3, 0.35)
+    add_checkpoints(mem, 16)
+    assert mem['frames'].shape == (16, 8)
+    np.testing.assert_allclose(np.linalg.norm(mem['frames'][:, 4:], axis=1), 1.0)
+    s = _arclengths(mem['L'], ds)
+    for u0, u1 in ((0.0, 1.0), (0.3, 0.35), (0.5, 0.5), (0.99, 1.0), (0.99995, 1.0), (1.0, 1.0)):
+        rows = (s >= u0 * mem['L'] - 1e-9 * ds) & (s <= u1 * mem['L'] + 1e-9 * ds)
+        rng = reconstruct_range(mem, u0, u1)
+        assert rng.shape[0] == rows.sum() >= 1
+        np.testing.assert_allclose(rng, full[rows], atol=1e-9)
+    np.testing.assert_allclose(plain, reconstruct_range(mem, 0.3, 0.35), atol=1e-9)
+    assert reconstruct_range(mem, 0.3, 0.35, method='scan').shape == plain.shape
+    # another step: windows start on its grid and tile the full reconstruction;
+    # poses differ by the two runs' step error (~1e-5), grid offsets by ~ds
+    ds = 0.7 * mem['L'] / 5000
+    full = reconstruct_from_memory(mem, ds=ds, method='magnus4')
+    s = _arclengths(mem['L'], ds)
+    for u0, u1 in ((0.5, 0.52), (0.3, 0.35), (0.99995, 1.0)):
+        rows = (s >= u0 * mem['L'] - 1e-9 * ds) & (s <= u1 * mem['L'] + 1e-9 * ds)
+        rng = reconstruct_range(mem, u0, u1, ds=ds)
+        assert rng.shape[0] == rows.sum()
+        np.testing.assert_allclose(rng, full[rows], atol=2e-4)
+    tiles = [reconstruct_range(mem, a, b, ds=ds) for a, b in ((0.0, 0.25), (0.25, 0.6), (0.6, 1.0))]
+    assert sum(t.shape[0] for t in tiles) == full.shape[0]
+    np.testing.assert_allclose(np.concatenate(tiles), full, atol=2e-4)
+    with pytest.raises(ValueError):
+        reconstruct_range(mem, 0.6, 0.4)
+    with pytest.raises(ValueError):
+        add_checkpoints(mem, 0)
+
+def test_reconstruct_chunks_match_full():
+    mem = curve_memory_3d(helix(3000))
+    frame = (np.array([0.0, 0.0, 1.0]), np.array([1.0, 0.0, 0.0]), np.array([0.0, 1.0, 0.0]))
+    for method in ('step', 'scan', 'magnus4'):
+        for kw in ({}, {'ds': mem['L'] / 777.3}, {'start': [1.0, 2.0, 3.0], 'frame': frame}):
+            full = reconstruct_from_memory(mem, method=method, **kw)
+            for rows in (2, 7, 5000):
+                blocks = list(reconstruct_chunks(mem, method=method, chunk_rows=rows, **kw))
+                assert max(b.shape[0] for b in blocks) <= rows
+                np.testing.assert_allclose(np.concatenate(blocks), full, atol=1e-9)
+    with pytest.raises(ValueError):
+        next(reconstruct_chunks(mem, chunk_rows=1))
+
+def test_checkpoints_follow_base_arrays():
+    mem = curve_memory_3d(helix(2000), checkpoints=8)
+    mem['ds'] = mem['L'] / 1000
+    low = cast_memory(mem, np.float32)
+    assert low['ds'] == mem['ds'] and low['frames'].shape == (8, 8)
+    np.testing.assert_allclose(reconstruct_range(low, 0.4, 0.5),
+                               reconstruct_from_memory(low, method='magnus4')[400:501], atol=1e-4)
+    mem['kappa'] = 2 * mem['kappa']
+    assert 'frames' not in mem and 'ds' not in mem
@@ -0,0 +1,67 @@
+import io
+import json
+import numpy as np
+import pytest
+from curve_memory import GlyphTable, decode_curve, encode_curve, encode_table
+from curve_memory.cmab import CMABReader, CMABWriter, load_cmab, save_cmab
+
+def _spiral(n=2000):
+    t = np.linspace(0, 12*np.pi, n)
+    return np.stack([t*np.cos(t), t*np.sin(t)], axis=1)
+
+def _cma():
+    rng = np.random.default_rng(0)
+    cma = encode_curve(np.cumsum(rng.normal(size=(3000, 2)), axis=0), with_hash=True)
+    cma["glyphs"].append({"family": "cubic", "theta": {"a": 0.25}, "bind": 0.5})
+    cma["frames"] = [[0.0, 0.0, 0.0], [1.0, 2.0, 0.5]]
+    cma["meta"]["notes"] = "walk"
+    return cma
+
+def test_lossless_roundtrip(tmp_path):
+    cma = _cma()
+    path = str(tmp_path / 'w.cmab')
+    save_cmab(path, cma, block_size=500)
+    assert load_cmab(path) == json.loads(json.dumps(cma))
+    t = load_cmab(path, table=True)
+    assert isinstance(t["glyphs"], GlyphTable) and len(t["glyphs"]) == len(cma["glyphs"])
+
+def test_quantized_columns_respect_bound(tmp_path):
+    cma = _cma()
+    path = str(tmp_path / 'q.cmab')
+    save_cmab(path, cma, quantize={"k": 1e-6, "bind": 1e-3})
+    out = load_cmab(path, table=True)["glyphs"]
+    ref = GlyphTable.from_json(cma["glyphs"])
+    np.testing.assert_array_equal(np.isnan(out.params["k"]), np.isnan(ref.params["k"]))
+    assert np.nanmax(np.abs(out.params["k"] - ref.params["k"])) <= 1e-6 * (1 + 1e-9)
+    np.testing.assert_array_equal(out.params["L"], ref.params["L"])
+    assert np.max(np.abs(out.bind - ref.bind)) <= 1e-3
+    raw = tmp_path / 'r.cmab'
+    save_cmab(str(raw), cma)
+    assert (tmp_path / 'q.cmab').stat().st_size < raw.stat().st_size
+
+def test_streaming_writer_reader():
+    buf = io.BytesIO()
+    P = _spiral()
+    t = encode_table(P)
+    with CMABWriter(buf, fields={"version": "0.3"}, block_size=3) as w:
+        for start in range(0, len(t), 5):
+            w.write(t.slice(start, start + 5))
+        w.close(frames=np.zeros((2, 3, 3)))
+    buf.seek(0)
+    r = CMABReader(buf)
+    blocks = list(r)
+    assert all(len(b) <= 3 for b in blocks)
+    np.testing.assert_array_equal(decode_curve(GlyphTable.concat(blocks), as_array=True),
+                                  decode_curve(t, as_array=True))
+    assert r.frames.shape == (2, 3, 3) and r.hash is None
+    with pytest.raises(ValueError):
+        w2 = CMABWriter(io.BytesIO())
+        w2.write([{"family": "arc", "theta": {"k": 1.0}}])
+        w2.write([{"family": "arc", "theta": {"q": 1.0}}])
+    with pytest.raises(ValueError):
+        CMABReader(io.BytesIO(b'not a cmab file!'))
+
+def test_empty(tmp_path):
+    path = str(tmp_path / 'e.cmab')
+    save_cmab(path, {"version": "0.3", "glyphs": []})
+    assert load_cmab(path) == {"version": "0.3", "glyphs": []}
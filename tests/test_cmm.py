@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from curve_memory.cma3d import add_checkpoints, curve_memory_3d, reconstruct_from_memory
+from curve_memory.cmm import load_cmm, read_cmm_header, save_cmm
+from curves import helix
+
+def test_cmm_roundtrip(tmp_path):
+    mem = curve_memory_3d(helix())
+    path = str(tmp_path / 'helix.cmm')
+    save_cmm(path, mem)
+    h = read_cmm_header(path)
+    assert h['count'] == 600 and all(off % 64 == 0 for off in h['offsets'])
+    out = load_cmm(path)
+    assert isinstance(out['u'], np.memmap)
+    assert out['L'] == mem['L']
+    for key in ('u', 'kappa', 'tau'):
+        np.testing.assert_array_equal(out[key], mem[key])
+    assert out['pack']['global'] == mem['pack']['global']
+    assert [lv['stats'] for lv in out['pack']['levels']] == [lv['stats'] for lv in mem['pack']['levels']]
+    np.testing.assert_array_equal(reconstruct_from_memory(out), reconstruct_from_memory(mem))
+    copied = load_cmm(path, mmap=False)
+    assert not isinstance(copied['tau'], np.memmap)
+    np.testing.assert_array_equal(copied['tau'], mem['tau'])
+
+def test_cmm_without_pack_and_bad_magic(tmp_path):
+    mem = curve_memory_3d(helix(10))
+    path = str(tmp_path / 'm.cmm')
+    save_cmm(path, mem, pack=False)
+    assert 'pack' not in load_cmm(path)
+    bad = tmp_path / 'bad.cmm'
+    bad.write_bytes(b'\0' * 256)
+    with pytest.raises(ValueError):
+        load_cmm(str(bad))
+
+def test_cmm_reduced_precision(tmp_path):
+    mem = curve_memory_3d(helix(), dtype=np.float32, u_dtype=np.float16)
+    path = str(tmp_path / 'low.cmm')
+    save_cmm(path, mem)
+    out = load_cmm(path)
+    assert [a.dtype for a in (out['u'], out['kappa'], out['tau'])] == [np.float16, np.float32, np.float32]
+    for key in ('u', 'kappa', 'tau'):
+        np.testing.assert_array_equal(out[key], mem[key])
+
+def test_cmm_frames(tmp_path):
+    mem = add_checkpoints(curve_memory_3d(helix()), 5)
+    for pack in (True, False):
+        path = str(tmp_path / f'f{pack}.cmm')
+        save_cmm(path, mem, pack=pack)
+        off, rows = read_cmm_header(path)['frames']
+        assert off % 64 == 0 and rows == 5
+        np.testing.assert_array_equal(load_cmm(path)['frames'], mem['frames'])
+    save_cmm(path, curve_memory_3d(helix(10)))
+    assert read_cmm_header(path)['frames'] is None and 'frames' not in load_cmm(path)
@@ -1,5 +1,6 @@
-from curve_memory import encode_curve
-from curve_memory.compression import wedge_contract
+import numpy as np
+from curve_memory import Glyph, GlyphFamily, GlyphTable, encode_curve
+from curve_memory.compression import compression_ratio, contract_table, wedge_contract
 
 def test_wedge_contract_basic():
     pts = [(0,0),(1,0),(2,0),(3,0)]
@@ -9,3 +10,51 @@ def test_wedge_contract_basic():
     contracted = wedge_contract(glyphs)
     assert isinstance(contracted, list)
     assert len(contracted) <= len(glyphs)
+
+def _table(rows):
+    return GlyphTable.from_json([{"family": f, "theta": {"k": k, "L": L}, "bind": 1.0} for f, k, L in rows])
+
+def test_parallel_arcs_merge():
+    t = _table([("arc", 1.0, 1.0), ("arc", 2.0, 2.0), ("arc", 3.0, 1.0), ("arc", -1.0, 1.0)])
+    out = contract_table(t)
+    assert out.to_json() == [
+        {"family": "arc", "theta": {"k": 2.0, "L": 4.0}, "bind": 1.0},
+        {"family": "arc", "theta": {"k": -1.0, "L": 1.0}, "bind": 1.0},
+    ]
+    assert compression_ratio(t, out) == 2.0
+
+def test_clothoid_into_arc():
+    t = _table([("clothoid", 0.0, 1.0), ("clothoid", 0.7999, 1.0), ("arc", 0.8, 2.0), ("clothoid", 0.2, 1.0)])
+    out = contract_table(t)
+    assert [g["family"] for g in out.to_json()] == ["clothoid", "arc", "clothoid"]
+    assert out.params["L"].tolist() == [1.0, 3.0, 1.0]
+    np.testing.assert_allclose(out.params["k"][1] * 3.0, 0.7999 + 1.6)
+
+def test_opposite_pairs_cancel():
+    t = _table([("clothoid", 0.0, 1.0), ("arc", 1.0, 2.0), ("arc", -2.0, 1.0), ("arc", 1.0, 2.0),
+                ("arc", -2.0, 1.0), ("arc", 2.0, 1.0), ("clothoid", 0.0, 1.0)])
+    out = contract_table(t)
+    # pairs (1,2) and (3,4) cancel into one straight run with the clothoids around them
+    assert out.to_json() == [
+        {"family": "clothoid", "theta": {"k": 0.0, "L": 7.0}, "bind": 1.0},
+        {"family": "arc", "theta": {"k": 2.0, "L": 1.0}, "bind": 1.0},
+        {"family": "clothoid", "theta": {"k": 0.0, "L": 1.0}, "bind": 1.0},
+    ]
+    assert len(contract_table(t, cancel=False)) == 7
+
+def test_turning_preserved_on_random_stream():
+    rng = np.random.default_rng(0)
+    n = 20000
+    fam = rng.integers(0, 2, size=n)
+    k = rng.normal(size=n)
+    t = GlyphTable(family=fam, params={"k": k, "L": rng.uniform(0.5, 2.0, size=n)})
+    out = contract_table(t)
+    assert len(out) < n
+    np.testing.assert_allclose((out.params["k"] * out.params["L"]).sum(), (k * t.params["L"]).sum())
+    np.testing.assert_allclose(out.params["L"].sum(), t.params["L"].sum())
+
+def test_non_numeric_theta_carried():
+    C = GlyphFamily.CUSTOM
+    out = wedge_contract([Glyph(C, {'name': 'a', 'k': 1.0}, 1.0), Glyph(C, {'name': 'b', 'k': 3.0}, 1.0),
+                          Glyph(GlyphFamily.ARC, {'k': 0.5, 'tag': None}, 1.0)])
+    assert [g.theta for g in out] == [{'k': 2.0, 'name': 'b'}, {'k': 0.5, 'tag': None}]
@@ -0,0 +1,33 @@
+import math
+import numpy as np
+from curve_memory import encode_curve, kappa_tau_from_polyline
+from curve_memory.geometry import kappa_tau_array
+
+def _loop_kappa(points):
+    out = []
+    for i in range(1, len(points)-1):
+        (x0, y0), (x1, y1), (x2, y2) = points[i-1], points[i], points[i+1]
+        a1 = math.atan2(y1-y0, x1-x0)
+        a2 = math.atan2(y2-y1, x2-x1)
+        da = math.atan2(math.sin(a2-a1), math.cos(a2-a1))
+        out.append(da/max(math.hypot(x1-x0, y1-y0), 1e-12))
+    return out
+
+def test_kappa_array_matches_loop():
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, 4*np.pi, 200)
+    for P in (np.stack([np.cos(t), np.sin(t)], axis=1), np.cumsum(rng.normal(size=(300, 2)), axis=0),
+              np.array([[0, 0], [1, 0], [1, 0], [0, 0]], dtype=float)):
+        pts = [tuple(p) for p in P.tolist()]
+        kappa, tau = kappa_tau_from_polyline(P)
+        assert isinstance(kappa, np.ndarray) and kappa.shape == (len(P)-2,)
+        np.testing.assert_allclose(kappa, _loop_kappa(pts), rtol=1e-12, atol=1e-12)
+        assert not tau.any()
+        kl, tl = kappa_tau_from_polyline(pts)
+        assert isinstance(kl, list) and kl == kappa.tolist() and tl == [0.0]*len(kl)
+
+def test_short_and_array_encode():
+    assert kappa_tau_from_polyline([(0, 0), (1, 0)]) == ([0.0], [0.0])
+    assert kappa_tau_array(np.zeros((2, 2)))[0].tolist() == [0.0]
+    P = np.array([[0, 0], [1, 0], [2, 1], [3, 1]], dtype=float)
+    assert encode_curve(P) == encode_curve([tuple(p) for p in P.tolist()])
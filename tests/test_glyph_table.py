@@ -0,0 +1,51 @@
+import json
+import numpy as np
+import pytest
+from curve_memory import Glyph, GlyphFamily, GlyphTable, decode_curve, encode_curve, encode_table, wedge_contract
+from curve_memory.geometry import curve_hash
+
+def _spiral(n=400):
+    t = np.linspace(0, 6*np.pi, n)
+    return np.stack([t*np.cos(t), t*np.sin(t)], axis=1)
+
+def test_roundtrip_json_and_glyphs():
+    items = [{"family": "arc", "theta": {"k": 1.0, "L": 2.0}, "bind": 1.0},
+             {"family": "cubic", "theta": {"a": 3.0}, "bind": 0.5},
+             {"family": "custom", "theta": {}, "bind": 1.0}]
+    t = GlyphTable.from_json(items)
+    assert len(t) == 3 and t.family.dtype == np.uint8
+    assert t.to_json() == items
+    g = t.to_glyphs()
+    assert g[1] == Glyph(family=GlyphFamily.CUBIC, theta={"a": 3.0}, bind=0.5)
+    assert GlyphTable.from_glyphs(g).to_json() == items
+    np.testing.assert_array_equal(t.column("k", 0.0), [1.0, 0.0, 0.0])
+    with pytest.raises(ValueError):
+        GlyphTable.from_json([{"family": "custom", "theta": {"name": "x"}}])
+
+def test_contract_list_and_table_agree():
+    items = [{"family": "arc", "theta": {"k": 1.0, "L": 1.0}},
+             {"family": "arc", "theta": {"k": 2.0}},
+             {"family": "arc", "theta": {"k": 4.0, "L": 3.0}},
+             {"family": "clothoid", "theta": {"k": 0.1, "L": 1.0}},
+             {"family": "arc", "theta": {"L": 2.0}, "bind": 0.0}]
+    glyphs = [Glyph(family=GlyphFamily(g["family"]), theta=g["theta"], bind=g.get("bind", 1.0)) for g in items]
+    ref = wedge_contract(glyphs)
+    out = wedge_contract(GlyphTable.from_json(items))
+    assert isinstance(out, GlyphTable) and isinstance(ref[0], Glyph)
+    assert out.to_glyphs() == ref
+    # the three arcs merge with L summed and turning preserved
+    assert ref[0].theta == {"k": (1.0 + 2.0 + 12.0) / 5.0, "L": 5.0}
+
+def test_encode_decode_table():
+    P = _spiral()
+    cma = encode_curve(P, with_hash=True)
+    json.dumps(cma)
+    t = encode_table(P)
+    assert isinstance(t, GlyphTable)
+    ref = GlyphTable.from_json(cma["glyphs"])
+    np.testing.assert_array_equal(t.family, ref.family)
+    np.testing.assert_allclose(t.params["k"], ref.params["k"], rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(decode_curve({"glyphs": t}), decode_curve(cma), atol=1e-9)
+    np.testing.assert_allclose(decode_curve(t), decode_curve(cma), atol=1e-9)
+    h = curve_hash({"glyphs": t})
+    np.testing.assert_allclose(list(cma["hash"].values()), [h.I_kappa, h.I_tau, h.area], atol=1e-9)
@@ -0,0 +1,52 @@
+import numpy as np
+from curve_memory import CurveHash, CurveHashIndex, curve_hash, curve_memory_3d, encode_curve, memory_hash
+from curves import helix
+
+def test_curve_hash_2d():
+    square = [(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]
+    cma = encode_curve(square, with_hash=True)
+    h = curve_hash(cma)
+    assert cma['hash'] == {'I_kappa': h.I_kappa, 'I_tau': h.I_tau, 'area': h.area}
+    assert 'hash' not in encode_curve(square)
+
+def test_memory_hash_rigid_invariant():
+    pts = helix(400, turns=2)
+    th = 0.7
+    R = np.array([[np.cos(th), -np.sin(th), 0], [np.sin(th), np.cos(th), 0], [0, 0, 1]])
+    a = memory_hash(curve_memory_3d(pts))
+    b = memory_hash(curve_memory_3d(pts @ R.T + [3.0, -1.0, 2.0]))
+    np.testing.assert_allclose([a.I_kappa, a.I_tau, a.area], [b.I_kappa, b.I_tau, b.area], rtol=1e-4)
+
+def test_index_finds_moved_float32_copy():
+    rng = np.random.default_rng(3)
+    # long walk: the hash components reach ~1e4, so rounding exceeds any small absolute tol
+    pts = np.cumsum(rng.normal(size=(20000, 3)), axis=0)
+    q, _ = np.linalg.qr(rng.normal(size=(3, 3)))
+    q[:, 0] *= np.sign(np.linalg.det(q))
+    idx = CurveHashIndex()
+    idx.add(memory_hash(curve_memory_3d(pts, dtype=np.float32)))
+    moved = memory_hash(curve_memory_3d(pts @ q.T + [5.0, -2.0, 1.0], dtype=np.float32))
+    assert idx.query(moved).tolist() == [0]
+    assert idx.query(memory_hash(curve_memory_3d(helix(), dtype=np.float32))).size == 0
+
+def test_index_exact_and_near(tmp_path):
+    rng = np.random.default_rng(1)
+    vals = rng.normal(size=(5000, 3)) * 10
+    idx = CurveHashIndex(tol=1e-3, rtol=0)
+    ids = idx.add(vals)
+    assert ids.tolist() == list(range(5000)) and len(idx) == 5000
+    h = CurveHash(*vals[1234])
+    assert idx.lookup(h).tolist() == [1234]
+    idx.add([vals[1234] + 5e-4], ids=[9000])
+    assert sorted(idx.query(h).tolist()) == [1234, 9000]
+    assert idx.lookup(h).tolist() == [1234]
+    assert idx.query(vals[1234] + 0.5).size == 0
+    # wider tolerance than the grid reaches further cells
+    assert sorted(idx.query(vals[1234] + 2e-3, tol=3e-3).tolist()) == [1234, 9000]
+    idx.save(str(tmp_path / 'ix'))
+    for mmap in (True, False):
+        again = CurveHashIndex.load(str(tmp_path / 'ix'), mmap=mmap)
+        assert len(again) == 5001
+        assert sorted(again.query(h).tolist()) == [1234, 9000]
+        assert again.add(vals[:1]).tolist() == [9001]
+        assert sorted(again.lookup(vals[0]).tolist()) == [0, 9001]
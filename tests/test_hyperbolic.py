@@ -1,5 +1,11 @@
+import math
 import unittest
-from curve_memory.hyperbolic import pi_a_over_pi, validate_hyperbolic_params
+import numpy as np
+from curve_memory.hyperbolic import (
+    pi_a_over_pi, validate_hyperbolic_params, full_turn_deg, rotate_cmd, geodesic_distance,
+    pi_a_over_pi_array, full_turn_deg_array, rotate_cmd_array, geodesic_distance_array,
+    geodesic_cdist, geodesic_knn,
+)
 
 class TestHyperbolic(unittest.TestCase):
     def test_standard(self):
@@ -13,5 +19,66 @@ class TestHyperbolic(unittest.TestCase):
         valid, _ = validate_hyperbolic_params(1.0, 1.0)
         self.assertTrue(valid)
 
+class TestHyperbolicArrays(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # cover every regime: flat, Taylor, sinh, overflow cutoff, non-finite
+        special = [0.0, 1e-11, -1e-11, 1e-2, -1e-2, 700.0, -700.0, 701.0, np.nan, np.inf, -np.inf]
+        vals = np.concatenate([rng.normal(size=2000) * 10 ** rng.uniform(-14, 4, 2000), special])
+        self.r = rng.choice(vals, 5000)
+        self.k = rng.choice(vals, 5000)
+
+    def test_pi_a_bit_identical(self):
+        out = pi_a_over_pi_array(self.r, self.k)
+        with np.errstate(all='ignore'):
+            ref = np.array([pi_a_over_pi(r, k) for r, k in zip(self.r, self.k)])
+            turn_ref = [full_turn_deg(r, k) for r, k in zip(self.r, self.k)]
+            rot_ref = [rotate_cmd(90.0, r, k) for r, k in zip(self.r, self.k)]
+        np.testing.assert_array_equal(out.view(np.int64), ref.view(np.int64))
+        self.assertEqual(full_turn_deg_array(self.r, self.k).tolist(), turn_ref)
+        self.assertEqual(rotate_cmd_array(90.0, self.r, self.k).tolist(), rot_ref)
+
+    def test_broadcasting(self):
+        grid = pi_a_over_pi_array(np.linspace(0, 2, 5)[:, None], np.array([-1.0, 0.5, 3.0]))
+        self.assertEqual(grid.shape, (5, 3))
+        self.assertEqual(grid[1, 2], pi_a_over_pi(0.5, 3.0))
+
+    def test_geodesic_distance(self):
+        rng = np.random.default_rng(1)
+        p1 = rng.normal(size=(500, 3)); p2 = rng.normal(size=(500, 3))
+        p1[:5] = 0.0; p2[5:10] = 0.0
+        kappa = rng.uniform(0.5, 5.0, 500)
+        out = geodesic_distance_array(p1, p2, kappa)
+        ref = [geodesic_distance(tuple(a), tuple(b), k) for a, b, k in zip(p1, p2, kappa)]
+        np.testing.assert_allclose(out, ref, rtol=1e-12, atol=1e-12)
+        self.assertTrue(math.isclose(geodesic_distance_array(p1[20], p2, 2.0)[30],
+                                     geodesic_distance(tuple(p1[20]), tuple(p2[30]), 2.0), rel_tol=1e-12))
+
+class TestPairwise(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.A = rng.normal(size=(300, 3)); self.A[3] = 0.0
+        self.B = rng.normal(size=(200, 3)); self.B[7] = 0.0
+
+    def test_cdist_blocks(self):
+        ref = geodesic_distance_array(self.A[:, None, :], self.B[None, :, :], 2.0)
+        for max_bytes in (1000, 50000, 1 << 26):
+            np.testing.assert_allclose(geodesic_cdist(self.A, self.B, 2.0, max_bytes=max_bytes), ref, atol=1e-12)
+        out = np.zeros((300, 300))
+        geodesic_cdist(self.A, kappa=2.0, out=out, max_bytes=20000)
+        np.testing.assert_allclose(out, out.T, atol=1e-12)
+
+    def test_knn(self):
+        for kappa in (2.0, -2.0):
+            full = geodesic_cdist(self.A, self.B, kappa)
+            idx, dist = geodesic_knn(self.A, self.B, kappa, k=4, max_bytes=30000)
+            np.testing.assert_allclose(dist, np.sort(full, axis=1)[:, :4], atol=1e-12)
+            np.testing.assert_allclose(np.take_along_axis(full, idx, axis=1), dist, atol=1e-12)
+        idx, dist = geodesic_knn(self.A, kappa=2.0, k=3, max_bytes=20000)
+        self.assertFalse((idx == np.arange(300)[:, None]).any())
+        full = geodesic_cdist(self.A, kappa=2.0)
+        np.fill_diagonal(full, np.inf)
+        np.testing.assert_allclose(dist, np.sort(full, axis=1)[:, :3], atol=1e-12)
+
 if __name__ == '__main__':
     unittest.main()
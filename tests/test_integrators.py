@@ -0,0 +1,44 @@
+import math
+import numpy as np
+from curve_memory import Glyph, GlyphFamily, GlyphTable, decode_curve
+from curve_memory.integrators import integrate_se2, integrate_se2_arrays
+
+def _loop(k, L):
+    pts = [(0.0, 0.0)]
+    x = y = theta = 0.0
+    for ki, Li in zip(k, L):
+        if abs(ki) < 1e-6:
+            x += Li*math.cos(theta); y += Li*math.sin(theta)
+        else:
+            x += (math.sin(theta + ki*Li) - math.sin(theta)) / ki
+            y -= (math.cos(theta + ki*Li) - math.cos(theta)) / ki
+            theta += ki*Li
+        pts.append((x, y))
+    return pts
+
+def test_matches_arc_stepping():
+    rng = np.random.default_rng(0)
+    k = rng.normal(size=2000)
+    k[::7] = 0.0
+    k[::11] = 1e-8
+    L = rng.uniform(0.1, 2.0, size=2000)
+    np.testing.assert_allclose(integrate_se2_arrays(k, L), _loop(k, L), atol=1e-9)
+
+def test_circle_closes_both_ways():
+    for k in (1.0, -1.0):
+        pts = integrate_se2_arrays(np.full(100, k), np.full(100, 2*np.pi/100))
+        np.testing.assert_allclose(pts[-1], [0.0, 0.0], atol=1e-12)
+        # right-hand turns go below the x axis
+        assert np.sign(pts[25, 1]) == np.sign(k)
+
+def test_entry_points_agree():
+    glyphs = [Glyph(family=GlyphFamily.ARC, theta={"k": 0.5, "L": 2.0}),
+              Glyph(family=GlyphFamily.CLOTHOID, theta={"k": 0.0}),
+              Glyph(family=GlyphFamily.ARC, theta={"k": -1.0, "L": 0.5})]
+    cma = {"glyphs": [{"family": g.family.value, "theta": g.theta, "bind": g.bind} for g in glyphs]}
+    ref = integrate_se2(glyphs)
+    assert len(ref) == 4 and isinstance(ref[0], tuple)
+    assert decode_curve(cma) == ref
+    assert integrate_se2(GlyphTable.from_glyphs(glyphs)) == ref
+    np.testing.assert_array_equal(decode_curve(cma, as_array=True), ref)
+    assert decode_curve({}) == [(0.0, 0.0)]
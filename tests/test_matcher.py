@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from curve_memory.cma3d import CurveMemory, curve_memory_3d, curve_memory_3d_batch
+from curve_memory.matcher import (
+    MemoryMatcher, _grid_norms, _norm_bound, dtw_distance, resample_memory, xcorr_distance,
+)
+from curves import helix
+
+def _signal(seed, n=200, L=5.0):
+    """Smooth random kappa/tau memory (a synthetic archive entry)."""
+    rng = np.random.default_rng(seed)
+    u = np.linspace(0, 1, n)
+    kappa = 1 + 0.3*sum(rng.normal()*np.sin(2*np.pi*f*u + rng.uniform(0, 6)) for f in (1, 2, 3))
+    tau = 0.2*sum(rng.normal()*np.cos(2*np.pi*f*u + rng.uniform(0, 6)) for f in (1, 2))
+    return CurveMemory(L, u, kappa, tau, levels=1)
+
+def _coarse(seed):
+    """Archive entry with few or many knots, as mixed-resolution archives have."""
+    rng = np.random.default_rng(seed)
+    u = np.linspace(0, 1, rng.choice([6, 9, 12, 64, 400]))
+    a, b, c = rng.uniform(0, 1, 3)
+    return {'L': 1.0, 'u': u, 'kappa': 1 + a*np.sin(2*np.pi*(u + b)), 'tau': c*np.cos(4*np.pi*u)}
+
+def test_rigid_motion_and_reversal():
+    pts = helix(400, turns=2)
+    th = 0.9
+    R = np.array([[1, 0, 0], [0, np.cos(th), -np.sin(th)], [0, np.sin(th), np.cos(th)]])
+    a = curve_memory_3d(pts)
+    assert xcorr_distance(a, curve_memory_3d(pts @ R.T + 2.0)).distance < 1e-6
+    m = xcorr_distance(a, curve_memory_3d(pts[::-1]))
+    assert m.distance < 0.05 * np.sqrt(np.mean(resample_memory(a)**2))
+    assert xcorr_distance(a, curve_memory_3d(helix(400, turns=2, c=0.5))).distance > 0.1
+
+def test_shift_recovered():
+    a = _signal(1)
+    u = a['u']
+    b = CurveMemory(5.0, u, np.interp((u + 0.25) % 1, u, a['kappa']), np.interp((u + 0.25) % 1, u, a['tau']))
+    m = xcorr_distance(a, b)
+    assert m.distance < 1e-3 and m.shift == pytest.approx(-0.25) and not m.reversed
+    assert xcorr_distance(a, b, max_shift=0.1).distance > 0.05
+    r = CurveMemory(5.0, u, a['kappa'][::-1], a['tau'][::-1])
+    assert xcorr_distance(a, r).reversed and dtw_distance(a, r).reversed
+    assert dtw_distance(a, r).distance < 1e-12 and dtw_distance(a, r, reverse=False).distance > 0.05
+    assert xcorr_distance(a, b, max_shift=0.0, reverse=False).distance == pytest.approx(
+        np.sqrt(np.mean(np.sum((resample_memory(a) - resample_memory(b))**2, axis=0))))
+    # DTW does not search shifts but never exceeds the aligned distance
+    assert dtw_distance(a, b, n=256).distance <= xcorr_distance(a, b, max_shift=0.0, reverse=False).distance + 1e-12
+
+def test_norm_bound_below_distance():
+    mems = [_signal(s) for s in range(200)] + [_coarse(s) for s in range(200)]
+    sig = np.stack([resample_memory(m, 128) for m in mems])
+    for q in (_signal(100), _coarse(1000)):
+        lb = _norm_bound(_grid_norms(resample_memory(q, 128)), _grid_norms(sig))
+        d = np.array([xcorr_distance(q, m, n=128).distance for m in mems])
+        assert np.all(lb <= d + 1e-12)
+
+@pytest.mark.parametrize('method', ['xcorr', 'dtw'])
+def test_topk_pruned_matches_exhaustive(method):
+    mems = [_signal(s) for s in range(600)]
+    matcher = MemoryMatcher(64)
+    assert matcher.add(mems).tolist() == list(range(600)) and len(matcher) == 600
+    q = _signal(7)
+    pruned = matcher.query(q, 5, method=method)
+    scored = matcher.scored
+    full = matcher.query(q, 5, method=method, prune=False)
+    assert scored < matcher.scored == 600
+    assert [m.id for m in pruned] == [m.id for m in full]
+    np.testing.assert_allclose([m.distance for m in pruned], [m.distance for m in full])
+    assert pruned[0].id == 7 and pruned[0].distance < 1e-6
+
+@pytest.mark.parametrize('method', ['xcorr', 'dtw'])
+def test_topk_pruned_matches_exhaustive_mixed_resolution(method):
+    matcher = MemoryMatcher(128)
+    matcher.add([_coarse(s) for s in range(400)])
+    for seed in range(400, 410):
+        q = _coarse(seed)
+        pruned = matcher.query(q, 5, method=method)
+        full = matcher.query(q, 5, method=method, prune=False)
+        assert [m.id for m in pruned] == [m.id for m in full]
+        np.testing.assert_allclose([m.distance for m in pruned], [m.distance for m in full])
+
+def test_batch_archive_and_ids():
+    rng = np.random.default_rng(0)
+    curves = [np.cumsum(rng.normal(size=(50, 3)), axis=0) for _ in range(20)]
+    matcher = MemoryMatcher(64)
+    matcher.add(curve_memory_3d_batch(curves), ids=range(100, 120))
+    res = matcher.query(curve_memory_3d(curves[4]), 3)
+    assert res[0].id == 104 and res[0].distance < 1e-6
+    with pytest.raises(ValueError):
+        matcher.query(curve_memory_3d(curves[0]), 0)
+    with pytest.raises(ValueError):
+        MemoryMatcher(64, max_shift=0.8)
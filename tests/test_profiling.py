@@ -0,0 +1,48 @@
+import json
+import numpy as np
+from curve_memory import CurveMemoryStream, Profiler, curve_memory_3d, reconstruct_from_memory
+from curve_memory import profiling
+from curves import helix
+
+def test_disabled_is_shared_noop():
+    assert profiling.active() is None
+    assert profiling.stage('a') is profiling.stage('b')
+
+def test_encode_and_reconstruct_stages(tmp_path):
+    with Profiler() as prof:
+        assert profiling.active() is prof
+        mem = curve_memory_3d(helix(2000))
+        mem['pack']['global']
+        reconstruct_from_memory(mem, method='scan')
+        reconstruct_from_memory(mem)
+    assert profiling.active() is None
+    st = prof.to_dict()
+    for name in ('cma3d.curve_memory_3d', 'cma3d.arclength', 'cma3d.curvature', 'cma3d.torsion',
+                 'reconstruct.interp', 'reconstruct.rotations',
+                 'reconstruct.scan', 'reconstruct.positions', 'reconstruct.step'):
+        assert st[name]['calls'] == 1, name
+    # tangents are computed by both curvature and torsion
+    assert st['cma3d.tangent']['calls'] == 2
+    assert st['cma3d.reconstruct']['calls'] == 2
+    # pack statistics are computed lazily, outside curve_memory_3d
+    assert st['cma3d.multiscale_pack']['calls'] == 1
+    total = st['cma3d.curve_memory_3d']
+    assert total['seconds'] >= st['cma3d.torsion']['seconds']
+    # the result arrays (3 x 2000 doubles) are allocated inside the stage; nested peaks propagate up
+    assert total['peak_bytes'] >= 3 * 2000 * 8
+    assert total['peak_bytes'] >= st['cma3d.torsion']['peak_bytes']
+    path = str(tmp_path / 'trace.json')
+    prof.save_chrome_trace(path)
+    events = json.load(open(path))['traceEvents']
+    assert len(events) == sum(s['calls'] for s in st.values())
+    assert all(e['ph'] == 'X' and e['dur'] >= 0 for e in events)
+
+def test_memory_off_and_stream():
+    with Profiler(memory=False) as prof:
+        s = CurveMemoryStream()
+        for block in np.array_split(helix(2000), 4):
+            s.append(block)
+        s.snapshot()
+    st = prof.to_dict()
+    assert st['stream.append']['calls'] == 4 and st['stream.snapshot']['calls'] == 1
+    assert st['stream.append']['bytes'] == 0
@@ -0,0 +1,81 @@
+from functools import partial
+import numpy as np
+import pytest
+from curve_memory.cma3d import _arclengths, curve_memory_3d, reconstruct_from_memory, reconstruct_range
+from curve_memory import simplify
+from curve_memory.simplify import _default_ds, _max_error, simplify_knots, simplify_memory
+from curves import helix, trefoil
+
+def _cad_path(n):
+    """Line, quarter arc, line, then a helix: piecewise-constant curvature."""
+    m = n // 4
+    a = np.linspace(0, 10, m)[:, None] * [1.0, 0.0, 0.0]
+    th = np.linspace(0, np.pi/2, m)
+    b = np.stack([10 + 2*np.sin(th), 2 - 2*np.cos(th), 0*th], axis=1)
+    c = b[-1] + np.linspace(0, 10, m)[:, None] * [0.0, 1.0, 0.0]
+    t = np.linspace(0, 6*np.pi, m)
+    d = c[-1] + np.stack([np.cos(t) - 1, np.sin(t), 0.2*t], axis=1)
+    return np.concatenate([a, b[1:], c[1:], d[1:]])
+
+def test_knots_within_eps():
+    rng = np.random.default_rng(0)
+    u = np.sort(rng.uniform(size=500)); u[0], u[-1] = 0.0, 1.0
+    u[100:103] = u[100]  # repeated u
+    y = np.sin(6*u) + 0.01*rng.normal(size=500)
+    z = np.abs(u - 0.5)
+    for eps in (1e-3, 0.05):
+        idx = simplify_knots(u, [y, z], eps)
+        assert idx[0] == 0 and idx[-1] == 499 and np.all(np.diff(idx) > 0)
+        distinct = np.ones(500, dtype=bool)
+        distinct[100:103] = False  # the interpolant is ambiguous at repeated u
+        for sig in (y, z):
+            err = np.abs(np.interp(u, u[idx], sig[idx]) - sig)[distinct]
+            assert err.max() <= eps + 1e-12
+    line = np.linspace(0, 1, 50)
+    assert simplify_knots(line, [2*line], 1e-9).tolist() == [0, 49]
+
+@pytest.mark.parametrize('curve, n', [(partial(helix, turns=20), 20000), (_cad_path, 20000), (trefoil, 5000)])
+def test_simplify_error_bound(curve, n):
+    mem = curve_memory_3d(curve(n))
+    tol = 1e-3 * mem['L']
+    out = simplify_memory(mem, tol)
+    ref = reconstruct_from_memory(mem, method='scan')
+    rec = reconstruct_from_memory(out, method='scan')
+    L = mem['L']
+    assert _max_error(ref, _arclengths(L, _default_ds(mem)), rec, _arclengths(L, out['ds'])) <= tol
+    assert np.linalg.norm(rec[-1] - ref[-1]) <= tol
+    assert out['u'].shape[0] * 10 <= n
+    assert out['u'][0] == 0.0 and out['u'][-1] == 1.0
+
+def test_simplify_coarsens_step_and_keeps_dtype():
+    mem = curve_memory_3d(helix(20000, turns=20), dtype=np.float32)
+    out = simplify_memory(mem, 1e-2 * mem['L'])
+    assert out['kappa'].dtype == np.float32
+    assert out['ds'] > _default_ds(mem)
+    rec = reconstruct_from_memory(out, method='scan')
+    assert rec.shape[0] < 20000
+    # the coarse run still reaches the curve end
+    ref = reconstruct_from_memory(mem, method='scan')
+    assert np.linalg.norm(rec[-1] - ref[-1]) <= 1e-2 * mem['L']
+    with pytest.raises(ValueError):
+        simplify_memory(mem, 0.0)
+    flat = simplify_memory(curve_memory_3d(np.zeros((5, 3))), 1e-3)
+    assert flat['u'].shape[0] == 5
+
+def test_simplify_falls_back_to_analytic_bound(monkeypatch):
+    # without bisection only eps = ptp (fails here) and eps = tol / L**2 are tried
+    monkeypatch.setattr(simplify, '_BISECT', 0)
+    mem = curve_memory_3d(trefoil(5000))
+    out = simplify_memory(mem, 1e-3 * mem['L'])
+    assert out['u'].shape[0] < 5000
+    ref = reconstruct_from_memory(mem, method='scan')
+    rec = reconstruct_from_memory(out, method='scan')
+    L = mem['L']
+    assert _max_error(ref, _arclengths(L, _default_ds(mem)), rec, _arclengths(L, out['ds'])) <= 1e-3 * L
+
+def test_simplify_keeps_checkpoints():
+    mem = curve_memory_3d(helix(2000, turns=20), checkpoints=8)
+    simple = simplify_memory(mem, 1e-3 * mem['L'])
+    assert simple['frames'].shape[0] == 8
+    np.testing.assert_allclose(reconstruct_range(simple, 0.0, 1.0),
+                               reconstruct_from_memory(simple, method='magnus4'), atol=1e-9)
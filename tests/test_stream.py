@@ -0,0 +1,63 @@
+import numpy as np
+from curve_memory.cma3d import curve_memory_3d
+from curve_memory.stream import DEFAULT_HISTORY, CurveMemoryStream
+from curves import helix
+
+def _check(mem, ref):
+    assert abs(mem['L'] - ref['L']) < 1e-9
+    for key in ('u', 'kappa', 'tau'):
+        np.testing.assert_allclose(mem[key], ref[key], atol=1e-9)
+    for key, val in ref['pack']['global'].items():
+        assert abs(mem['pack']['global'][key] - val) < 1e-9
+
+def test_stream_matches_batch_encoder():
+    rng = np.random.default_rng(0)
+    line = np.stack([np.linspace(0, 1, 20), np.zeros(20), np.zeros(20)], axis=1)
+    for pts in (helix(), np.cumsum(rng.normal(size=(300, 3)), axis=0), helix(3), helix(4),
+                np.ones((5, 3)), np.concatenate([line, helix(50) + [1.0, -1.0, 0.0]])):
+        enc = CurveMemoryStream()
+        enc.append(pts[0])
+        for chunk in np.array_split(pts[1:], 5):
+            enc.append(chunk)
+        ref = curve_memory_3d(pts)
+        _check(enc.snapshot(), ref)
+        stats = enc.stats()
+        for key, val in ref['pack']['levels'][0]['stats'].items():
+            assert abs(stats[key] - val) < 1e-9
+
+def test_stream_bounded_history():
+    rng = np.random.default_rng(1)
+    pts = np.cumsum(rng.normal(size=(5000, 3)), axis=0)
+    enc = CurveMemoryStream(history=100)
+    enc.append(pts)
+    assert enc._buf.shape[0] == 200
+    mem = enc.snapshot()
+    ref = curve_memory_3d(pts)
+    assert mem['u'].shape == (100,)
+    np.testing.assert_allclose(mem['kappa'], ref['kappa'][-100:], atol=1e-9)
+    np.testing.assert_allclose(mem['tau'], ref['tau'][-100:], atol=1e-9)
+    for key, val in ref['pack']['global'].items():
+        assert abs(mem['pack']['global'][key] - val) < 1e-9
+
+def test_stream_default_history_is_bounded():
+    rng = np.random.default_rng(2)
+    pts = np.cumsum(rng.normal(size=(3000, 3)), axis=0)
+    enc = CurveMemoryStream()
+    assert enc.history == DEFAULT_HISTORY and enc._buf.shape[0] <= 1024
+    enc = CurveMemoryStream(history=700)
+    for chunk in np.array_split(pts, 30):
+        enc.append(chunk)
+    assert enc._buf.shape[0] == 1400 and enc.snapshot()['u'].shape == (700,)
+    np.testing.assert_allclose(enc.snapshot()['kappa'], curve_memory_3d(pts)['kappa'][-700:], atol=1e-9)
+    everything = CurveMemoryStream(history=None)
+    everything.append(pts)
+    _check(everything.snapshot(), curve_memory_3d(pts))
+
+def test_stream_snapshot_dtype():
+    enc = CurveMemoryStream()
+    enc.append(helix())
+    mem = enc.snapshot(dtype=np.float32, u_dtype=np.float16)
+    ref = curve_memory_3d(helix(), dtype=np.float32, u_dtype=np.float16)
+    for key in ('u', 'kappa', 'tau'):
+        assert mem[key].dtype == ref[key].dtype
+        np.testing.assert_allclose(mem[key], ref[key], atol=1e-6)